@@ -0,0 +1,174 @@
+"""Cost, latency and wrong verdicts of the model cascade.
+
+Compares three routings on the in-process stub, where the small model gives an
+ambiguous answer to a share of the checks and the large model never does:
+
+- small: every check on the analyzer's model (today's behaviour)
+- large: every check on the escalation model
+- cascade: the small model first, ambiguous answers escalated
+
+A wrong verdict is a script whose pass/fail results differ from those of the
+clear answers.
+
+    python src/benchmarks/bench_cascade.py --scripts 200 --ambiguous-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from typing import Dict
+
+sys.path.append("./")
+
+from src.benchmarks.bench_end_to_end import build_submissions, percentile
+from src.benchmarks.stub_openai import (
+    LatencyModel,
+    StubAsyncOpenAI,
+    canned_response,
+    classify_prompt,
+)
+from src.evaluation_engine.cascade import CascadePolicy, ModelCascade
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+
+SMALL_MODEL = "gpt-4o-mini"
+LARGE_MODEL = "gpt-4o"
+# First-pass answers the cascade should not trust, one per check
+AMBIGUOUS_SECTIONS = {
+    "brand safety": (
+        "Adult Content: None found, nothing explicit or inappropriate.\n"
+        "Severity: Low\n\n"
+        "Political: None found.\nSeverity: Low\n\n"
+        "Harassment: None found.\nSeverity: Low\n\n"
+        "Misinformation: None found.\nSeverity: Low"
+    ),
+    "core requirements": (
+        "Introduction: The script does not quite call Milanote a tool for "
+        "organizing creative projects.\n\n"
+        "Product Description: Milanote is described as a canvas for planning and "
+        "brainstorming where team members can collab on boards."
+    ),
+    "script flow": (
+        "Introduction: Milanote is introduced as a tool for creative projects.\n\n"
+        "Personal Usage: The creator describes using a project board."
+    ),
+    "avoided elements": (
+        "Content Problems: It is unclear whether the setup steps are confusing.\n\n"
+        "Tone: Authentic and in the creator's voice."
+    ),
+}
+
+
+class ModelRouter:
+    """Stands in for AsyncOpenAI, sending each request to its model's stub"""
+
+    def __init__(self, clients: Dict[str, StubAsyncOpenAI]):
+        self.clients = clients
+        self.chat = self
+        self.completions = self
+
+    @property
+    def with_streaming_response(self):
+        return self
+
+    def create(self, **kwargs):
+        client = self.clients[kwargs["model"]]
+        return client.chat.completions.with_streaming_response.create(**kwargs)
+
+
+def verdicts(analysis: Dict):
+    return {
+        category: [(result.criteria, result.passed) for result in results]
+        for category, results in analysis["details"].items()
+    }
+
+
+async def run_mode(mode: str, args) -> Dict:
+    rng = random.Random(5)
+
+    def small_answer(prompt: str) -> str:
+        category = classify_prompt(prompt)
+        if category in AMBIGUOUS_SECTIONS and rng.random() < args.ambiguous_rate:
+            return AMBIGUOUS_SECTIONS[category]
+        return canned_response(prompt)
+
+    scale = args.time_scale
+    clients = {
+        SMALL_MODEL: StubAsyncOpenAI(
+            LatencyModel(0.35 * scale, 0.00002 * scale, 0.012 * scale), small_answer
+        ),
+        LARGE_MODEL: StubAsyncOpenAI(
+            LatencyModel(0.6 * scale, 0.00004 * scale, 0.03 * scale)
+        ),
+    }
+    cascade = ModelCascade(CascadePolicy(escalation_model=LARGE_MODEL))
+    analyzer = ScriptAnalyzer(
+        openai_api_key="benchmark", cascade=cascade if mode == "cascade" else None
+    )
+    if mode == "large":
+        analyzer.model = LARGE_MODEL
+    analyzer.openai_client = ModelRouter(clients)
+
+    latencies, costs, wrong = [], [], 0
+    async for item in analyzer.analyze_many(
+        build_submissions(args.scripts, 3), max_concurrency=args.concurrency
+    ):
+        latencies.append(item.elapsed_seconds)
+        costs.append(item.analysis["timings"]["cost_usd"])
+        wrong += verdicts(item.analysis) != args.expected
+    row = {
+        "mode": mode,
+        "p50_seconds": percentile(latencies, 0.50),
+        "p95_seconds": percentile(latencies, 0.95),
+        "cost_per_1k_scripts": sum(costs) / len(costs) * 1000,
+        "wrong_verdicts": wrong,
+        "large_requests": len(clients[LARGE_MODEL].calls),
+    }
+    if mode == "cascade":
+        stats = cascade.stats()
+        routed = sum(check["routed"] for check in stats.values())
+        row["escalation_rate"] = (
+            sum(check["escalated"] for check in stats.values()) / routed
+        )
+        row["per_check"] = stats
+    return row
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ambiguous-rate", type=float, default=0.1)
+    parser.add_argument(
+        "--time-scale", type=float, default=0.1, help="scale simulated latencies"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    # Clear answers only, to know the right verdicts
+    reference = ScriptAnalyzer(openai_api_key="benchmark")
+    reference.openai_client = StubAsyncOpenAI(LatencyModel(0, 0, 0))
+    args.expected = verdicts(await reference.analyze_script(build_submissions(1, 3)[0]))
+
+    rows = [await run_mode(mode, args) for mode in ("small", "large", "cascade")]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(
+        f"{'mode':<8} {'p50 s':>7} {'p95 s':>7} {'$/1k scripts':>13} "
+        f"{'wrong':>6} {'large calls':>12} {'escalated':>10}"
+    )
+    for row in rows:
+        escalated = row.get("escalation_rate")
+        print(
+            f"{row['mode']:<8} {row['p50_seconds']:>7.3f} {row['p95_seconds']:>7.3f} "
+            f"{row['cost_per_1k_scripts']:>13.3f} {row['wrong_verdicts']:>6} "
+            f"{row['large_requests']:>12} "
+            f"{'-' if escalated is None else format(escalated, '.1%'):>10}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
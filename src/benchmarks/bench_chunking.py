@@ -0,0 +1,119 @@
+"""Latency of whole-script versus chunked analysis as scripts get longer.
+
+Uses the in-process stub, whose simulated latency grows with the prompt
+length, so the effect of splitting long transcripts is visible without an
+API key. The brand safety column is the chunked check on its own; the total
+still includes core requirements and script flow, which always read the
+whole script:
+
+    python src/benchmarks/bench_chunking.py --sizes 8000,32000,128000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.chunking import ChunkingPolicy
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+SAMPLE_PARAGRAPH = (
+    "Milanote is a tool for organizing creative projects. I use it every day to "
+    "plan videos on a big visual board, collect references and sketch ideas. "
+    "There are templates for almost anything and you can collaborate with your "
+    "team in real time. It's free with no time limit, so sign up with the link "
+    "in the description."
+)
+
+
+def build_script(chars: int) -> str:
+    paragraphs = max(1, chars // (len(SAMPLE_PARAGRAPH) + 2))
+    return "\n\n".join(SAMPLE_PARAGRAPH for _ in range(paragraphs))
+
+
+async def run(content: str, chunking, latency: LatencyModel) -> dict:
+    analyzer = ScriptAnalyzer(openai_api_key="benchmark", chunking=chunking)
+    analyzer.openai_client = StubAsyncOpenAI(latency=latency)
+    start = time.perf_counter()
+    result = await analyzer.analyze_script(
+        ScriptSubmission(content=content, creator_name="benchmark")
+    )
+    # Chunk records carry their part ("part i/n") and run side by side
+    brand_safety_ms = max(
+        check["wall_ms"]
+        for check in result["timings"]["checks"]
+        if check["check"].startswith("brand safety")
+    )
+    return {
+        "seconds": time.perf_counter() - start,
+        "brand_safety_seconds": brand_safety_ms / 1000,
+        "requests": len(analyzer.openai_client.calls),
+        "status": result["status"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="8000,32000,128000")
+    parser.add_argument("--max-chars", type=int, default=12000)
+    parser.add_argument("--overlap-chars", type=int, default=600)
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.1,
+        help="multiplier applied to the simulated upstream latency",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    # Prompt processing dominates for long transcripts
+    latency = LatencyModel(
+        round_trip=0.35 * args.time_scale,
+        per_prompt_token=0.0002 * args.time_scale,
+        per_completion_token=0.012 * args.time_scale,
+    )
+    policy = ChunkingPolicy(max_chars=args.max_chars, overlap_chars=args.overlap_chars)
+
+    rows = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        content = build_script(size)
+        whole = await run(content, None, latency)
+        chunked = await run(content, policy, latency)
+        rows.append(
+            {
+                "chars": len(content),
+                "whole_seconds": whole["seconds"],
+                "chunked_seconds": chunked["seconds"],
+                "whole_brand_safety_seconds": whole["brand_safety_seconds"],
+                "chunked_brand_safety_seconds": chunked["brand_safety_seconds"],
+                "whole_requests": whole["requests"],
+                "chunked_requests": chunked["requests"],
+                "same_verdict": whole["status"] == chunked["status"],
+            }
+        )
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(
+        f"{'chars':>8}{'brand safety s':>16}{'chunked':>9}{'total s':>9}"
+        f"{'chunked':>9}{'requests':>10}{'chunked':>9}{'same verdict':>14}"
+    )
+    for row in rows:
+        print(
+            f"{row['chars']:>8}{row['whole_brand_safety_seconds']:>16.3f}"
+            f"{row['chunked_brand_safety_seconds']:>9.3f}"
+            f"{row['whole_seconds']:>9.3f}{row['chunked_seconds']:>9.3f}"
+            f"{row['whole_requests']:>10}{row['chunked_requests']:>9}"
+            f"{'yes' if row['same_verdict'] else 'no':>14}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""Reproducible Lambda cold-start benchmark.
+
+Starts a fresh interpreter per run with `python -X importtime`, imports the
+handler module, then primes it with warm_up() and reports:
+
+- handler_import_ms: importing src/lambda/script_analyser_lambda.py
+- warm_up_ms: deferred imports plus building the shared analyzer and client
+- heaviest imports by cumulative time, from the importtime report
+
+    python src/benchmarks/bench_cold_start.py --runs 5 --json > cold_start.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+sys.path.append("./")
+
+PROBE = """
+import importlib, json, time
+start = time.perf_counter()
+handler = importlib.import_module("src.lambda.script_analyser_lambda")
+imported = time.perf_counter()
+handler.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({
+    "handler_import_ms": (imported - start) * 1000,
+    "warm_up_ms": (warmed - imported) * 1000,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Cumulative import time in ms of the top-level imports in an -X importtime report"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented below the module that triggered them
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def run_once() -> Dict:
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "benchmark"))
+    env.pop("EAGER_INIT", None)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["modules"] = parse_importtime(completed.stderr)
+    return timings
+
+
+def heaviest(runs: List[Dict], top: int) -> List[Dict]:
+    names = set().union(*(run["modules"] for run in runs))
+    medians = {
+        name: statistics.median(run["modules"].get(name, 0.0) for run in runs)
+        for name in names
+    }
+    ranked = sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": ms} for name, ms in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "handler_import_ms": statistics.median(r["handler_import_ms"] for r in runs),
+        "warm_up_ms": statistics.median(r["warm_up_ms"] for r in runs),
+        "heaviest_imports": heaviest(runs, args.top),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(
+        f"handler import: {report['handler_import_ms']:.1f} ms (median of {args.runs})"
+    )
+    print(f"warm up:        {report['warm_up_ms']:.1f} ms")
+    print("\nheaviest imports (cumulative ms):")
+    for row in report["heaviest_imports"]:
+        print(f"  {row['cumulative_ms']:>8.1f}  {row['module']}")
+
+
+if __name__ == "__main__":
+    main()
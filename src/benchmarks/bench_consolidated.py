@@ -0,0 +1,123 @@
+"""Side-by-side benchmark of the four-call and consolidated analysis paths.
+
+Runs against the in-process stub client, so no API key is needed:
+
+    python src/benchmarks/bench_consolidated.py --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+SAMPLE_PARAGRAPH = (
+    "Milanote is a tool for organizing creative projects. I use it every day to "
+    "plan videos on a big visual board, collect references and sketch ideas. "
+    "There are templates for almost anything and you can collaborate with your "
+    "team in real time. It's free with no time limit, so sign up with the link "
+    "in the description."
+)
+
+
+def build_script(paragraphs: int) -> str:
+    return "\n\n".join(SAMPLE_PARAGRAPH for _ in range(paragraphs))
+
+
+async def run_mode(name: str, consolidated: bool, args) -> dict:
+    latency = LatencyModel(
+        round_trip=0.35 * args.time_scale,
+        per_prompt_token=0.00002 * args.time_scale,
+        per_completion_token=0.012 * args.time_scale,
+    )
+    analyzer = ScriptAnalyzer(openai_api_key="benchmark", consolidated=consolidated)
+    analyzer.openai_client = StubAsyncOpenAI(latency=latency)
+    submission = ScriptSubmission(
+        content=build_script(args.paragraphs), creator_name="benchmark"
+    )
+
+    durations = []
+    verdicts = set()
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        results = await analyzer.analyze_script(submission)
+        durations.append(time.perf_counter() - start)
+        verdicts.add(
+            (
+                results["status"],
+                tuple(
+                    (category, tuple((r.criteria, r.passed) for r in items))
+                    for category, items in results["details"].items()
+                ),
+            )
+        )
+
+    calls = analyzer.openai_client.calls
+    return {
+        "mode": name,
+        "runs": args.runs,
+        "requests_per_script": len(calls) / args.runs,
+        "prompt_tokens_per_script": sum(c["prompt_tokens"] for c in calls) / args.runs,
+        "completion_tokens_per_script": sum(c["completion_tokens"] for c in calls)
+        / args.runs,
+        "mean_seconds": statistics.mean(durations),
+        "verdict": sorted(verdicts)[0][0],
+        "criteria": repr(sorted(verdicts)),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=8)
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.1,
+        help="multiplier applied to the simulated upstream latency",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    rows = [
+        await run_mode("four-call", False, args),
+        await run_mode("consolidated", True, args),
+    ]
+    same_results = rows[0].pop("criteria") == rows[1].pop("criteria")
+    for row in rows:
+        row["same_results"] = same_results
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(
+        f"{'mode':<14}{'requests':>10}{'prompt tok':>12}{'output tok':>12}"
+        f"{'mean s':>10}{'verdict':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['mode']:<14}{row['requests_per_script']:>10.1f}"
+            f"{row['prompt_tokens_per_script']:>12.0f}"
+            f"{row['completion_tokens_per_script']:>12.0f}"
+            f"{row['mean_seconds']:>10.3f}{row['verdict']:>10}"
+        )
+    base, combined = rows
+    print(
+        f"\nprompt tokens saved: "
+        f"{1 - combined['prompt_tokens_per_script'] / base['prompt_tokens_per_script']:.0%}"
+        f", requests saved: "
+        f"{1 - combined['requests_per_script'] / base['requests_per_script']:.0%}"
+        f", same results: {'yes' if same_results else 'no'}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
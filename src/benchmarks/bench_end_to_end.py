@@ -0,0 +1,363 @@
+"""End-to-end latency and throughput benchmark against the mock OpenAI server.
+
+Drives the real HTTP clients through the async analyzer, the sync analyzer, the
+Lambda handler and the ASGI server app at increasing concurrency, and reports p50/p95/p99 latency,
+scripts per second and the CPU time spent parsing model answers. No API key
+or network access is needed:
+
+    python src/benchmarks/bench_end_to_end.py --concurrency 1,8,64 --requests 128
+    python src/benchmarks/bench_end_to_end.py --output baseline.json
+    python src/benchmarks/bench_end_to_end.py --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.append("./")
+
+from src.benchmarks.mock_openai_server import MockOpenAIServer
+from src.evaluation_engine.analysis_cache import is_cacheable
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+SAMPLE_PARAGRAPH = (
+    "Milanote is a tool for organizing creative projects. I use it every day to "
+    "plan videos on a big visual board, collect references and sketch ideas. "
+    "It's free with no time limit, so sign up with the link in the description."
+)
+PROCESSORS = [
+    "_process_brand_safety_analysis",
+    "_process_core_requirements_analysis",
+    "_process_script_flow_analysis",
+    "_process_avoided_elements_analysis",
+]
+MODES = ["async", "sync", "lambda", "server"]
+
+
+def build_submissions(count: int, paragraphs: int) -> List[ScriptSubmission]:
+    # Distinct content per request so no layer can answer from a cache
+    return [
+        ScriptSubmission(
+            content="\n\n".join([f"Script {index}."] + [SAMPLE_PARAGRAPH] * paragraphs),
+            creator_name="benchmark",
+        )
+        for index in range(count)
+    ]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[position]
+
+
+class ParseTimer:
+    """Wrap an analyzer's _process_* methods to add up their CPU time"""
+
+    def __init__(self, analyzer):
+        self.seconds = 0.0
+        self.calls = 0
+        for name in PROCESSORS:
+            setattr(analyzer, name, self._timed(getattr(analyzer, name)))
+
+    def _timed(self, method):
+        def timed(*args, **kwargs):
+            # thread_time so concurrent threads do not count each other's work
+            start = time.thread_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds += time.thread_time() - start
+                self.calls += 1
+
+        return timed
+
+
+def _no_retries(analyzer):
+    # Report mock failures as they happen rather than hiding them behind retries
+    analyzer.openai_client = analyzer.openai_client.with_options(max_retries=0)
+    return analyzer
+
+
+async def run_async(base_url: str, submissions, concurrency: int):
+    from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+
+    analyzer = _no_retries(
+        ScriptAnalyzer(openai_api_key="benchmark", base_url=base_url)
+    )
+    timer = ParseTimer(analyzer)
+    latencies, failures = [], 0
+    async for item in analyzer.analyze_many(submissions, max_concurrency=concurrency):
+        latencies.append(item.elapsed_seconds)
+        failures += item.failed or not is_cacheable(item.analysis)
+    await analyzer.openai_client.close()
+    return latencies, failures, timer
+
+
+def _run_threads(call, submissions, concurrency: int):
+    """Run call over submissions from a thread pool; a falsy result is a failure"""
+
+    def timed(submission):
+        start = time.perf_counter()
+        try:
+            failed = not call(submission)
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, submissions))
+    return [elapsed for elapsed, _ in outcomes], sum(f for _, f in outcomes)
+
+
+def run_sync(base_url: str, submissions, concurrency: int):
+    from src.evaluation_engine.script_analysis import ScriptAnalyzer
+
+    analyzer = _no_retries(
+        ScriptAnalyzer(openai_api_key="benchmark", base_url=base_url)
+    )
+    timer = ParseTimer(analyzer)
+
+    def invoke(submission):
+        # Failed checks come back as "error" results rather than exceptions
+        return is_cacheable(analyzer.analyze_script(submission))
+
+    latencies, failures = _run_threads(invoke, submissions, concurrency)
+    return latencies, failures, timer
+
+
+def run_lambda(base_url: str, submissions, concurrency: int):
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    handler = importlib.import_module("src.lambda.script_analyser_lambda")
+    # Fresh analyzer per run, shared by all threads like a warm container's
+    handler._ANALYZER = None
+    analyzer = _no_retries(handler.get_analyzer())
+    timer = ParseTimer(analyzer)
+
+    def invoke(submission):
+        event = {
+            "body": json.dumps(
+                {
+                    "content": submission.content,
+                    "creator_name": submission.creator_name,
+                    "bypass_cache": True,
+                }
+            )
+        }
+        response = handler.lambda_handler(event, None)
+        if response["statusCode"] >= 500:
+            raise RuntimeError(response["body"])
+        details = json.loads(response["body"])["details"]
+        return not any(
+            result["criteria"] == "error"
+            for results in details.values()
+            for result in results
+        )
+
+    latencies, failures = _run_threads(invoke, submissions, concurrency)
+    return latencies, failures, timer
+
+
+async def run_server(base_url: str, submissions, concurrency: int):
+    from src.server.asgi import AnalysisServer, build_analyzer
+
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    # Called in-process with ASGI messages, one shared analyzer and pool
+    app = AnalysisServer(lambda: _no_retries(build_analyzer()))
+    await app.startup()
+    timer = ParseTimer(app.analyzer)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def invoke(submission):
+        body = json.dumps(
+            {
+                "content": submission.content,
+                "creator_name": submission.creator_name,
+                "bypass_cache": True,
+            }
+        ).encode()
+        messages = []
+        received = asyncio.Event()
+
+        async def receive():
+            if received.is_set():
+                # The client never disconnects
+                await asyncio.Event().wait()
+            received.set()
+            return {"type": "http.request", "body": body}
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            start = time.perf_counter()
+            await app(
+                {"type": "http", "method": "POST", "path": "/", "query_string": b""},
+                receive,
+                send,
+            )
+            elapsed = time.perf_counter() - start
+        details = json.loads(messages[-1]["body"]).get("details") or {}
+        failed = messages[0]["status"] >= 500 or any(
+            result["criteria"] == "error"
+            for results in details.values()
+            for result in results
+        )
+        return elapsed, failed
+
+    outcomes = await asyncio.gather(*(invoke(item) for item in submissions))
+    await app.shutdown()
+    return [elapsed for elapsed, _ in outcomes], sum(f for _, f in outcomes), timer
+
+
+def run_case(mode: str, base_url: str, submissions, concurrency: int) -> Dict:
+    start = time.perf_counter()
+    if mode == "async":
+        latencies, failures, timer = asyncio.run(
+            run_async(base_url, submissions, concurrency)
+        )
+    elif mode == "sync":
+        latencies, failures, timer = run_sync(base_url, submissions, concurrency)
+    elif mode == "server":
+        latencies, failures, timer = asyncio.run(
+            run_server(base_url, submissions, concurrency)
+        )
+    else:
+        latencies, failures, timer = run_lambda(base_url, submissions, concurrency)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(submissions),
+        "failures": failures,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "scripts_per_second": len(submissions) / elapsed,
+        "parse_cpu_ms_per_script": timer.seconds * 1000 / len(submissions),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(rows: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Cases whose p95 or throughput got worse than the baseline by > tolerance"""
+    with open(baseline_path, encoding="utf-8") as source:
+        baseline = {
+            (row["mode"], row["concurrency"]): row
+            for row in json.load(source)["results"]
+        }
+    regressions = []
+    for row in rows:
+        before = baseline.get((row["mode"], row["concurrency"]))
+        if before is None:
+            continue
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{row['mode']} x{row['concurrency']}: p95 "
+                f"{before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms"
+            )
+        if row["scripts_per_second"] < before["scripts_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{row['mode']} x{row['concurrency']}: throughput "
+                f"{before['scripts_per_second']:.1f} -> "
+                f"{row['scripts_per_second']:.1f} scripts/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32,64,128,256")
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=0,
+        help="scripts per case (default: 4x the concurrency, at least 16)",
+    )
+    parser.add_argument("--paragraphs", type=int, default=8)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.05,0.3",
+        help="mock upstream latency, see mock_openai_server.parse_latency",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to check against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    server = MockOpenAIServer(args.latency, args.error_rate, seed=args.seed)
+
+    rows = []
+    with server:
+        for mode in modes:
+            for concurrency in levels:
+                count = args.requests or max(16, 4 * concurrency)
+                submissions = build_submissions(count, args.paragraphs)
+                rows.append(run_case(mode, server.base_url, submissions, concurrency))
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "paragraphs": args.paragraphs,
+        "results": rows,
+    }
+    regressions = compare(rows, args.compare, args.tolerance) if args.compare else []
+    report["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(report, target, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"{'mode':<8}{'conc':>6}{'reqs':>6}{'fail':>6}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}{'scripts/s':>11}{'parse ms':>10}"
+        )
+        for row in rows:
+            print(
+                f"{row['mode']:<8}{row['concurrency']:>6}{row['requests']:>6}"
+                f"{row['failures']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                f"{row['p99_ms']:>10.1f}{row['scripts_per_second']:>11.1f}"
+                f"{row['parse_cpu_ms_per_script']:>10.3f}"
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
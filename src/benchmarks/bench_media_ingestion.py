@@ -0,0 +1,231 @@
+"""Latency of transcribing a recording before analyzing it, versus pipelining
+transcription into the chunked checks.
+
+Generates a WAV file of --minutes of tone and transcribes it with a stub whose
+latency grows with the length of audio sent, one segment saying something
+the brand safety check flags. Sequential transcribes every segment (with the
+same parallelism) and then analyzes the transcript; pipelined streams the
+transcript into ScriptAnalyzer.analyze_transcript_stream, so the chunked
+checks run (and report what they find) while later segments are still being
+transcribed. Both use the in-process OpenAI stub, no API key or ffmpeg needed:
+
+    python src/benchmarks/bench_media_ingestion.py --minutes 10 --max-parallel 4
+"""
+
+import argparse
+import array
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import wave
+from typing import Dict
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import (
+    CANNED_SECTIONS,
+    LatencyModel,
+    StubAsyncOpenAI,
+    canned_response,
+    classify_prompt,
+)
+from src.evaluation_engine.media_ingestion import (
+    AudioSegment,
+    MediaPolicy,
+    Transcriber,
+    analyze_media_stream,
+    split_wav,
+    transcribe_segments,
+)
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+SAMPLE_PARAGRAPH = (
+    "Milanote is a tool for organizing creative projects. I use it every day to "
+    "plan videos on a big visual board, collect references and sketch ideas. "
+    "There are templates for almost anything and you can collaborate with your "
+    "team in real time. It's free with no time limit, so sign up with the link "
+    "in the description."
+)
+FLAGGED_SENTENCE = "And between us, the moon landing was staged."
+
+
+def write_wav(path: str, seconds: float, sample_rate: int = 16000):
+    """Mono 16-bit WAV of a quiet 440 Hz tone"""
+    samples = array.array(
+        "h",
+        (
+            int(3000 * math.sin(2 * math.pi * 440 * index / sample_rate))
+            for index in range(int(seconds * sample_rate))
+        ),
+    )
+    with wave.open(path, "wb") as target:
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(sample_rate)
+        target.writeframes(samples.tobytes())
+
+
+class StubTranscriber(Transcriber):
+    """Says the sample paragraph for every segment, and the flagged sentence
+    in one, after a round trip plus a share of the segment's duration"""
+
+    def __init__(self, flagged_segment: int, round_trip: float, real_time: float):
+        self.flagged_segment = flagged_segment
+        self.round_trip = round_trip
+        self.real_time = real_time
+        self.calls = 0
+
+    async def transcribe(self, segment: AudioSegment) -> str:
+        self.calls += 1
+        duration = segment.end_seconds - segment.start_seconds
+        await asyncio.sleep(self.round_trip + duration * self.real_time)
+        if segment.index == self.flagged_segment:
+            return f"{SAMPLE_PARAGRAPH} {FLAGGED_SENTENCE}"
+        return SAMPLE_PARAGRAPH
+
+
+def flagging_responder(prompt: str) -> str:
+    """The canned answers, with misinformation found in the flagged sentence"""
+    if FLAGGED_SENTENCE not in prompt or classify_prompt(prompt) != "brand safety":
+        return canned_response(prompt)
+    return CANNED_SECTIONS["brand safety"].replace(
+        "Misinformation: None found, product claims are accurate.\nSeverity: Low",
+        f'Misinformation: A conspiracy theory is presented as fact: "{FLAGGED_SENTENCE}"'
+        "\nSeverity: High",
+    )
+
+
+def build_analyzer(scale: float) -> ScriptAnalyzer:
+    analyzer = ScriptAnalyzer(openai_api_key="benchmark")
+    # Prompt processing dominates once the whole transcript is sent
+    analyzer.openai_client = StubAsyncOpenAI(
+        LatencyModel(0.35 * scale, 0.0002 * scale, 0.012 * scale),
+        flagging_responder,
+    )
+    return analyzer
+
+
+def flagged(analysis: Dict):
+    return [
+        {"criteria": result.criteria, "timestamps": result.timestamps}
+        for result in analysis["details"]["brand safety"]
+        if not result.passed
+    ]
+
+
+async def run_sequential(path: str, policy: MediaPolicy, args) -> Dict:
+    analyzer = build_analyzer(args.time_scale)
+    transcriber = StubTranscriber(
+        args.flagged_segment, 0.5 * args.time_scale, 0.05 * args.time_scale
+    )
+    started = time.perf_counter()
+    texts = [
+        segment.text
+        async for segment in transcribe_segments(
+            split_wav(path, policy.segment_seconds), transcriber, policy.max_parallel
+        )
+    ]
+    transcribed = time.perf_counter() - started
+    submission = ScriptSubmission(content=" ".join(texts), creator_name="benchmark")
+    async for event in analyzer.analyze_script_stream(submission):
+        if event.get("category") == "brand safety":
+            brand_safety = time.perf_counter() - started
+        analysis = event
+    return {
+        "mode": "sequential",
+        "seconds": time.perf_counter() - started,
+        "transcription_seconds": transcribed,
+        "brand_safety_seconds": brand_safety,
+        # Nothing is found before the checks of the whole transcript return
+        "first_finding_seconds": brand_safety if flagged(analysis) else None,
+        "openai_calls": len(analyzer.openai_client.calls),
+        "status": analysis["status"],
+        "flagged": flagged(analysis),
+    }
+
+
+async def run_pipelined(path: str, policy: MediaPolicy, args) -> Dict:
+    analyzer = build_analyzer(args.time_scale)
+    transcriber = StubTranscriber(
+        args.flagged_segment, 0.5 * args.time_scale, 0.05 * args.time_scale
+    )
+    started = time.perf_counter()
+    first_finding = None
+    async for event in analyze_media_stream(analyzer, path, transcriber, policy):
+        if "finding" in event and first_finding is None:
+            first_finding = time.perf_counter() - started
+        elif "chunk" in event:
+            # The last chunk arrives once every segment is transcribed
+            transcribed = time.perf_counter() - started
+        elif event.get("category") == "brand safety":
+            brand_safety = time.perf_counter() - started
+        analysis = event
+    return {
+        "mode": "pipelined",
+        "seconds": time.perf_counter() - started,
+        "transcription_seconds": transcribed,
+        "brand_safety_seconds": brand_safety,
+        "first_finding_seconds": first_finding,
+        "openai_calls": len(analyzer.openai_client.calls),
+        "status": analysis["status"],
+        "flagged": flagged(analysis),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--segment-seconds", type=float, default=30.0)
+    parser.add_argument("--chunk-seconds", type=float, default=60.0)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument(
+        "--flagged-segment", type=int, default=7, help="segment the stub flags"
+    )
+    parser.add_argument(
+        "--time-scale", type=float, default=0.1, help="scale simulated latencies"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    policy = MediaPolicy(
+        segment_seconds=args.segment_seconds,
+        chunk_seconds=args.chunk_seconds,
+        max_parallel=args.max_parallel,
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recording.wav")
+        write_wav(path, args.minutes * 60, policy.sample_rate)
+        rows = [
+            await run_sequential(path, policy, args),
+            await run_pipelined(path, policy, args),
+        ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{'mode':<11} {'seconds':>8} {'transcribed s':>14} "
+        f"{'brand safety s':>15} {'first finding s':>16} {'openai calls':>13} "
+        f"{'status':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['mode']:<11} {row['seconds']:>8.3f} "
+            f"{row['transcription_seconds']:>14.3f} "
+            f"{row['brand_safety_seconds']:>15.3f} "
+            f"{row['first_finding_seconds'] or float('nan'):>16.3f} "
+            f"{row['openai_calls']:>13} "
+            f"{row['status']:>9}"
+        )
+    for row in rows:
+        for finding in row["flagged"]:
+            print(f"{row['mode']}: {finding['criteria']} at {finding['timestamps']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""Lookup latency of the near-duplicate index with many scripts stored.
+
+Fills a NearDuplicateIndex with synthetic scripts, then looks up lightly
+edited copies of stored scripts (which should match their source) and fresh
+scripts (which should match nothing). Fingerprinting and the LSH lookup are
+timed separately, since only the lookup grows with the index.
+
+    python src/benchmarks/bench_near_duplicates.py --scripts 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import List
+
+sys.path.append("./")
+
+from src.benchmarks.bench_end_to_end import percentile
+from src.evaluation_engine.near_duplicates import NearDuplicateIndex
+
+NAMESPACE = "benchmark"
+
+
+def build_vocabulary(rng: random.Random, size: int) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+        for _ in range(size)
+    ]
+
+
+def build_script(rng: random.Random, vocabulary: List[str], words: int) -> str:
+    paragraphs = []
+    for _ in range(max(1, words // 50)):
+        paragraphs.append(" ".join(rng.choice(vocabulary) for _ in range(50)))
+    return "\n\n".join(paragraphs)
+
+
+def edit_script(rng: random.Random, vocabulary: List[str], script: str, edits: int):
+    """The script with a few words replaced, as in a fixed typo or reworded line"""
+    words = script.split(" ")
+    for _ in range(edits):
+        position = rng.randrange(len(words))
+        # Keep paragraph breaks where they are
+        words[position] = words[position].replace(
+            words[position].strip(), rng.choice(vocabulary)
+        )
+    return " ".join(words)
+
+
+def summarize(fingerprint_seconds: List[float], lookup_seconds: List[float]):
+    return {
+        "fingerprint_p50_ms": percentile(fingerprint_seconds, 0.50) * 1000,
+        "lookup_p50_ms": percentile(lookup_seconds, 0.50) * 1000,
+        "lookup_p99_ms": percentile(lookup_seconds, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=250)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=3, help="words changed")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    vocabulary = build_vocabulary(rng, args.vocabulary)
+    index = NearDuplicateIndex(threshold=args.threshold)
+
+    scripts = []
+    start = time.perf_counter()
+    for number in range(args.scripts):
+        script = build_script(rng, vocabulary, args.words)
+        index.add(index.fingerprint(script), NAMESPACE, f"script-{number}")
+        if number < args.lookups:
+            scripts.append(script)
+    build_seconds = time.perf_counter() - start
+
+    def measure(queries, expected):
+        fingerprint_seconds, lookup_seconds = [], []
+        found, wrong, candidates = 0, 0, 0
+        for query, source in zip(queries, expected):
+            start = time.perf_counter()
+            fingerprint = index.fingerprint(query)
+            middle = time.perf_counter()
+            matches = index.candidates(fingerprint, NAMESPACE)
+            end = time.perf_counter()
+            fingerprint_seconds.append(middle - start)
+            lookup_seconds.append(end - middle)
+            candidates += len(matches)
+            if matches and index._keys[matches[0][1]] == source:
+                found += 1
+            elif matches:
+                wrong += 1
+        row = summarize(fingerprint_seconds, lookup_seconds)
+        row.update(
+            {
+                "matched_share": found / len(queries),
+                "false_matches": wrong,
+                "candidates_per_lookup": candidates / len(queries),
+            }
+        )
+        return row
+
+    edited = measure(
+        [edit_script(rng, vocabulary, script, args.edits) for script in scripts],
+        [f"script-{number}" for number in range(len(scripts))],
+    )
+    fresh = measure(
+        [build_script(rng, vocabulary, args.words) for _ in range(len(scripts))],
+        [None] * len(scripts),
+    )
+
+    result = {
+        "scripts": args.scripts,
+        "words": args.words,
+        "threshold": args.threshold,
+        "build_seconds": build_seconds,
+        "edited": edited,
+        "fresh": fresh,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(
+        f"indexed {args.scripts} scripts of {args.words} words "
+        f"in {build_seconds:.1f}s (threshold {args.threshold})"
+    )
+    print(
+        f"{'queries':<8} {'fingerprint p50 ms':>19} {'lookup p50 ms':>14} "
+        f"{'lookup p99 ms':>14} {'matched':>8} {'false':>6} {'candidates':>11}"
+    )
+    for name, row in (("edited", edited), ("fresh", fresh)):
+        print(
+            f"{name:<8} {row['fingerprint_p50_ms']:>19.3f} "
+            f"{row['lookup_p50_ms']:>14.3f} {row['lookup_p99_ms']:>14.3f} "
+            f"{row['matched_share']:>8.1%} {row['false_matches']:>6} "
+            f"{row['candidates_per_lookup']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
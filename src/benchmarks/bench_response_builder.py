@@ -0,0 +1,139 @@
+"""Correctness and throughput of response building under concurrent requests.
+
+Every thread turns analyses into serialized response bodies, the way the Lambda
+handler does for warm concurrent invocations, and checks that each body holds
+its own analysis. Compares:
+
+- legacy: the handler's former shallow copy of the shared envelope, whose
+  details every request overwrote in place
+- handler: ScriptAnalysisResponseHandler, then json.dumps of the body
+- builder: response_builder.analysis_body (precomputed envelope prefix, orjson
+  when installed)
+
+    python src/benchmarks/bench_response_builder.py --threads 8 --responses 20000
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.response_engine import response_builder
+from src.response_engine.response_builder import analysis_body
+from src.response_engine.script_analysis_response import ScriptAnalysisResponse
+from src.response_engine.script_analysis_response_handler import (
+    ScriptAnalysisResponseHandler,
+    details_formatting,
+)
+
+CATEGORIES = ["brand safety", "core requirements", "script flow", "avoided elements"]
+
+
+def legacy_success(details):
+    response = ScriptAnalysisResponse.APPROVED.copy()
+    response["body"]["details"] = details_formatting(details)
+    return response
+
+
+def legacy_body(analysis: Dict) -> bytes:
+    return json.dumps(legacy_success(analysis["details"])["body"]).encode("utf-8")
+
+
+def handler_body(analysis: Dict) -> bytes:
+    response = ScriptAnalysisResponseHandler.success(analysis["details"])
+    return json.dumps(response["body"]).encode("utf-8")
+
+
+MODES = {"legacy": legacy_body, "handler": handler_body, "builder": analysis_body}
+
+
+def build_analyses(count: int) -> List[Dict]:
+    return [
+        {
+            "status": "APPROVED",
+            "details": {
+                category: [
+                    AnalysisResult(
+                        criteria=f"{category} {criterion}",
+                        passed=True,
+                        feedback=f"Script {index}: {category} criterion {criterion}.",
+                        suggestions=[f"Suggestion for script {index}"],
+                    )
+                    for criterion in range(4)
+                ]
+                for category in CATEGORIES
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def run_mode(mode: str, analyses: List[Dict], threads: int) -> Dict:
+    build = MODES[mode]
+    corrupted = 0
+    lock = threading.Lock()
+
+    def work(batch: List[int]):
+        nonlocal corrupted
+        wrong = 0
+        for index in batch:
+            body = json.loads(build(analyses[index]))
+            wrong += (
+                body["details"]["brand safety"][0]["feedback"]
+                != f"Script {index}: brand safety criterion 0."
+            )
+        with lock:
+            corrupted += wrong
+
+    batches = [list(range(start, len(analyses), threads)) for start in range(threads)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(work, batches))
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "responses": len(analyses),
+        "corrupted": corrupted,
+        "responses_per_second": len(analyses) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--responses", type=int, default=20000)
+    parser.add_argument(
+        "--switch-interval",
+        type=float,
+        default=1e-5,
+        help="thread switch interval in seconds, smaller surfaces races sooner",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(args.switch_interval)
+    analyses = build_analyses(args.responses)
+    rows = [run_mode(mode, analyses, args.threads) for mode in MODES]
+    # The legacy handler leaves the last request's details in the template
+    ScriptAnalysisResponse.APPROVED["body"]["details"] = None
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"serializer: {'orjson' if response_builder.orjson else 'json'}")
+    print(f"{'mode':<8} {'responses':>10} {'corrupted':>10} {'responses/s':>12}")
+    for row in rows:
+        print(
+            f"{row['mode']:<8} {row['responses']:>10} {row['corrupted']:>10} "
+            f"{row['responses_per_second']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Size, append rate and rollup latency of the columnar results store.
+
+Appends analyses through ResultsStore to measure the append rate and the bytes
+a row takes on disk, then builds a table of --rows synthetic rows (16 criteria,
+--creators creators, 4 brands, a year of timestamps) and times each rollup on
+one core. Needs NumPy for the large table.
+
+    python src/benchmarks/bench_results_store.py --rows 10000000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict
+
+sys.path.append("./")
+
+import numpy as np
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.results_store import (
+    DIMENSIONS,
+    ResultsStore,
+    ResultsTable,
+    load_results,
+)
+
+CATEGORIES = ["brand safety", "core requirements", "script flow", "avoided elements"]
+YEAR = 365 * 86400
+START = 1_735_689_600
+
+
+def build_analysis(index: int) -> Dict:
+    return {
+        "details": {
+            category: [
+                AnalysisResult(
+                    criteria=f"{category} {criterion}",
+                    passed=(index + criterion) % 7 != 0,
+                    feedback=f"Feedback on script {index}.",
+                    severity="Low" if category == "brand safety" else None,
+                )
+                for criterion in range(4)
+            ]
+            for category in CATEGORIES
+        }
+    }
+
+
+def measure_appends(scripts: int) -> Dict:
+    directory = tempfile.mkdtemp()
+    try:
+        store = ResultsStore(directory, flush_rows=10000)
+        analyses = [build_analysis(index) for index in range(scripts)]
+        started = time.perf_counter()
+        for index, analysis in enumerate(analyses):
+            store.append(analysis, f"creator {index % 500}", "milanote", START + index)
+        store.flush()
+        elapsed = time.perf_counter() - started
+        sizes = {
+            name: os.path.getsize(os.path.join(store.part, name))
+            for name in os.listdir(store.part)
+        }
+        column_bytes = sum(
+            size for name, size in sizes.items() if not name.startswith("feedback")
+        )
+        started = time.perf_counter()
+        loaded = load_results(directory)
+        load_seconds = time.perf_counter() - started
+        return {
+            "rows": store.rows,
+            "rows_per_second": store.rows / elapsed,
+            "column_bytes_per_row": column_bytes / store.rows,
+            "feedback_bytes_per_row": (sizes["feedback.jsonl"] + sizes["feedback.idx"])
+            / store.rows,
+            "load_seconds": load_seconds,
+            "loaded_rows": len(loaded),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+
+def synthetic_table(rows: int, creators: int) -> ResultsTable:
+    rng = np.random.default_rng(7)
+    criterion = rng.integers(0, 16, rows, dtype=np.uint16)
+    columns = {
+        "category": (criterion // 4).astype(np.uint8),
+        "criterion": criterion,
+        "creator": rng.integers(0, creators, rows, dtype=np.uint32),
+        "brand": rng.integers(0, 4, rows, dtype=np.uint16),
+        "severity": rng.integers(0, 3, rows, dtype=np.uint8),
+        "timestamp": np.sort(rng.integers(START, START + YEAR, rows, dtype=np.uint32)),
+    }
+    # Criteria fail at different rates
+    passed = rng.random(rows) > (criterion + 1) / 40
+    dictionaries = {
+        "category": CATEGORIES,
+        "criterion": [f"criterion {index}" for index in range(16)],
+        "creator": [f"creator {index}" for index in range(creators)],
+        "brand": ["milanote", "notion", "figma", "canva"],
+        "severity": ["", "Low", "High"],
+    }
+    assert set(dictionaries) == set(DIMENSIONS)
+    return ResultsTable(columns, passed, dictionaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--creators", type=int, default=50_000)
+    parser.add_argument("--append-scripts", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    appends = measure_appends(args.append_scripts)
+    table = synthetic_table(args.rows, args.creators)
+    quarter = (START + 90 * 86400, START + 181 * 86400)
+    queries = {
+        "by criterion": dict(by=("criterion",)),
+        "by creator": dict(by=("creator",)),
+        "by brand": dict(by=("brand",)),
+        "by week": dict(by=("time",), bucket_seconds=7 * 86400),
+        "worst 100 creator x criterion": dict(by=("creator", "criterion"), limit=100),
+        "brand x criterion x day": dict(by=("brand", "criterion", "time")),
+        "criterion of a creator, a quarter": dict(
+            by=("criterion",),
+            creator="creator 42",
+            since=quarter[0],
+            until=quarter[1],
+        ),
+    }
+    timings = {}
+    for name, query in queries.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            groups = table.pass_rates(**query)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = {"seconds": best, "groups": len(groups)}
+
+    if args.json:
+        print(json.dumps({"appends": appends, "rollups": timings}, indent=2))
+        return
+    print(
+        f"append: {appends['rows_per_second']:.0f} rows/s, "
+        f"{appends['column_bytes_per_row']:.2f} column bytes/row "
+        f"(+{appends['feedback_bytes_per_row']:.1f} feedback), "
+        f"load of {appends['loaded_rows']} rows in {appends['load_seconds']:.3f} s"
+    )
+    print(f"rollups over {args.rows} rows:")
+    print(f"{'query':<36} {'groups':>9} {'seconds':>9}")
+    for name, timing in timings.items():
+        print(f"{name:<36} {timing['groups']:>9} {timing['seconds']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
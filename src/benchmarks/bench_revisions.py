@@ -0,0 +1,150 @@
+"""Requests made for a creator's revisions with and without a RevisionStore.
+
+Analyzes a first revision of a script and then three edits of it, each from
+the first revision: a typo in a paragraph no check keys on, a reworded call to
+action, and the paragraph introducing the brand replaced by one that does not
+mention it. Without revisions every edit runs every check again; with them
+only the changed segments and the checks the edit could affect are re-run.
+The replaced paragraph has none of the checks' terms itself, so it is what the
+removed paragraph mentioned that has to re-run core requirements and script
+flow. Uses the in-process OpenAI stub, no API key needed:
+
+    python src/benchmarks/bench_revisions.py --time-scale 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.revisions import RevisionStore
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+INTRODUCTION = (
+    "This video is sponsored by Milanote, a tool for organizing creative "
+    "projects in one place."
+)
+CALL_TO_ACTION = (
+    "Milanote is free with no time limit, so sign up with the link in the "
+    "description."
+)
+FILLER = [
+    "Today we are cooking a mushroom risotto from scratch, start to finish.",
+    "The rice matters more than you would think, so buy arborio or carnaroli.",
+    "Warm the stock in a separate pot and keep it just below a simmer.",
+    "Soften the shallots in butter slowly, they should never brown.",
+    "Toast the rice for a minute or two until the edges turn clear.",
+    "Add a splash of white wine and let it cook off completely.",
+    "Now the stock goes in one ladle at a time, stirring all the while.",
+    "Fry the mushrooms hot and in batches so they brown instead of stewing.",
+    "Finish with parmesan and a knob of cold butter off the heat.",
+    "Let it rest for two minutes and serve it on warm plates.",
+]
+USAGE = (
+    "I plan every video on a Milanote board: recipes, shot lists and reference "
+    "photos, with templates for each kind of episode, shared with my team."
+)
+
+
+def first_revision() -> List[str]:
+    return [INTRODUCTION, *FILLER[:5], USAGE, *FILLER[5:], CALL_TO_ACTION]
+
+
+EDITS = {
+    "typo": lambda paragraphs: [
+        paragraph.replace("matters more", "maters more") for paragraph in paragraphs
+    ],
+    "call to action": lambda paragraphs: paragraphs[:-1]
+    + [
+        "Try Milanote for free, there is no time limit. Sign up with the link " "below."
+    ],
+    "replaced paragraph": lambda paragraphs: [
+        "Quick note before we start: the full recipe is pinned in the comments."
+    ]
+    + paragraphs[1:],
+}
+
+
+async def analyze(
+    analyzer: ScriptAnalyzer, paragraphs: List[str], creator: str
+) -> Dict:
+    calls = len(analyzer.openai_client.calls)
+    start = time.perf_counter()
+    analysis = await analyzer.analyze_script(
+        ScriptSubmission(content="\n\n".join(paragraphs), creator_name=creator)
+    )
+    return {
+        "seconds": time.perf_counter() - start,
+        "requests": len(analyzer.openai_client.calls) - calls,
+        "reused_checks": (analysis.get("revision") or {}).get("reused_checks", []),
+        "status": analysis["status"],
+    }
+
+
+def build_analyzer(latency: LatencyModel, revisions: Optional[RevisionStore]):
+    analyzer = ScriptAnalyzer(openai_api_key="benchmark", revisions=revisions)
+    analyzer.openai_client = StubAsyncOpenAI(latency=latency)
+    return analyzer
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--time-scale", type=float, default=0.05, help="scale simulated latencies"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    latency = LatencyModel(
+        round_trip=0.35 * args.time_scale,
+        per_prompt_token=0.00002 * args.time_scale,
+        per_completion_token=0.012 * args.time_scale,
+    )
+    rows = []
+    for name, edit in [("first revision", None), *EDITS.items()]:
+        paragraphs = first_revision() if edit is None else edit(first_revision())
+        without = build_analyzer(latency, None)
+        with_revisions = build_analyzer(latency, RevisionStore())
+        # Every edit is made to the same first revision, by its own creator
+        creator = f"creator {len(rows)}"
+        if edit is not None:
+            await analyze(with_revisions, first_revision(), creator)
+        plain = await analyze(without, paragraphs, creator)
+        revised = await analyze(with_revisions, paragraphs, creator)
+        rows.append(
+            {
+                "revision": name,
+                "requests": plain["requests"],
+                "revision_requests": revised["requests"],
+                "seconds": plain["seconds"],
+                "revision_seconds": revised["seconds"],
+                "reused_checks": revised["reused_checks"],
+                "same_verdict": plain["status"] == revised["status"],
+            }
+        )
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{'revision':<20}{'requests':>9}{'revisions':>10}{'seconds':>9}"
+        f"{'revisions':>10}{'same verdict':>14}  reused checks"
+    )
+    for row in rows:
+        print(
+            f"{row['revision']:<20}{row['requests']:>9}"
+            f"{row['revision_requests']:>10}{row['seconds']:>9.3f}"
+            f"{row['revision_seconds']:>10.3f}"
+            f"{'yes' if row['same_verdict'] else 'no':>14}  "
+            f"{', '.join(row['reused_checks']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
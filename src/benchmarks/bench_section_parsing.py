@@ -0,0 +1,130 @@
+"""Micro-benchmark: repeated extract_section scanning vs a single SectionIndex.
+
+Builds synthetic model responses of 10-200 KB and times the lookups the
+_process_*_analysis methods make (11 section lookups plus feedback, severity
+and suggestions for each):
+
+    python src/benchmarks/bench_section_parsing.py
+"""
+
+import argparse
+import json
+import sys
+import timeit
+
+sys.path.append("./")
+
+from src.evaluation_engine.helpers import (
+    SectionIndex,
+    extract_feedback,
+    extract_section,
+    extract_severity,
+    extract_suggestions,
+)
+
+# Section names looked up by the brand safety, core requirements, script flow
+# and avoided elements processors
+LOOKUPS = [
+    "adult content",
+    "political",
+    "harassment",
+    "misinformation",
+    "introduction",
+    "product description",
+    "personal usage",
+    "feature descriptions",
+    "audience benefits",
+    "Call to Action",
+    "content problems",
+    "tone",
+]
+
+FILLER = (
+    "The narration stays close to the creator's usual voice and the pacing of the "
+    "segment feels natural for the channel audience.\n"
+)
+
+
+def build_response(size_bytes: int) -> str:
+    """Response with every expected header, padded with discussion paragraphs"""
+    padding_per_section = max(0, size_bytes // len(LOOKUPS) - 200)
+    filler = FILLER * (padding_per_section // len(FILLER) + 1)
+    parts = []
+    for position, name in enumerate(LOOKUPS, start=1):
+        parts.append(
+            f"{position}. {name.title()}: Looks fine overall.\n"
+            f"Severity: Low\nSuggestions:\n- tighten the wording\n- keep it short"
+        )
+        parts.append(filler[:padding_per_section])
+    return "\n\n".join(parts)
+
+
+def parse_with_helpers(text: str):
+    for name in LOOKUPS:
+        section = extract_section(text, name)
+        if section:
+            extract_feedback(section)
+            extract_severity(section)
+            extract_suggestions(section)
+
+
+def parse_with_index(text: str):
+    index = SectionIndex(text)
+    for name in LOOKUPS:
+        section = index.details(name)
+        if section.text:
+            section.feedback()
+            section.severity()
+            section.suggestions()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", default="10,25,50,100,200")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    rows = []
+    for size_kb in (int(size) for size in args.sizes_kb.split(",")):
+        text = build_response(size_kb * 1024)
+        number = max(1, 2000 // size_kb)
+        helpers_s = (
+            min(
+                timeit.repeat(
+                    lambda: parse_with_helpers(text), number=number, repeat=args.repeat
+                )
+            )
+            / number
+        )
+        index_s = (
+            min(
+                timeit.repeat(
+                    lambda: parse_with_index(text), number=number, repeat=args.repeat
+                )
+            )
+            / number
+        )
+        rows.append(
+            {
+                "size_kb": size_kb,
+                "helpers_us": helpers_s * 1e6,
+                "index_us": index_s * 1e6,
+                "speedup": helpers_s / index_s,
+            }
+        )
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'size KB':>8}{'helpers us':>14}{'index us':>12}{'speedup':>10}")
+    for row in rows:
+        print(
+            f"{row['size_kb']:>8}{row['helpers_us']:>14.1f}"
+            f"{row['index_us']:>12.1f}{row['speedup']:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
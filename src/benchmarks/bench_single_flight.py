@@ -0,0 +1,138 @@
+"""OpenAI calls and latency of bursts of identical submissions, with and
+without single-flight coalescing.
+
+Every script is submitted --duplicates times at once (several users, or a
+double-clicking UI), against the in-process stub with an analysis cache in
+front, then the cancellation cases are checked: some waiters of a shared
+analysis giving up, and all of them.
+
+    python src/benchmarks/bench_single_flight.py --scripts 50 --duplicates 3
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict
+
+sys.path.append("./")
+
+from src.benchmarks.bench_end_to_end import build_submissions, percentile
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.analysis_cache import AnalysisCache
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.single_flight import SingleFlight
+
+
+def build_analyzer(single_flight: bool, scale: float) -> ScriptAnalyzer:
+    analyzer = ScriptAnalyzer(
+        openai_api_key="benchmark",
+        cache=AnalysisCache(),
+        single_flight=SingleFlight() if single_flight else None,
+    )
+    analyzer.openai_client = StubAsyncOpenAI(
+        LatencyModel(0.35 * scale, 0.00002 * scale, 0.012 * scale)
+    )
+    return analyzer
+
+
+async def run_burst(single_flight: bool, args) -> Dict:
+    analyzer = build_analyzer(single_flight, args.time_scale)
+    submissions = build_submissions(args.scripts, 3)
+
+    async def timed(submission):
+        start = time.perf_counter()
+        await analyzer.analyze_script(submission)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(
+            timed(submission)
+            for submission in submissions
+            for _ in range(args.duplicates)
+        )
+    )
+    row = {
+        "single_flight": single_flight,
+        "requests": len(latencies),
+        "openai_calls": len(analyzer.openai_client.chat.completions.calls),
+        "p50_seconds": percentile(latencies, 0.50),
+        "p95_seconds": percentile(latencies, 0.95),
+        "seconds": time.perf_counter() - started,
+    }
+    if single_flight:
+        row["stats"] = analyzer.single_flight.stats()
+    return row
+
+
+async def run_cancellations(args) -> Dict:
+    analyzer = build_analyzer(True, args.time_scale)
+    submission = build_submissions(1, 3)[0]
+    # Three waiters, two give up: the third still gets the analysis
+    waiters = [
+        asyncio.ensure_future(analyzer.analyze_script(submission)) for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    for waiter in waiters[:2]:
+        waiter.cancel()
+    analysis = await waiters[2]
+    partly = {
+        "remaining_status": analysis["status"],
+        "openai_calls": len(analyzer.openai_client.chat.completions.calls),
+    }
+
+    # Every waiter gives up: the shared analysis is cancelled too
+    other = build_submissions(2, 3)[1]
+    waiters = [asyncio.ensure_future(analyzer.analyze_script(other)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    return {
+        "some_waiters_cancelled": partly,
+        "stats": analyzer.single_flight.stats(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", type=int, default=50)
+    parser.add_argument("--duplicates", type=int, default=3)
+    parser.add_argument(
+        "--time-scale", type=float, default=0.1, help="scale simulated latencies"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON only")
+    args = parser.parse_args()
+
+    rows = [await run_burst(enabled, args) for enabled in (False, True)]
+    cancellations = await run_cancellations(args)
+    if args.json:
+        print(json.dumps({"bursts": rows, "cancellations": cancellations}, indent=2))
+        return
+
+    print(
+        f"{'single-flight':<14} {'requests':>9} {'openai calls':>13} "
+        f"{'p50 s':>7} {'p95 s':>7}"
+    )
+    for row in rows:
+        print(
+            f"{'on' if row['single_flight'] else 'off':<14} {row['requests']:>9} "
+            f"{row['openai_calls']:>13} {row['p50_seconds']:>7.3f} "
+            f"{row['p95_seconds']:>7.3f}"
+        )
+    print(f"coalesced: {rows[1]['stats']['coalesced']} requests")
+    partly = cancellations["some_waiters_cancelled"]
+    stats = cancellations["stats"]
+    print(
+        f"2 of 3 waiters cancelled: the last got {partly['remaining_status']} "
+        f"after {partly['openai_calls']} OpenAI calls; all waiters cancelled: "
+        f"{stats['flights_cancelled']} analysis cancelled, "
+        f"{stats['in_flight']} left in flight"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,272 @@
+"""Local mock of the OpenAI chat completions endpoint.
+
+Answers POST /v1/chat/completions with the canned per-check responses from
+stub_openai, after a configurable latency. Faults can be injected: a share of
+requests fails with 429/500 errors, stalls for stall_seconds or has its
+connection dropped, and setting healthy to False turns every request into a
+503 (an outage). Point an analyzer at it with
+base_url="http://127.0.0.1:<port>/v1".
+
+    python src/benchmarks/mock_openai_server.py --port 8099 \
+        --latency lognormal:0.4,0.5 --error-rate 0.02 --stall-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import canned_response, estimate_tokens
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency distribution in seconds from a spec string.
+
+    fixed:S, uniform:LOW,HIGH, exponential:MEAN, lognormal:MEDIAN,SIGMA
+    """
+    kind, _, arguments = spec.partition(":")
+    values = [float(value) for value in arguments.split(",") if value]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _http_response(status: int, reason: str, payload: dict, headers=()) -> bytes:
+    body = json.dumps(payload).encode()
+    head = [
+        f"HTTP/1.1 {status} {reason}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: keep-alive",
+        *headers,
+    ]
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+class MockOpenAIServer:
+    def __init__(
+        self,
+        latency: str = "fixed:0.05",
+        error_rate: float = 0.0,
+        responder: Callable[[str], str] = canned_response,
+        seed: Optional[int] = None,
+        cache_min_tokens: int = 1024,
+        stall_rate: float = 0.0,
+        stall_seconds: float = 5.0,
+        drop_rate: float = 0.0,
+    ):
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.drop_rate = drop_rate
+        # Set to False to simulate an outage
+        self.healthy = True
+        self.responder = responder
+        self.random = random.Random(seed)
+        # Prompt caching as OpenAI does it: repeated prefixes of at least
+        # cache_min_tokens are reported as cached in 128 token steps
+        self.cache_min_tokens = cache_min_tokens
+        self._seen_prefixes = set()
+        self.requests = 0
+        self.errors = 0
+        self.stalls = 0
+        self.drops = 0
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _cached_tokens(self, messages) -> int:
+        # Only the static messages before the last one can be a shared prefix
+        prefix = "\n".join(message["content"] for message in messages[:-1])
+        tokens = estimate_tokens(prefix) if prefix else 0
+        if tokens < self.cache_min_tokens:
+            return 0
+        if prefix not in self._seen_prefixes:
+            self._seen_prefixes.add(prefix)
+            return 0
+        return tokens - tokens % 128
+
+    def _completion(self, request: dict) -> dict:
+        prompt = "\n".join(message["content"] for message in request["messages"])
+        content = self.responder(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {
+                    "cached_tokens": self._cached_tokens(request["messages"])
+                },
+            },
+        }
+
+    async def _respond(self, path: str, body: bytes) -> Optional[bytes]:
+        """Response bytes, or None to drop the connection"""
+        if not path.rstrip("/").endswith("/chat/completions"):
+            return _http_response(404, "Not Found", {"error": {"message": "not found"}})
+
+        self.requests += 1
+        if not self.healthy:
+            self.errors += 1
+            return _http_response(
+                503,
+                "Service Unavailable",
+                {"error": {"message": "Mock outage", "type": "server_error"}},
+            )
+        delay = self.latency(self.random)
+        if self.random.random() < self.stall_rate:
+            self.stalls += 1
+            delay += self.stall_seconds
+        await asyncio.sleep(delay)
+        if self.random.random() < self.drop_rate:
+            self.drops += 1
+            return None
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            if self.random.random() < 0.5:
+                return _http_response(
+                    429,
+                    "Too Many Requests",
+                    {"error": {"message": "Rate limit reached", "type": "requests"}},
+                    headers=("Retry-After-Ms: 10",),
+                )
+            return _http_response(
+                500,
+                "Internal Server Error",
+                {"error": {"message": "Mock upstream failure", "type": "server_error"}},
+            )
+        return _http_response(200, "OK", self._completion(json.loads(body)))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                length = 0
+                while True:
+                    line = (await reader.readline()).decode().strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                response = await self._respond(path, body)
+                if response is None:
+                    break
+                writer.write(response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(
+            self._handle, host, port, backlog=1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        # Idle keep-alive connections would otherwise keep their handlers waiting
+        handlers = [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def start_in_thread(self):
+        """Serve from a background thread, for sync clients and other event loops"""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        future = asyncio.run_coroutine_threadsafe(self.stop(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start_in_thread()
+
+    def __exit__(self, *exc_info):
+        self.stop_thread()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", default="fixed:0.05")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--cache-min-tokens", type=int, default=1024)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        args.latency,
+        args.error_rate,
+        seed=args.seed,
+        cache_min_tokens=args.cache_min_tokens,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        drop_rate=args.drop_rate,
+    )
+    await server.start(args.host, args.port)
+    print(f"Mock OpenAI API listening on http://{args.host}:{server.port}/v1")
+    await server._server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
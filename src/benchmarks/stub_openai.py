@@ -0,0 +1,240 @@
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, List, Optional
+
+sys.path.append("./")
+
+from src.evaluation_engine.consolidated import CONSOLIDATED_SECTIONS
+from src.evaluation_engine.rulepacks import default_registry
+
+# Representative model answers for each check, using the headers the
+# _process_*_analysis methods look for
+CANNED_SECTIONS = {
+    "brand safety": (
+        "Adult Content: None found, the language is family friendly.\n"
+        "Severity: Low\n\n"
+        "Political: None found.\n"
+        "Severity: Low\n\n"
+        "Harassment: None found, no individuals or groups are targeted.\n"
+        "Severity: Low\n\n"
+        "Misinformation: None found, product claims are accurate.\n"
+        "Severity: Low"
+    ),
+    "core requirements": (
+        "Introduction: The script calls Milanote a tool for organizing creative "
+        "projects.\n\n"
+        "Product Description: Milanote is described as a canvas for planning and "
+        "brainstorming where team members can collab on boards."
+    ),
+    "script flow": (
+        "Introduction: Milanote is introduced as a tool for creative projects.\n\n"
+        "Personal Usage: The creator describes using a project board.\n\n"
+        "Feature Descriptions: Templates and the ability to collaborate are "
+        "mentioned.\n\n"
+        "Audience Benefits: Viewers can use it for many kinds of projects.\n\n"
+        "Call to Action: Viewers are told it is free and to sign up with the link "
+        "in the description."
+    ),
+    "avoided elements": (
+        "Content Problems: None, the explanation is clear and accurate.\n\n"
+        "Tone: Authentic and in the creator's voice."
+    ),
+}
+
+
+def classify_prompt(prompt: str) -> str:
+    """Work out which check (or the consolidated request) a prompt belongs to"""
+    # Prompts of the default rulepack start with their system message
+    prompts = default_registry().get().prompts
+    for name in prompts:
+        if prompt.startswith(prompts.static_prefix(name)):
+            return name
+    if CONSOLIDATED_SECTIONS["brand safety"] in prompt:
+        return "consolidated"
+    lowered = prompt.lower()
+    if "brand safety" in lowered:
+        return "brand safety"
+    if "introduces and describes" in lowered:
+        return "core requirements"
+    if "flow" in lowered:
+        return "script flow"
+    return "avoided elements"
+
+
+def canned_response(prompt: str) -> str:
+    category = classify_prompt(prompt)
+    if category == "consolidated":
+        return "\n\n".join(
+            f"{marker}\n{CANNED_SECTIONS[name]}"
+            for name, marker in CONSOLIDATED_SECTIONS.items()
+        )
+    return CANNED_SECTIONS[category]
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+class LatencyModel:
+    """Simulated upstream latency: fixed round trip plus per-token costs"""
+
+    def __init__(
+        self,
+        round_trip: float = 0.35,
+        per_prompt_token: float = 0.00002,
+        per_completion_token: float = 0.012,
+    ):
+        self.round_trip = round_trip
+        self.per_prompt_token = per_prompt_token
+        self.per_completion_token = per_completion_token
+
+    def seconds(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (
+            self.round_trip
+            + prompt_tokens * self.per_prompt_token
+            + completion_tokens * self.per_completion_token
+        )
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.role = "assistant"
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.index = 0
+        self.message = _Message(content)
+        self.finish_reason = "stop"
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+
+
+class StubCompletion:
+    """Minimal stand-in for a chat completion object"""
+
+    def __init__(self, content: str, prompt_tokens: int, completion_tokens: int):
+        self.choices = [_Choice(content)]
+        self.usage = _Usage(prompt_tokens, completion_tokens)
+
+
+class _StubCompletions:
+    def __init__(
+        self,
+        latency: LatencyModel,
+        responder: Callable[[str], str],
+        sleep: Callable,
+    ):
+        self.latency = latency
+        self.responder = responder
+        self.sleep = sleep
+        self.calls: List[Dict] = []
+
+    def _build(self, kwargs):
+        prompt = "\n".join(message["content"] for message in kwargs["messages"])
+        content = self.responder(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        self.calls.append(
+            {
+                "model": kwargs.get("model"),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+        )
+        delay = self.latency.seconds(prompt_tokens, completion_tokens)
+        return StubCompletion(content, prompt_tokens, completion_tokens), delay
+
+    @property
+    def with_streaming_response(self) -> "_StreamingResponseCompletions":
+        return _StreamingResponseCompletions(self)
+
+
+class _StubRawResponse:
+    """What with_streaming_response.create yields: headers now, body on parse()"""
+
+    retries_taken = 0
+
+    def __init__(self, parse: Callable):
+        self.parse = parse
+
+
+class _StreamingResponseCompletions:
+    def __init__(self, completions: "_StubCompletions"):
+        self.create = completions._streaming_create
+
+
+class _AsyncStubCompletions(_StubCompletions):
+    async def create(self, **kwargs):
+        completion, delay = self._build(kwargs)
+        await self.sleep(delay)
+        return completion
+
+    @asynccontextmanager
+    async def _streaming_create(self, **kwargs):
+        completion = await self.create(**kwargs)
+
+        async def parse():
+            return completion
+
+        yield _StubRawResponse(parse)
+
+
+class _SyncStubCompletions(_StubCompletions):
+    def create(self, **kwargs):
+        completion, delay = self._build(kwargs)
+        self.sleep(delay)
+        return completion
+
+    @contextmanager
+    def _streaming_create(self, **kwargs):
+        completion = self.create(**kwargs)
+        yield _StubRawResponse(lambda: completion)
+
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class StubAsyncOpenAI:
+    """In-process replacement for AsyncOpenAI that returns canned answers"""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        responder: Callable[[str], str] = canned_response,
+    ):
+        self.chat = _Chat(
+            _AsyncStubCompletions(latency or LatencyModel(), responder, asyncio.sleep)
+        )
+
+    @property
+    def calls(self) -> List[Dict]:
+        return self.chat.completions.calls
+
+
+class StubOpenAI:
+    """In-process replacement for openai.Client that returns canned answers"""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        responder: Callable[[str], str] = canned_response,
+    ):
+        self.chat = _Chat(
+            _SyncStubCompletions(latency or LatencyModel(), responder, time.sleep)
+        )
+
+    @property
+    def calls(self) -> List[Dict]:
+        return self.chat.completions.calls
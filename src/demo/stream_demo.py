@@ -0,0 +1,139 @@
+"""Local harness for the streaming response mode.
+
+Starts a small HTTP server that streams NDJSON or SSE events from the async
+ScriptAnalyzer, then consumes the stream the way the UI does and prints when
+each event arrives. Uses the in-process stub client unless --live is given
+(which needs OPENAI_API_KEY):
+
+    python src/demo/stream_demo.py --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+from src.response_engine.script_analysis_stream import (
+    CONTENT_TYPES,
+    NDJSON,
+    SSE,
+    stream_analysis,
+)
+
+script_content = """Milanote is a tool for organizing creative projects. I use it to plan \
+every video on one big board. There are templates for everything and you can \
+collaborate with your team. It's free, so sign up with the link in the description."""
+
+
+async def read_request(reader: asyncio.StreamReader):
+    request_line = (await reader.readline()).decode()
+    method, target, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return method, target, body
+
+
+def make_handler(analyzer: ScriptAnalyzer):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        method, target, body = await read_request(reader)
+        query = parse_qs(urlsplit(target).query)
+        stream_format = query.get("format", [NDJSON])[0]
+        payload = json.loads(body or b"{}")
+        submission = ScriptSubmission(
+            content=payload.get("content", ""),
+            creator_name=payload.get("creator_name", ""),
+        )
+
+        writer.write(
+            (
+                "HTTP/1.1 200 OK\r\n"
+                f"Content-Type: {CONTENT_TYPES[stream_format]}\r\n"
+                "Transfer-Encoding: chunked\r\n"
+                "Cache-Control: no-cache\r\n\r\n"
+            ).encode()
+        )
+        async for chunk in stream_analysis(analyzer, submission, stream_format):
+            data = chunk.encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    return handle
+
+
+async def consume(port: int, stream_format: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"content": script_content, "creator_name": "demo"}).encode()
+    writer.write(
+        (
+            f"POST /analyze?format={stream_format} HTTP/1.1\r\n"
+            "Host: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        + body
+    )
+    await writer.drain()
+
+    start = time.perf_counter()
+    while (await reader.readline()).strip():
+        pass  # Response headers
+
+    buffer = ""
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        if size == 0:
+            break
+        buffer += (await reader.readexactly(size + 2))[:-2].decode()
+        separator = "\n\n" if stream_format == SSE else "\n"
+        while separator in buffer:
+            message, buffer = buffer.split(separator, 1)
+            if stream_format == SSE:
+                message = message.split("data: ", 1)[1]
+            event = json.loads(message)
+            elapsed = time.perf_counter() - start
+            if event["event"] == "check":
+                for category, results in event["details"].items():
+                    passed = sum(result["passed"] for result in results)
+                    print(
+                        f"{elapsed:6.2f}s  {category:<18} {passed}/{len(results)} passed"
+                    )
+            else:
+                print(f"{elapsed:6.2f}s  {event['status']}: {event['message']}")
+    writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", choices=[NDJSON, SSE], default=NDJSON)
+    parser.add_argument("--live", action="store_true", help="call the real API")
+    args = parser.parse_args()
+
+    analyzer = ScriptAnalyzer(openai_api_key=os.environ.get("OPENAI_API_KEY", "demo"))
+    if not args.live:
+        analyzer.openai_client = StubAsyncOpenAI(latency=LatencyModel(round_trip=0.2))
+
+    server = await asyncio.start_server(make_handler(analyzer), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        await consume(port, args.format)
+
+
+# Run the script
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,203 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+
+
+def normalize_content(content: str) -> str:
+    """Normalize script text so cosmetic differences hash to the same key"""
+    content = unicodedata.normalize("NFC", content)
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_cache_key(
+    content: str, prompt_version: str, model: str, temperature: float
+) -> str:
+    """Content-addressed key for an analysis of a script"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, repr(float(temperature))):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(normalize_content(content).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def serialize_analysis(analysis: Dict) -> str:
+    """Serialize an analyze_script result to JSON"""
+    return json.dumps(
+        {
+            "status": analysis["status"],
+            "details": {
+                category: [result.to_dict() for result in results]
+                for category, results in analysis["details"].items()
+            },
+            "prompt_version": analysis.get("prompt_version"),
+        }
+    )
+
+
+def deserialize_analysis(payload: str) -> Dict[str, List[AnalysisResult]]:
+    """Rebuild an analyze_script result, including AnalysisResult objects"""
+    data = json.loads(payload)
+    analysis = {
+        "status": data["status"],
+        "details": {
+            category: [AnalysisResult(**result) for result in results]
+            for category, results in data["details"].items()
+        },
+    }
+    if data.get("prompt_version") is not None:
+        analysis["prompt_version"] = data["prompt_version"]
+    return analysis
+
+
+class AnalysisCache:
+    """Two tier cache of analysis results.
+
+    The memory tier is a bounded LRU kept in the process, so a module-level
+    instance survives warm Lambda invocations. The optional disk tier is a
+    SQLite file that can be shared between processes. Both tiers expire
+    entries after ttl_seconds when it is set.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        sqlite_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        if sqlite_path:
+            with self._connect() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                    "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, expires_at REAL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, committed and closed on exit
+        connection = sqlite3.connect(self.sqlite_path, timeout=5.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _expires_at(self, now: float) -> Optional[float]:
+        return now + self.ttl_seconds if self.ttl_seconds is not None else None
+
+    def _remember(self, key: str, payload: str, expires_at: Optional[float]):
+        self._memory[key] = (payload, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """(payload, tier it came from) of a live entry, (None, None) otherwise"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    return payload, "memory"
+                del self._memory[key]
+
+        if self.sqlite_path:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT payload, expires_at FROM analysis_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            if row is not None and (row[1] is None or row[1] > now):
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                return row[0], "disk"
+        return None, None
+
+    def get(self, key: str) -> Optional[Dict[str, List[AnalysisResult]]]:
+        payload, tier = self._lookup(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if tier == "memory":
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+        return deserialize_analysis(payload)
+
+    def peek(self, key: str) -> Optional[Dict[str, List[AnalysisResult]]]:
+        """Like get, but not counted as a hit or miss"""
+        payload, _ = self._lookup(key)
+        return deserialize_analysis(payload) if payload is not None else None
+
+    def put(self, key: str, analysis: Dict):
+        now = time.time()
+        payload = serialize_analysis(analysis)
+        expires_at = self._expires_at(now)
+        with self._lock:
+            self._remember(key, payload, expires_at)
+
+        if self.sqlite_path:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO analysis_cache "
+                    "(key, payload, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, expires_at),
+                )
+                connection.execute(
+                    "DELETE FROM analysis_cache WHERE expires_at IS NOT NULL "
+                    "AND expires_at <= ?",
+                    (now,),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.sqlite_path:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM analysis_cache")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "memory_entries": len(self._memory),
+            }
+
+
+def is_cacheable(analysis: Dict) -> bool:
+    """Results containing an error entry are transient and must not be cached"""
+    return not any(
+        result.criteria == "error"
+        for results in analysis["details"].values()
+        for result in results
+    )
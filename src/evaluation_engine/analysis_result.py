@@ -1,5 +1,5 @@
 import sys
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
 
 sys.path.append("./")
@@ -10,12 +10,24 @@ class AnalysisResult(BaseModel):
     passed: bool
     feedback: str
     suggestions: Optional[List[str]] = None
+    severity: Optional[str] = None
+    # Revision of the same creator's script this result was carried over from
+    reused_from_revision: Optional[int] = None
+    # (start, end) seconds of the audio or video the criterion failed in
+    timestamps: Optional[List[Tuple[float, float]]] = None
 
     def to_dict(self):
         # Convert the object to a dictionary format
-        return {
+        result = {
             "criteria": self.criteria,
             "passed": self.passed,
             "feedback": self.feedback,
             "suggestions": self.suggestions,
         }
+        if self.severity is not None:
+            result["severity"] = self.severity
+        if self.reused_from_revision is not None:
+            result["reused_from_revision"] = self.reused_from_revision
+        if self.timestamps is not None:
+            result["timestamps"] = [list(span) for span in self.timestamps]
+        return result
@@ -0,0 +1,355 @@
+"""Offline analysis through the OpenAI Batch API.
+
+write_batch_requests turns a corpus of submissions into a Batch API request
+file using the analyzer's own prompt builders and each submission's rulepack,
+and read_batch_results turns the downloaded output file back into
+APPROVED/REJECTED verdicts using the same _process_*_analysis methods as the
+online path. Both stream line by line.
+
+Every custom_id carries the brand and prompt version the request was written
+with (submission__brand__prompt version__check), so the output is judged by
+that brand's rules and labelled with the prompts actually sent, even if they
+changed before the results came back. Underscores in the brand are escaped,
+so the separator only ever appears between fields. A script whose brand has
+no rulepack any more gets an error verdict, and the rest of the file is still
+read.
+
+    python src/evaluation_engine/batch_mode.py write scripts.jsonl requests.jsonl
+    python src/evaluation_engine/batch_mode.py ingest output.jsonl verdicts.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.consolidated import (
+    build_consolidated_prompt,
+    split_consolidated_sections,
+)
+from src.evaluation_engine.rulepacks import RulepackError, UnknownRulepackError
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+# custom_id suffix -> (result category, prompt builder, response processor)
+BATCH_CHECKS = {
+    "brand_safety": (
+        "brand safety",
+        "_build_brand_safety_prompt",
+        "_process_brand_safety_analysis",
+    ),
+    "core_requirements": (
+        "core requirements",
+        "_build_core_requirements_prompt",
+        "_process_core_requirements_analysis",
+    ),
+    "script_flow": (
+        "script flow",
+        "_build_script_flow_prompt",
+        "_process_script_flow_analysis",
+    ),
+    "avoided_elements": (
+        "avoided elements",
+        "_build_avoided_elements_prompt",
+        "_process_avoided_elements_analysis",
+    ),
+}
+CONSOLIDATED_CHECK = "consolidated"
+CUSTOM_ID_SEPARATOR = "__"
+# Brand names may hold underscores, so "__" inside one would split the id
+_ESCAPED_UNDERSCORE = "%5F"
+
+logger = logging.getLogger(__name__)
+
+
+class BatchVerdict(BaseModel):
+    submission_id: str
+    brief_type: Optional[str] = None
+    status: str
+    details: Dict
+    # Checks whose response was missing or failed in the results file
+    failed_checks: List[str] = []
+    prompt_version: Optional[str] = None
+
+
+def make_submission_id(submission: ScriptSubmission, index: int) -> str:
+    """Stable id for a submission: its position plus a digest of its content"""
+    digest = hashlib.sha256(
+        f"{submission.creator_name}\x00{submission.content}".encode("utf-8")
+    ).hexdigest()[:12]
+    return f"script-{index:08d}-{digest}"
+
+
+def _request_line(analyzer, custom_id: str, messages: List[Dict[str, str]]) -> str:
+    return json.dumps(
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": analyzer.model,
+                "messages": messages,
+                "temperature": analyzer.temperature,
+            },
+        }
+    )
+
+
+def make_custom_id(submission_id: str, rulepack, check: str) -> str:
+    brand = rulepack.brand.replace("_", _ESCAPED_UNDERSCORE)
+    return CUSTOM_ID_SEPARATOR.join(
+        [submission_id, brand, rulepack.prompt_version, check]
+    )
+
+
+def parse_custom_id(custom_id: str) -> Tuple[str, Optional[str], Optional[str], str]:
+    """(submission id, brand, prompt version, check) of a request's custom_id"""
+    parts = custom_id.split(CUSTOM_ID_SEPARATOR)
+    if len(parts) < 4:
+        # Written before custom ids carried the rulepack
+        submission_id, _, check = custom_id.rpartition(CUSTOM_ID_SEPARATOR)
+        return submission_id, None, None, check
+    brand = parts[-3].replace(_ESCAPED_UNDERSCORE, "_")
+    return CUSTOM_ID_SEPARATOR.join(parts[:-3]), brand, parts[-2], parts[-1]
+
+
+def iter_batch_requests(
+    analyzer, submissions: Iterable[ScriptSubmission]
+) -> Iterator[str]:
+    """Yield one Batch API request line per check (or one per script when consolidated)"""
+    for index, submission in enumerate(submissions):
+        submission_id = make_submission_id(submission, index)
+        # Raises UnknownRulepackError for a brief type without a pack
+        rulepack = analyzer.rulepacks.get(submission.brief_type)
+        if analyzer.consolidated:
+            yield _request_line(
+                analyzer,
+                make_custom_id(submission_id, rulepack, CONSOLIDATED_CHECK),
+                build_consolidated_prompt(submission.content, rulepack),
+            )
+            continue
+
+        for check, (_, builder, _) in BATCH_CHECKS.items():
+            yield _request_line(
+                analyzer,
+                make_custom_id(submission_id, rulepack, check),
+                getattr(analyzer, builder)(submission.content, rulepack),
+            )
+
+
+def write_batch_requests(
+    analyzer, submissions: Iterable[ScriptSubmission], output: TextIO
+) -> int:
+    """Write the request file for a corpus, returning the number of lines written"""
+    count = 0
+    for line in iter_batch_requests(analyzer, submissions):
+        output.write(line + "\n")
+        count += 1
+    return count
+
+
+def _error_result(category: str, message: str) -> List[AnalysisResult]:
+    return [
+        AnalysisResult(
+            criteria="error",
+            passed=False,
+            feedback=f"Batch request for {category} failed: {message}",
+            suggestions=[f"Please resubmit the script for {category} analysis"],
+        )
+    ]
+
+
+def _response_text(record: Dict) -> Optional[str]:
+    """Model answer from one results line, or None when the request failed"""
+    if record.get("error"):
+        return None
+    response = record.get("response") or {}
+    if response.get("status_code", 200) != 200:
+        return None
+    try:
+        return response["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _failure_reason(record: Dict) -> str:
+    error = record.get("error")
+    if error:
+        return (
+            error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        )
+    response = record.get("response") or {}
+    return f"status code {response.get('status_code', 'unknown')}"
+
+
+def _build_verdict(
+    analyzer,
+    submission_id: str,
+    answers: Dict,
+    brand: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+) -> BatchVerdict:
+    try:
+        rulepack = analyzer.rulepacks.get(brand)
+    except (UnknownRulepackError, RulepackError) as e:
+        # The pack may have been removed since the requests were written
+        logger.warning("Cannot judge %s: %s", submission_id, e)
+        return BatchVerdict(
+            submission_id=submission_id,
+            brief_type=brand,
+            status="REJECTED",
+            details={
+                category: _error_result(category, str(e))
+                for category, _, _ in BATCH_CHECKS.values()
+            },
+            failed_checks=(
+                [CONSOLIDATED_CHECK]
+                if CONSOLIDATED_CHECK in answers
+                else list(BATCH_CHECKS)
+            ),
+            prompt_version=prompt_version,
+        )
+    if prompt_version is None:
+        prompt_version = rulepack.prompt_version
+    elif prompt_version != rulepack.prompt_version:
+        logger.warning(
+            "%s was sent with prompt version %s, judging it with the rules of %s",
+            submission_id,
+            prompt_version,
+            rulepack.prompt_version,
+        )
+    if CONSOLIDATED_CHECK in answers:
+        text, reason = answers[CONSOLIDATED_CHECK]
+        if text is None:
+            details = {
+                category: _error_result(category, reason)
+                for category, _, _ in BATCH_CHECKS.values()
+            }
+            failed_checks = [CONSOLIDATED_CHECK]
+        else:
+            sections = split_consolidated_sections(text)
+            details = {
+                category: getattr(analyzer, processor)(sections[category], rulepack)
+                for category, _, processor in BATCH_CHECKS.values()
+            }
+            failed_checks = []
+    else:
+        details = {}
+        failed_checks = []
+        for check, (category, _, processor) in BATCH_CHECKS.items():
+            text, reason = answers.get(check, (None, "missing from results file"))
+            if text is None:
+                details[category] = _error_result(category, reason)
+                failed_checks.append(check)
+            else:
+                details[category] = getattr(analyzer, processor)(text, rulepack)
+
+    # Same rule as analyze_script: any brand safety failure rejects the script
+    rejected = any(not result.passed for result in details["brand safety"])
+    return BatchVerdict(
+        submission_id=submission_id,
+        brief_type=brand,
+        status="REJECTED" if rejected else "APPROVED",
+        details=details,
+        failed_checks=failed_checks,
+        prompt_version=prompt_version,
+    )
+
+
+def read_batch_results(analyzer, lines: Iterable[str]) -> Iterator[BatchVerdict]:
+    """Turn Batch API output lines into verdicts as soon as a script is complete.
+
+    Only scripts whose answers have not all arrived yet are held in memory, so
+    output files that keep a script's lines close together (the normal case)
+    are processed in constant memory regardless of their length.
+    """
+    expected = len(BATCH_CHECKS)
+    # (brand, prompt version, answers) of every incomplete script
+    pending: Dict[str, Tuple] = {}
+
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        submission_id, brand, prompt_version, check = parse_custom_id(
+            record["custom_id"]
+        )
+        _, _, answers = pending.setdefault(submission_id, (brand, prompt_version, {}))
+        answers[check] = (_response_text(record), _failure_reason(record))
+
+        if check == CONSOLIDATED_CHECK or len(answers) == expected:
+            del pending[submission_id]
+            yield _build_verdict(
+                analyzer, submission_id, answers, brand, prompt_version
+            )
+
+    # Anything left is missing at least one answer
+    for submission_id, (brand, prompt_version, answers) in pending.items():
+        yield _build_verdict(analyzer, submission_id, answers, brand, prompt_version)
+
+
+def _verdict_line(verdict: BatchVerdict) -> str:
+    return json.dumps(
+        {
+            "submission_id": verdict.submission_id,
+            "brief_type": verdict.brief_type,
+            "status": verdict.status,
+            "failed_checks": verdict.failed_checks,
+            "prompt_version": verdict.prompt_version,
+            "details": {
+                category: [result.to_dict() for result in results]
+                for category, results in verdict.details.items()
+            },
+        }
+    )
+
+
+def _read_submissions(lines: Iterable[str]) -> Iterator[ScriptSubmission]:
+    for line in lines:
+        if line.strip():
+            yield ScriptSubmission(**json.loads(line))
+
+
+def main():
+    from src.evaluation_engine.script_analysis import ScriptAnalyzer
+
+    parser = argparse.ArgumentParser(
+        description="OpenAI Batch API request/result files"
+    )
+    parser.add_argument("command", choices=["write", "ingest"])
+    parser.add_argument(
+        "input", help="submissions JSONL (write) or batch output (ingest)"
+    )
+    parser.add_argument(
+        "output", help="batch request JSONL (write) or verdicts (ingest)"
+    )
+    parser.add_argument("--consolidated", action="store_true")
+    args = parser.parse_args()
+
+    # Only the prompt builders and processors are used, no request is sent
+    analyzer = ScriptAnalyzer(
+        openai_api_key=os.environ.get("OPENAI_API_KEY", "batch"),
+        consolidated=args.consolidated,
+    )
+    with open(args.input, encoding="utf-8") as source, open(
+        args.output, "w", encoding="utf-8"
+    ) as target:
+        if args.command == "write":
+            count = write_batch_requests(analyzer, _read_submissions(source), target)
+            print(f"Wrote {count} batch requests to {args.output}")
+        else:
+            count = 0
+            for verdict in read_batch_results(analyzer, source):
+                target.write(_verdict_line(verdict) + "\n")
+                count += 1
+            print(f"Wrote {count} verdicts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
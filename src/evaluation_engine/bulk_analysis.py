@@ -0,0 +1,44 @@
+import sys
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+
+class BulkAnalysisItem(BaseModel):
+    # Position of the submission in the input iterator
+    index: int
+    submission: ScriptSubmission
+    analysis: Optional[Dict] = None
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+class BulkAnalysisSummary(BaseModel):
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    approved: int = 0
+    rejected: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def scripts_per_second(self) -> float:
+        return self.total / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def record(self, item: BulkAnalysisItem):
+        self.total += 1
+        if item.failed:
+            self.failed += 1
+            return
+        self.succeeded += 1
+        if item.analysis["status"] == "REJECTED":
+            self.rejected += 1
+        else:
+            self.approved += 1
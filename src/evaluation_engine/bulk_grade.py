@@ -0,0 +1,468 @@
+"""Grade a corpus of scripts from the command line, across worker processes.
+
+The input is a directory (every .txt, .md and .json file below it) or a JSONL
+file of submissions. .txt and .md files are the script itself, written by
+--creator-name or else the name of the file's directory; .json files and JSONL
+lines hold ScriptSubmission fields, plus an optional "id".
+
+Every worker process runs an async ScriptAnalyzer (configured from the same
+environment variables as the Lambda) with up to --concurrency scripts in
+flight, pulling scripts from a shared queue. Results are appended to the output
+(JSONL, or CSV when it ends in .csv) as they finish, and the output is the
+checkpoint: a rerun skips every script it already holds, so a killed run
+resumes without paying for finished scripts again (--retry-failed also redoes
+the ones whose checks failed). Throughput and ETA are printed to stderr.
+
+    python src/evaluation_engine/bulk_grade.py scripts/ results.jsonl --workers 4
+    python src/evaluation_engine/bulk_grade.py corpus.jsonl results.csv \\
+        --workers 8 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+sys.path.append("./")
+
+from src.evaluation_engine.batch_mode import make_submission_id
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+SCRIPT_SUFFIXES = (".txt", ".md")
+CSV_COLUMNS = [
+    "id",
+    "creator_name",
+    "brief_type",
+    "status",
+    "failed_checks",
+    "failed_criteria",
+    "prompt_version",
+    "elapsed_seconds",
+    "error",
+    "details",
+]
+# Status of a script whose analysis raised instead of returning
+ERROR_STATUS = "ERROR"
+
+logger = logging.getLogger(__name__)
+
+
+def iter_directory(
+    directory: str, creator_name: Optional[str] = None
+) -> Iterator[Tuple[str, Dict]]:
+    """(id, submission fields) of every script file below a directory"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            script_id = os.path.relpath(path, directory)
+            if name.endswith(".json"):
+                with open(path, encoding="utf-8") as source:
+                    fields = json.load(source)
+                yield str(fields.pop("id", script_id)), fields
+            elif name.endswith(SCRIPT_SUFFIXES):
+                with open(path, encoding="utf-8") as source:
+                    content = source.read()
+                yield script_id, {
+                    "content": content,
+                    "creator_name": creator_name
+                    or os.path.basename(os.path.abspath(root)),
+                }
+
+
+def line_id(fields: Dict, index: int) -> str:
+    """Id of a JSONL line without one, worked out without validating it: a
+    submission's make_submission_id, or line-<index> for fields that are not a
+    submission (its worker writes the error row)"""
+    content, creator_name = fields.get("content"), fields.get("creator_name")
+    if isinstance(content, str) and isinstance(creator_name, str):
+        return make_submission_id(
+            ScriptSubmission(content=content, creator_name=creator_name), index
+        )
+    return f"line-{index:08d}"
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[str, Dict]]:
+    """(id, submission fields) of every line of a JSONL file"""
+    with open(path, encoding="utf-8") as source:
+        index = 0
+        for line in source:
+            if not line.strip():
+                continue
+            fields = json.loads(line)
+            script_id = fields.pop("id", None)
+            if script_id is None:
+                script_id = line_id(fields, index)
+            yield str(script_id), fields
+            index += 1
+
+
+def iter_input(path: str, creator_name: Optional[str] = None):
+    if os.path.isdir(path):
+        return iter_directory(path, creator_name)
+    return iter_jsonl(path)
+
+
+def _failed(row: Dict) -> bool:
+    return row["status"] == ERROR_STATUS or bool(row["failed_checks"])
+
+
+def _repair(path: str):
+    """Drop the torn last line a killed run may have left behind"""
+    with open(path, "rb+") as handle:
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        if not size:
+            return
+        handle.seek(size - 1)
+        if handle.read(1) == b"\n":
+            return
+        # Back to the end of the last complete line
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            handle.seek(position - step)
+            chunk = handle.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                handle.truncate(position - step + newline + 1)
+                return
+            position -= step
+        handle.truncate(0)
+
+
+def finished_ids(path: str, retry_failed: bool = False) -> Set[str]:
+    """Scripts the output already holds (the last row of an id wins)"""
+    if not os.path.exists(path):
+        return set()
+    _repair(path)
+    failed: Dict[str, bool] = {}
+    with open(path, encoding="utf-8", newline="") as source:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(source):
+                row["failed_checks"] = [
+                    check for check in row["failed_checks"].split(";") if check
+                ]
+                failed[row["id"]] = _failed(row)
+        else:
+            for line in source:
+                if line.strip():
+                    row = json.loads(line)
+                    failed[row["id"]] = _failed(row)
+    return {
+        script_id
+        for script_id, is_failed in failed.items()
+        if not (retry_failed and is_failed)
+    }
+
+
+def error_row(
+    script_id: str, fields: Dict, error: str, elapsed_seconds: float = 0.0
+) -> Dict:
+    """Output row of a script that could not be analyzed"""
+    return {
+        "id": script_id,
+        "creator_name": fields.get("creator_name"),
+        "brief_type": fields.get("brief_type"),
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "status": ERROR_STATUS,
+        "failed_checks": [],
+        "prompt_version": None,
+        "error": error,
+        "details": {},
+    }
+
+
+def result_row(script_id: str, fields: Dict, item) -> Dict:
+    """Output row of one analyzed script"""
+    if item.failed:
+        return error_row(script_id, fields, item.error, item.elapsed_seconds)
+    row = {
+        "id": script_id,
+        "creator_name": fields.get("creator_name"),
+        "brief_type": fields.get("brief_type"),
+        "elapsed_seconds": round(item.elapsed_seconds, 3),
+    }
+    analysis = item.analysis
+    details = {
+        category: [result.to_dict() for result in results]
+        for category, results in analysis["details"].items()
+    }
+    return dict(
+        row,
+        status=analysis["status"],
+        failed_checks=[
+            category
+            for category, results in details.items()
+            if any(result["criteria"] == "error" for result in results)
+        ],
+        prompt_version=analysis.get("prompt_version"),
+        error=None,
+        details=details,
+    )
+
+
+class ResultWriter:
+    """Appends rows to the output, flushed one by one"""
+
+    def __init__(self, path: str):
+        self.csv = path.endswith(".csv")
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self.output = open(path, "a", encoding="utf-8", newline="")
+        if self.csv:
+            self.writer = csv.DictWriter(self.output, CSV_COLUMNS)
+            if new:
+                self.writer.writeheader()
+
+    def write(self, row: Dict):
+        if self.csv:
+            failed_criteria = [
+                result["criteria"]
+                for results in row["details"].values()
+                for result in results
+                if not result["passed"]
+            ]
+            row = dict(
+                row,
+                # One line per row, so a torn last line is all a kill can leave
+                creator_name=" ".join(str(row["creator_name"]).split()),
+                failed_checks=";".join(row["failed_checks"]),
+                failed_criteria=";".join(failed_criteria),
+                error=row["error"] and " ".join(row["error"].split()),
+                details=json.dumps(row["details"]),
+            )
+            self.writer.writerow(row)
+        else:
+            self.output.write(json.dumps(row) + "\n")
+        self.output.flush()
+
+    def close(self):
+        self.output.close()
+
+
+class Progress:
+    """Throughput over the last minute and the ETA it gives, on stderr"""
+
+    def __init__(self, total: int, interval: float = 1.0, window: float = 60.0):
+        self.total = total
+        self.interval = interval
+        self.window = window
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._times = deque()
+        self._printed = 0.0
+        self._tty = sys.stderr.isatty()
+
+    def record(self, failed: bool):
+        now = time.perf_counter()
+        self.done += 1
+        self.failed += failed
+        self._times.append(now)
+        while self._times and now - self._times[0] > self.window:
+            self._times.popleft()
+        if now - self._printed >= self.interval or self.done == self.total:
+            self._printed = now
+            self.print(now)
+
+    def rate(self, now: float) -> float:
+        span = min(self.window, now - self.started)
+        return len(self._times) / span if span > 0 else 0.0
+
+    def print(self, now: Optional[float] = None):
+        now = now or time.perf_counter()
+        rate = self.rate(now)
+        remaining = self.total - self.done
+        eta = remaining / rate if rate else float("inf")
+        eta_text = (
+            time.strftime("%H:%M:%S", time.gmtime(eta)) if eta < 86400 * 30 else "-"
+        )
+        line = (
+            f"{self.done}/{self.total} scripts, {rate:.2f} scripts/s, "
+            f"ETA {eta_text}, {self.failed} failed"
+        )
+        if self._tty:
+            end = "\n" if self.done == self.total else ""
+            sys.stderr.write(f"\r{line}\x1b[K{end}")
+        else:
+            sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+
+async def _work(tasks, results, concurrency: int):
+    from src.evaluation_engine.environment import analyzer_options, results_store
+    from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+
+    analyzer = ScriptAnalyzer(**analyzer_options())
+    store = results_store()
+    loop = asyncio.get_running_loop()
+    # Script of each position in this worker's stream
+    pulled = {}
+
+    def next_task():
+        parent = multiprocessing.parent_process()
+        while True:
+            try:
+                return tasks.get(timeout=1.0)
+            except queue.Empty:
+                # A killed parent leaves nobody to feed or read this worker
+                if parent is not None and not parent.is_alive():
+                    return None
+
+    async def submissions():
+        index = 0
+        while True:
+            task = await loop.run_in_executor(None, next_task)
+            if task is None:
+                return
+            script_id, fields = task
+            try:
+                submission = ScriptSubmission(**fields)
+            except (TypeError, ValidationError) as e:
+                # Never reaches the analyzer, but still gets its row
+                results.put(error_row(script_id, fields, f"Invalid submission: {e}"))
+                continue
+            pulled[index] = (script_id, fields)
+            index += 1
+            yield submission
+
+    async for item in analyzer.analyze_many(submissions(), max_concurrency=concurrency):
+        script_id, fields = pulled.pop(item.index)
+        if store is not None and not item.failed:
+            try:
+                store.append(
+                    item.analysis,
+                    item.submission.creator_name,
+                    analyzer.rulepacks.get(item.submission.brief_type).brand,
+                )
+            except Exception:
+                # The verdict is written either way, only the results store misses it
+                logger.exception("Could not record the results of %s", script_id)
+        results.put(result_row(script_id, fields, item))
+    if store is not None:
+        store.flush()
+
+
+def _worker(tasks, results, concurrency: int):
+    try:
+        asyncio.run(_work(tasks, results, concurrency))
+    finally:
+        # Tells the parent this worker has nothing more to send
+        results.put(None)
+        parent = multiprocessing.parent_process()
+        if parent is not None and not parent.is_alive():
+            # Nobody drains the queue any more: exit without flushing it
+            results.cancel_join_thread()
+
+
+def grade(
+    input_path: str,
+    output_path: str,
+    workers: int = 4,
+    concurrency: int = 8,
+    creator_name: Optional[str] = None,
+    retry_failed: bool = False,
+) -> Dict:
+    """Grade every script of the input not in the output yet, returns the counts"""
+    done = finished_ids(output_path, retry_failed)
+    total = sum(
+        script_id not in done for script_id, _ in iter_input(input_path, creator_name)
+    )
+    summary = {"skipped": len(done), "total": total, "failed": 0}
+    if not total:
+        return summary
+
+    # Spawned, so no worker inherits the parent's threads or open files
+    context = multiprocessing.get_context("spawn")
+    tasks = context.Queue(maxsize=workers * concurrency * 2)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(tasks, results, concurrency))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def feed():
+        for script_id, fields in iter_input(input_path, creator_name):
+            if script_id not in done:
+                tasks.put((script_id, fields))
+        for _ in processes:
+            tasks.put(None)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    writer = ResultWriter(output_path)
+    progress = Progress(total)
+    running = len(processes)
+    try:
+        while running:
+            row = results.get()
+            if row is None:
+                running -= 1
+                continue
+            writer.write(row)
+            progress.record(_failed(row))
+    finally:
+        writer.close()
+        for process in processes:
+            if running:
+                process.terminate()
+            process.join()
+    summary["failed"] = progress.failed
+    summary["graded"] = progress.done
+    summary["elapsed_seconds"] = time.perf_counter() - progress.started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="directory of scripts or submissions JSONL")
+    parser.add_argument("output", help="results file, .jsonl or .csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="scripts in flight per worker"
+    )
+    parser.add_argument(
+        "--creator-name", help="creator of .txt/.md scripts (default: their folder)"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="grade again the scripts whose analysis or checks failed",
+    )
+    args = parser.parse_args()
+
+    summary = grade(
+        args.input,
+        args.output,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        creator_name=args.creator_name,
+        retry_failed=args.retry_failed,
+    )
+    if not summary["total"]:
+        print(
+            f"Nothing to grade, {summary['skipped']} scripts already in {args.output}"
+        )
+        return
+    print(
+        f"Graded {summary['graded']} scripts ({summary['failed']} failed) in "
+        f"{summary['elapsed_seconds']:.1f} s, skipped {summary['skipped']} "
+        f"already in {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
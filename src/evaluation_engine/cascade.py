@@ -0,0 +1,157 @@
+"""Model cascade: a cheap first pass per check, escalating only unsure answers.
+
+Every check first asks its first-pass model. The answer is escalated to the
+check's stronger model only when it looks ambiguous:
+
+- missing_section: a criterion's section is missing or empty
+- conflict: a keyword decided a criterion (a fail keyword was found, or the
+  required keywords were) while its section also negates something, as in
+  "None found, nothing explicit" or "does not describe it as a tool for
+  creative projects"
+- uncertain: the answer hedges ("unclear", "hard to tell", ...)
+
+The stronger model's answer replaces the first one. ModelCascade counts the
+routing decisions per check, and the check's timing record names the model it
+escalated to, so escalation rates show up both in stats() and in the EMF
+metrics.
+"""
+
+import hashlib
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.instrumentation import record_escalation
+
+MISSING_SECTION = "missing_section"
+CONFLICT = "conflict"
+UNCERTAIN = "uncertain"
+REASONS = (MISSING_SECTION, CONFLICT, UNCERTAIN)
+
+
+class CheckRoute(BaseModel):
+    # First-pass model, the policy's when None
+    first_model: Optional[str] = None
+    # Model ambiguous answers go to, the policy's when None
+    escalation_model: Optional[str] = None
+    escalate: bool = True
+
+
+class CascadePolicy(BaseModel):
+    # First-pass model of every check, the analyzer's model when None
+    first_model: Optional[str] = None
+    escalation_model: str = "gpt-4o"
+    # Overrides per check (e.g. never escalate avoided elements)
+    routes: Dict[str, CheckRoute] = {}
+    # Kinds of ambiguity that escalate
+    escalate_on: List[str] = list(REASONS)
+    uncertain_markers: List[str] = [
+        "unclear",
+        "ambiguous",
+        "uncertain",
+        "hard to tell",
+        "difficult to determine",
+        "cannot determine",
+        "can't determine",
+        "not sure",
+        "possibly",
+        "might be",
+    ]
+    negation_markers: List[str] = [
+        "none",
+        "no ",
+        "not ",
+        "n't",
+        "nothing",
+        "without",
+        "missing",
+        "lacks",
+        "absent",
+    ]
+
+
+def _markers(markers: List[str]) -> Optional[re.Pattern]:
+    if not markers:
+        return None
+    return re.compile("|".join(re.escape(marker.lower()) for marker in markers))
+
+
+class ModelCascade:
+    """Routes checks between models and counts the escalations"""
+
+    def __init__(self, policy: Optional[CascadePolicy] = None):
+        self.policy = policy or CascadePolicy()
+        self._uncertain = _markers(self.policy.uncertain_markers)
+        self._negation = _markers(self.policy.negation_markers)
+        self._lock = threading.Lock()
+        self._routed: Counter = Counter()
+        self._escalated: Counter = Counter()
+        self._reasons: Dict[str, Counter] = {}
+
+    def version(self) -> str:
+        """Settings that change the results, for cache keys"""
+        return hashlib.sha256(
+            self.policy.model_dump_json().encode("utf-8")
+        ).hexdigest()[:10]
+
+    def route(self, check: str, default_model: str) -> Tuple[str, Optional[str]]:
+        """(first-pass model, escalation model or None) of a check"""
+        route = self.policy.routes.get(check, CheckRoute())
+        first = route.first_model or self.policy.first_model or default_model
+        if not route.escalate:
+            return first, None
+        escalation = route.escalation_model or self.policy.escalation_model
+        return first, escalation if escalation != first else None
+
+    def ambiguities(self, check: str, answer: str, rulepack) -> List[str]:
+        """Reasons to doubt a first-pass answer, empty when it is clear"""
+        escalate_on = self.policy.escalate_on
+        reasons = []
+        for name, section, by_keyword in rulepack.decisions(check, answer):
+            if section is None:
+                reason = f"{MISSING_SECTION}:{name}"
+            elif (
+                by_keyword
+                and self._negation is not None
+                and self._negation.search(section)
+            ):
+                reason = f"{CONFLICT}:{name}"
+            else:
+                continue
+            if reason.split(":", 1)[0] in escalate_on:
+                reasons.append(reason)
+        if (
+            UNCERTAIN in escalate_on
+            and self._uncertain is not None
+            and self._uncertain.search(answer.lower())
+        ):
+            reasons.append(UNCERTAIN)
+        return reasons
+
+    def record(self, check: str, reasons: List[str], escalation: Optional[str]):
+        """Count a routing decision and note it on the check's timing record"""
+        with self._lock:
+            self._routed[check] += 1
+            if reasons:
+                self._escalated[check] += 1
+                counter = self._reasons.setdefault(check, Counter())
+                counter.update(reason.split(":", 1)[0] for reason in reasons)
+        if reasons:
+            record_escalation(escalation, reasons)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                check: {
+                    "routed": routed,
+                    "escalated": self._escalated[check],
+                    "escalation_rate": self._escalated[check] / routed,
+                    "reasons": dict(self._reasons.get(check, {})),
+                }
+                for check, routed in self._routed.items()
+            }
@@ -0,0 +1,201 @@
+"""Map-reduce analysis of long scripts and transcripts.
+
+split_into_chunks cuts long content on paragraph boundaries (falling back to
+sentences, then words) into chunks of at most max_chars, each starting with
+the last overlap_chars of its predecessor so nothing is judged without its
+context. The analyzers run the chunked checks on every chunk at the same time
+and combine the per-chunk answers with merge_chunk_results, which labels the
+findings of transcript chunks with their time ranges.
+"""
+
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, model_validator
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_SEVERITY_RANK = {None: 0, "low": 1, "medium": 2, "high": 3}
+
+
+class ChunkingPolicy(BaseModel):
+    # Scripts longer than this are split, roughly 3000 tokens per chunk
+    max_chars: int = 12000
+    # Text repeated from the end of the previous chunk
+    overlap_chars: int = 600
+    # Checks that only need local context; the others always see the whole script
+    categories: List[str] = ["brand safety", "avoided elements"]
+    # Chunks of one check in flight at once
+    max_parallel: int = 8
+
+    @model_validator(mode="after")
+    def _overlap_fits(self):
+        # Otherwise a chunk would be all overlap and never reach new text
+        if self.overlap_chars >= self.max_chars:
+            raise ValueError(
+                f"overlap_chars ({self.overlap_chars}) must be less than "
+                f"max_chars ({self.max_chars})"
+            )
+        return self
+
+
+class Chunk(BaseModel):
+    index: int
+    # Offsets of the chunk's own text (without the overlap) in the content
+    start: int
+    end: int
+    text: str
+
+
+def _pieces(text: str, max_chars: int) -> List[str]:
+    """Split text into pieces no longer than max_chars, on the coarsest boundary"""
+    if len(text) <= max_chars:
+        return [text]
+    for separator in (_SENTENCE_END, re.compile(r"\s+")):
+        parts = [part for part in separator.split(text) if part]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                pieces.extend(_pieces(part, max_chars))
+            return pieces
+    # A single word longer than a chunk
+    return [text[i : i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def overlap_text(text: str, overlap_chars: int) -> str:
+    """Tail of text no longer than overlap_chars, starting at a sentence or word"""
+    if overlap_chars <= 0:
+        return ""
+    tail = text[-overlap_chars:]
+    if len(tail) == len(text):
+        return tail
+    sentence = _SENTENCE_END.search(tail)
+    if sentence:
+        return tail[sentence.end() :]
+    space = tail.find(" ")
+    return tail[space + 1 :] if space != -1 else tail
+
+
+def split_into_chunks(
+    content: str, max_chars: int = 12000, overlap_chars: int = 600
+) -> List[Chunk]:
+    """Pack paragraphs (or sentences of long paragraphs) into overlapping chunks"""
+    if len(content) <= max_chars:
+        return [Chunk(index=0, start=0, end=len(content), text=content)]
+
+    budget = max(1, max_chars - overlap_chars)
+    # (start offset, text) of every piece, in order
+    pieces = []
+    for paragraph in re.finditer(r"\S(?:.|\n(?!\s*\n))*", content):
+        offset = paragraph.start()
+        for piece in _pieces(paragraph.group(), budget):
+            start = content.index(piece, offset)
+            pieces.append((start, piece))
+            offset = start + len(piece)
+
+    chunks: List[Chunk] = []
+    current: List = []
+    for start, piece in pieces:
+        if current and start + len(piece) - current[0][0] > budget:
+            chunks.append(_make_chunk(content, chunks, current, overlap_chars))
+            current = []
+        current.append((start, piece))
+    if current:
+        chunks.append(_make_chunk(content, chunks, current, overlap_chars))
+    return chunks
+
+
+def _make_chunk(content: str, chunks: List[Chunk], pieces, overlap_chars) -> Chunk:
+    start = pieces[0][0]
+    end = pieces[-1][0] + len(pieces[-1][1])
+    text = content[start:end]
+    if chunks:
+        previous = chunks[-1]
+        overlap = overlap_text(content[previous.start : previous.end], overlap_chars)
+        if overlap:
+            text = f"{overlap}\n\n{text}"
+    return Chunk(index=len(chunks), start=start, end=end, text=text)
+
+
+def format_span(start_seconds: float, end_seconds: float) -> str:
+    """Time range of a transcript chunk, as in 0:01:30-0:02:00"""
+    return "-".join(
+        "{}:{:02d}:{:02d}".format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+        for seconds in (int(start_seconds), int(end_seconds))
+    )
+
+
+def _dedupe(suggestions: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for suggestion in suggestions:
+        key = " ".join(suggestion.lower().split()).rstrip(".")
+        if key not in seen:
+            seen.add(key)
+            unique.append(suggestion)
+    return unique
+
+
+def merge_chunk_results(
+    per_chunk: List[List[AnalysisResult]],
+    spans: Optional[List[Tuple[float, float]]] = None,
+) -> List[AnalysisResult]:
+    """Combine one check's results over all chunks.
+
+    Results are matched by criteria. A criterion fails if it failed in any
+    chunk, its severity is the worst one reported, its feedback comes from the
+    failing chunks (labelled with their part number) and its suggestions are
+    the de-duplicated union of theirs. With the (start, end) seconds of every
+    chunk of a transcript, feedback is labelled with its time range instead,
+    and failed criteria keep the ranges they failed in as timestamps.
+    """
+    grouped: Dict[str, List] = {}
+    for index, results in enumerate(per_chunk):
+        for result in results:
+            grouped.setdefault(result.criteria, []).append((index, result))
+
+    merged = []
+    total = len(per_chunk)
+    for criteria, entries in grouped.items():
+        failed = [(index, result) for index, result in entries if not result.passed]
+        if not failed:
+            merged.append(entries[0][1])
+            continue
+
+        feedback = []
+        for index, result in failed:
+            if spans is not None:
+                line = f"{format_span(*spans[index])}: {result.feedback}"
+            elif total > 1:
+                line = f"Part {index + 1}/{total}: {result.feedback}"
+            else:
+                line = result.feedback
+            if result.feedback and line not in feedback:
+                feedback.append(line)
+        severity: Optional[str] = max(
+            (result.severity for _, result in failed),
+            key=lambda value: _SEVERITY_RANK.get(value, 0),
+        )
+        suggestions = _dedupe(
+            [
+                suggestion
+                for _, result in failed
+                for suggestion in (result.suggestions or [])
+            ]
+        )
+        merged.append(
+            AnalysisResult(
+                criteria=criteria,
+                passed=False,
+                feedback="\n".join(feedback),
+                suggestions=suggestions or None,
+                severity=severity,
+                timestamps=(
+                    [spans[index] for index, _ in failed] if spans is not None else None
+                ),
+            )
+        )
+    return merged
@@ -0,0 +1,39 @@
+import sys
+from typing import Dict, List
+
+sys.path.append("./")
+
+# Fixed section markers the consolidated prompt asks the model to emit, in order.
+# Each key is the category name used in the analysis result dict.
+CONSOLIDATED_SECTIONS = {
+    "brand safety": "=== BRAND SAFETY ===",
+    "core requirements": "=== CORE REQUIREMENTS ===",
+    "script flow": "=== SCRIPT FLOW ===",
+    "avoided elements": "=== AVOIDED ELEMENTS ===",
+}
+
+
+def build_consolidated_prompt(content: str, rulepack=None) -> List[Dict[str, str]]:
+    """Messages for a single request covering all four checks"""
+    # The template lives in the rulepack, which imports the markers above
+    from src.evaluation_engine.rulepacks import default_registry
+
+    if rulepack is None:
+        rulepack = default_registry().get()
+    return rulepack.render("consolidated", content)
+
+
+def split_consolidated_sections(text: str) -> Dict[str, str]:
+    """Split a consolidated response into per-category text using the fixed markers"""
+    positions = []
+    for category, marker in CONSOLIDATED_SECTIONS.items():
+        start = text.find(marker)
+        if start != -1:
+            positions.append((start, start + len(marker), category))
+    positions.sort()
+
+    sections = {category: "" for category in CONSOLIDATED_SECTIONS}
+    for i, (_, body_start, category) in enumerate(positions):
+        body_end = positions[i + 1][0] if i + 1 < len(positions) else len(text)
+        sections[category] = text[body_start:body_end].strip()
+    return sections
@@ -0,0 +1,131 @@
+"""Analyzer settings read from the environment, shared by every entry point.
+
+The Lambda handlers, the job workers and the ASGI server build their analyzers
+from the same variables, so a deployment behaves the same whichever way it is
+served.
+"""
+
+import os
+import sys
+from typing import Dict
+
+sys.path.append("./")
+
+
+def analyzer_options() -> Dict:
+    """ScriptAnalyzer keyword arguments (sync and async) from the environment"""
+    from src.evaluation_engine.analysis_cache import AnalysisCache
+    from src.evaluation_engine.cascade import CascadePolicy, ModelCascade
+    from src.evaluation_engine.chunking import ChunkingPolicy
+    from src.evaluation_engine.near_duplicates import NearDuplicateIndex
+    from src.evaluation_engine.prescreen import PrescreenPolicy
+    from src.evaluation_engine.resilience import Resilience, ResiliencePolicy
+    from src.evaluation_engine.revisions import RevisionStore
+
+    # PRESCREEN: "off", "annotate" (report only) or "reject" (skip the model on hard hits)
+    prescreen_mode = os.environ.get("PRESCREEN", "off")
+    prescreen_policy = (
+        PrescreenPolicy(reject_on_hard_hit=prescreen_mode == "reject")
+        if prescreen_mode in ("annotate", "reject")
+        else None
+    )
+
+    # CHUNK_MAX_CHARS: split longer scripts for the brand safety and avoided
+    # elements checks (unset keeps sending every script whole)
+    chunk_max_chars = os.environ.get("CHUNK_MAX_CHARS")
+    chunking = (
+        ChunkingPolicy(
+            max_chars=int(chunk_max_chars),
+            overlap_chars=int(os.environ.get("CHUNK_OVERLAP_CHARS", "600")),
+        )
+        if chunk_max_chars
+        else None
+    )
+
+    # RESILIENCE=1 replaces the SDK retries with jittered retries, hedging of
+    # slow requests and a circuit breaker; HEDGE_PERCENTILE=off disables hedging
+    hedge_percentile = os.environ.get("HEDGE_PERCENTILE", "0.95")
+    resilience = (
+        Resilience(
+            ResiliencePolicy(
+                max_attempts=int(os.environ.get("RETRY_MAX_ATTEMPTS", "4")),
+                hedge_percentile=(
+                    None if hedge_percentile == "off" else float(hedge_percentile)
+                ),
+            )
+        )
+        if os.environ.get("RESILIENCE") == "1"
+        else None
+    )
+
+    # NEAR_DUPLICATES: "reuse" or "rerun_affected" answers lightly edited
+    # resubmissions from the cached analysis of the earlier revision
+    near_duplicate_policy = os.environ.get("NEAR_DUPLICATES", "off")
+    near_duplicates = (
+        NearDuplicateIndex(
+            threshold=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.85")),
+            policy=near_duplicate_policy,
+            sqlite_path=os.environ.get("NEAR_DUPLICATE_PATH") or None,
+        )
+        if near_duplicate_policy != "off"
+        else None
+    )
+
+    # REVISIONS=1 re-checks only the paragraphs a creator changed since their
+    # previous revision; REVISION_PATH keeps the revisions in SQLite
+    revisions = (
+        RevisionStore(sqlite_path=os.environ.get("REVISION_PATH") or None)
+        if os.environ.get("REVISIONS") == "1"
+        else None
+    )
+
+    # CASCADE=1 asks CASCADE_FIRST_MODEL (the analyzer's model by default) first
+    # and sends only ambiguous answers on to CASCADE_MODEL
+    cascade = (
+        ModelCascade(
+            CascadePolicy(
+                first_model=os.environ.get("CASCADE_FIRST_MODEL") or None,
+                escalation_model=os.environ.get("CASCADE_MODEL", "gpt-4o"),
+            )
+        )
+        if os.environ.get("CASCADE") == "1"
+        else None
+    )
+
+    return dict(
+        openai_api_key=os.environ.get("OPENAI_API_KEY"),
+        # Lives as long as the analyzer, so cached analyses survive warm invocations
+        cache=AnalysisCache(
+            max_entries=int(os.environ.get("ANALYSIS_CACHE_SIZE", "256")),
+            sqlite_path=os.environ.get("ANALYSIS_CACHE_PATH") or None,
+            ttl_seconds=float(os.environ.get("ANALYSIS_CACHE_TTL", "86400")),
+        ),
+        prescreen_policy=prescreen_policy,
+        # EMIT_METRICS=1 prints per-check tokens, latency and cost as CloudWatch EMF
+        emit_metrics=os.environ.get("EMIT_METRICS") == "1",
+        chunking=chunking,
+        resilience=resilience,
+        rulepacks=rulepack_registry(),
+        near_duplicates=near_duplicates,
+        revisions=revisions,
+        cascade=cascade,
+    )
+
+
+def rulepack_registry():
+    """Registry of the rulepacks submissions are validated and judged against"""
+    from src.evaluation_engine.rulepacks import RulepackRegistry
+
+    # RULEPACK_DIR: directory of <brand>.toml rulepacks, reloaded when edited
+    return RulepackRegistry(os.environ.get("RULEPACK_DIR") or None)
+
+
+def results_store():
+    """Store every verdict is appended to, None unless RESULTS_STORE_DIR is set"""
+    directory = os.environ.get("RESULTS_STORE_DIR")
+    if not directory:
+        return None
+    from src.evaluation_engine.results_store import ResultsStore
+
+    # A frozen container may never run again, so every request is flushed
+    return ResultsStore(directory, flush_rows=1)
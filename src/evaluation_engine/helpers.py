@@ -1,5 +1,6 @@
+import re
 import sys
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 sys.path.append("./")
 
@@ -69,16 +70,126 @@ def extract_severity(text: str) -> str:
         return "medium"
 
 
-def check_section_requirements(section: str, text: str) -> bool:
-    """Check if a section meets its specific requirements"""
-    requirements = {
-        "introduction": ["tool", "creative", "projects"],
-        "personal_usage": ["using", "project", "board"],
-        "feature_descriptions": ["template", "collaborate", "organize"],
-        "audience_benefits": ["can use", "perfect for", "designed for"],
-        "call_to_action": ["free", "sign up", "description"],
-    }
+# A "Header:" line, allowing markdown/numbering prefixes such as "1. ", "- ",
+# "### " or "**" around the header text
+_HEADER = re.compile(r"[ \t>#*_\-]*(?:\d+[.)][ \t]*)?[*_]*([A-Za-z][^\n]*?)[ \t*_]*")
+# Longest line prefix before a colon that is still treated as a header
+_MAX_HEADER_LENGTH = 80
+_SEVERITIES = ("low", "medium", "high")
 
-    if section in requirements:
-        return any(keyword in text.lower() for keyword in requirements[section])
-    return True
+
+class SectionDetails:
+    """A section of a response with its feedback, severity and suggestions"""
+
+    __slots__ = ("text", "lower")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+
+    def _field_start(self, name: str) -> int:
+        position = self.lower.find(name)
+        return -1 if position == -1 else position + len(name)
+
+    def _line_from(self, start: int) -> str:
+        end = self.text.find("\n", start)
+        return self.text[start : end if end != -1 else len(self.text)].strip()
+
+    def feedback(self) -> str:
+        start = self._field_start("feedback:")
+        return self._line_from(start) if start != -1 else self.text.strip()
+
+    def severity(self) -> str:
+        start = self._field_start("severity:")
+        if start == -1:
+            return "medium"
+        severity = self._line_from(start).lower()
+        return severity if severity in _SEVERITIES else "medium"
+
+    def suggestions(self) -> List[str]:
+        start = self._field_start("suggestions:")
+        if start == -1:
+            return []
+        suggestions = []
+        for line in self.text[start:].split("\n"):
+            # Clean up bullet points and numbering
+            clean_line = line.strip().lstrip("•-*123456789.)")
+            if clean_line:
+                suggestions.append(clean_line.strip())
+        return suggestions
+
+
+class SectionIndex:
+    """Header to span index over an OpenAI response, built in a single scan.
+
+    Replaces repeated extract_section calls: the response is scanned once from
+    colon to colon to record "Header:" lines, headers are matched
+    case-insensitively and each section is sliced out of the original text up
+    to the next blank line instead of splitting the whole response.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._lower: Optional[str] = None
+        self._headers: Dict[str, int] = {}
+        self._sections: Dict[str, SectionDetails] = {}
+
+        find, rfind = self.text.find, self.text.rfind
+        colon = find(":")
+        while colon != -1:
+            line_start = rfind("\n", 0, colon) + 1
+            if colon - line_start <= _MAX_HEADER_LENGTH:
+                match = _HEADER.fullmatch(self.text, line_start, colon)
+                if match:
+                    # Keep the first occurrence, like extract_section does
+                    self._headers.setdefault(match.group(1).lower(), colon + 1)
+            colon = find(":", colon + 1)
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    def __contains__(self, name: str) -> bool:
+        key = name.lower()
+        return key in self._headers or key in self.lower
+
+    def _span(self, key: str) -> Optional[Tuple[int, int]]:
+        start = self._headers.get(key)
+        if start is None:
+            # Longer header naming the same section, e.g. "Political Content:"
+            prefixed = [
+                position
+                for header, position in self._headers.items()
+                if header.startswith(f"{key} ")
+            ]
+            start = min(prefixed) if prefixed else None
+        if start is None:
+            # Header written inline or without a colon: fall back to the first
+            # mention, with the same precedence as extract_section
+            position = self.lower.find(f"{key}:")
+            if position != -1:
+                start = position + len(key) + 1
+            else:
+                position = self.lower.find(key)
+                if position == -1:
+                    return None
+                start = position + len(key)
+
+        end = self.text.find("\n\n", start)
+        return start, end if end != -1 else len(self.text)
+
+    def details(self, name: str) -> SectionDetails:
+        key = name.lower()
+        section = self._sections.get(key)
+        if section is None:
+            span = self._span(key)
+            section = SectionDetails(
+                self.text[span[0] : span[1]].strip() if span else ""
+            )
+            self._sections[key] = section
+        return section
+
+    def section(self, name: str) -> str:
+        return self.details(name).text
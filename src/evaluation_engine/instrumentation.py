@@ -0,0 +1,299 @@
+"""Per-check token, latency and cost metrics.
+
+Each analysis collects one CheckTiming per check it runs (or one for the
+consolidated request). The analyzers open a record around every check with
+record_check, _create_completion adds the usage and timings of the request,
+and measure_parse adds the time spent in the _process_* methods. The records
+can be returned as a "timings" block and written out as CloudWatch Embedded
+Metric Format (EMF) log lines, which CloudWatch turns into metrics when they
+are printed from a Lambda function.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, TextIO
+from pydantic import BaseModel
+
+# USD per million (prompt, cached prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+EMF_NAMESPACE = "ScriptAnalysis"
+
+CHECK_METRICS = [
+    ("PromptTokens", "prompt_tokens", "Count"),
+    ("CachedPromptTokens", "cached_prompt_tokens", "Count"),
+    ("CompletionTokens", "completion_tokens", "Count"),
+    ("WallTime", "wall_ms", "Milliseconds"),
+    ("TimeToFirstByte", "ttfb_ms", "Milliseconds"),
+    ("ParseTime", "parse_ms", "Milliseconds"),
+    ("Retries", "retries", "Count"),
+    ("Hedges", "hedges", "Count"),
+    ("Escalations", "escalations", "Count"),
+    ("EstimatedCost", "cost_usd", "None"),
+]
+ANALYSIS_METRICS = [
+    ("AnalysisTime", "total_ms", "Milliseconds"),
+    ("TotalTokens", "total_tokens", "Count"),
+    ("PromptCacheHitRate", "prompt_cache_hit_rate", "None"),
+    ("EstimatedCost", "cost_usd", "None"),
+    ("Requests", "requests", "Count"),
+    ("Escalations", "escalations", "Count"),
+]
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> float:
+    """Estimated USD cost of a request, 0 for models without a known price"""
+    prompt_price, cached_price, completion_price = MODEL_PRICES.get(
+        model, (0.0, 0.0, 0.0)
+    )
+    return (
+        (prompt_tokens - cached_tokens) * prompt_price
+        + cached_tokens * cached_price
+        + completion_tokens * completion_price
+    ) / 1e6
+
+
+def cached_prompt_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prefix cache"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+class CheckTiming(BaseModel):
+    check: str
+    model: str
+    # Chunk, segment or time range the check ran on, when not the whole script
+    part: Optional[str] = None
+    requests: int = 0
+    prompt_tokens: int = 0
+    # Part of prompt_tokens reused from the provider's prompt cache
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Whole check: request(s) plus parsing
+    wall_ms: float = 0.0
+    # Until the response headers of the last request arrived
+    ttfb_ms: Optional[float] = None
+    parse_ms: float = 0.0
+    retries: int = 0
+    # Duplicate requests sent because the first one was slow
+    hedges: int = 0
+    # Answers sent on to a stronger model (see cascade.py), and why
+    escalations: int = 0
+    escalated_to: Optional[str] = None
+    escalation_reasons: List[str] = []
+    cost_usd: float = 0.0
+
+
+class AnalysisTimings:
+    """CheckTiming records of one analysis, safe to fill from several threads"""
+
+    def __init__(self):
+        self.checks: List[CheckTiming] = []
+        self.total_ms: Optional[float] = None
+        # Served from the analysis cache, so no check ran
+        self.cache_hit = False
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, timing: CheckTiming):
+        with self._lock:
+            self.checks.append(timing)
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._started) * 1000
+
+    def totals(self) -> Dict:
+        prompt_tokens = sum(check.prompt_tokens for check in self.checks)
+        cached_tokens = sum(check.cached_prompt_tokens for check in self.checks)
+        return {
+            "total_ms": self.total_ms,
+            "requests": sum(check.requests for check in self.checks),
+            "prompt_tokens": prompt_tokens,
+            "cached_prompt_tokens": cached_tokens,
+            "prompt_cache_hit_rate": (
+                cached_tokens / prompt_tokens if prompt_tokens else None
+            ),
+            "completion_tokens": sum(check.completion_tokens for check in self.checks),
+            "total_tokens": sum(
+                check.prompt_tokens + check.completion_tokens for check in self.checks
+            ),
+            "cost_usd": sum(check.cost_usd for check in self.checks),
+            "escalations": sum(check.escalations for check in self.checks),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            **self.totals(),
+            "cache_hit": self.cache_hit,
+            "checks": [check.model_dump() for check in self.checks],
+        }
+
+
+# Record of the check running in the current task or thread
+_CURRENT_CHECK: ContextVar[Optional[CheckTiming]] = ContextVar(
+    "current_check", default=None
+)
+
+
+@contextmanager
+def record_check(
+    timings: Optional[AnalysisTimings],
+    check: str,
+    model: str,
+    part: Optional[str] = None,
+):
+    """Collect the requests and parsing done inside the block as one check"""
+    if timings is None:
+        yield None
+        return
+
+    timing = CheckTiming(check=check, model=model, part=part)
+    token = _CURRENT_CHECK.set(timing)
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.wall_ms = (time.perf_counter() - start) * 1000
+        _CURRENT_CHECK.reset(token)
+        timings.add(timing)
+
+
+def record_completion(
+    model: str, response, ttfb_seconds: float, retries: int = 0
+) -> None:
+    """Add a completed request to the current check, if one is being recorded"""
+    timing = _CURRENT_CHECK.get()
+    if timing is None:
+        return
+
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    cached_tokens = cached_prompt_tokens(usage)
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if not timing.requests:
+        # The check's model is the one its first request went to
+        timing.model = model
+    timing.requests += 1
+    timing.prompt_tokens += prompt_tokens
+    timing.cached_prompt_tokens += cached_tokens
+    timing.completion_tokens += completion_tokens
+    timing.ttfb_ms = ttfb_seconds * 1000
+    timing.retries += retries
+    timing.cost_usd += estimate_cost(
+        model, prompt_tokens, completion_tokens, cached_tokens
+    )
+
+
+def record_retry() -> None:
+    timing = _CURRENT_CHECK.get()
+    if timing is not None:
+        timing.retries += 1
+
+
+def record_hedge() -> None:
+    timing = _CURRENT_CHECK.get()
+    if timing is not None:
+        timing.hedges += 1
+
+
+def record_escalation(model: Optional[str], reasons: List[str]) -> None:
+    timing = _CURRENT_CHECK.get()
+    if timing is not None:
+        timing.escalations += 1
+        timing.escalated_to = model
+        timing.escalation_reasons = timing.escalation_reasons + reasons
+
+
+@contextmanager
+def measure_parse():
+    """Add the time spent in the block to the current check's parse time"""
+    timing = _CURRENT_CHECK.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.parse_ms += (time.perf_counter() - start) * 1000
+
+
+def _emf_line(
+    dimensions: Dict[str, str],
+    metrics,
+    values: Dict,
+    namespace: str,
+    properties: Optional[Dict] = None,
+) -> str:
+    emitted = [
+        (name, unit) for name, field, unit in metrics if values.get(field) is not None
+    ]
+    return json.dumps(
+        {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": [list(dimensions)],
+                        "Metrics": [
+                            {"Name": name, "Unit": unit} for name, unit in emitted
+                        ],
+                    }
+                ],
+            },
+            **dimensions,
+            **{
+                name: values[field]
+                for name, field, _ in metrics
+                if values.get(field) is not None
+            },
+            # Searchable in the logs, but not dimensions: no metric per value
+            **(properties or {}),
+        }
+    )
+
+
+def emf_lines(
+    timings: AnalysisTimings, status: str, namespace: str = EMF_NAMESPACE
+) -> List[str]:
+    """One EMF line per check plus one for the whole analysis.
+
+    Checks are dimensioned by category and model only, so chunked and
+    per-segment runs add to their category's metrics rather than creating one
+    metric per part; the part is kept as a property of the line.
+    """
+    lines = [
+        _emf_line(
+            {"Check": check.check, "Model": check.model},
+            CHECK_METRICS,
+            check.model_dump(),
+            namespace,
+            {"Part": check.part} if check.part is not None else None,
+        )
+        for check in timings.checks
+    ]
+    lines.append(
+        _emf_line({"Status": status}, ANALYSIS_METRICS, timings.totals(), namespace)
+    )
+    return lines
+
+
+def emit_emf(
+    timings: AnalysisTimings,
+    status: str,
+    namespace: str = EMF_NAMESPACE,
+    stream: Optional[TextIO] = None,
+) -> None:
+    stream = stream or sys.stdout
+    for line in emf_lines(timings, status, namespace):
+        stream.write(line + "\n")
+    stream.flush()
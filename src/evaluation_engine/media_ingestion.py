@@ -0,0 +1,347 @@
+"""Audio and video ingestion, with transcription pipelined into the analysis.
+
+Videos (and any audio ffmpeg reads) are turned into 16 kHz mono WAV first;
+WAV files are used as they are. The audio is cut into segments of
+segment_seconds at fixed boundaries, without overlap, which a Transcriber
+turns into text, up to max_parallel at once. A word spoken across a boundary
+can be cut in two and mistranscribed; chunks overlap by text, not by audio.
+Transcripts come out in order as soon as each segment and the ones before it
+are done, and are packed into chunks of at most chunk_seconds (or the
+analyzer's chunk length in characters).
+
+ScriptAnalyzer.analyze_transcript_stream runs the chunked checks (brand safety
+and avoided elements by default) on every chunk as it arrives, while later
+segments are still being transcribed, and the checks that need the whole
+script once the transcript is complete. Criteria that fail in a chunk carry
+its time range in their timestamps.
+
+Transcriber is the extension point: OpenAITranscriber sends segments to the
+OpenAI transcription API, and anything with an async transcribe(segment)
+returning its text can take its place (a local Whisper model, a stub in tests).
+
+    python src/evaluation_engine/media_ingestion.py review.mp4 --max-parallel 8
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from collections import deque
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.chunking import ChunkingPolicy, overlap_text
+
+WAV_SUFFIXES = (".wav",)
+
+
+class MediaPolicy(BaseModel):
+    # Length of the audio sent to the transcriber in one request, cut at fixed
+    # boundaries with no audio shared between segments
+    segment_seconds: float = 30.0
+    # Segments being transcribed at once
+    max_parallel: int = 4
+    # Longest stretch of audio analyzed as one chunk, the time range a finding
+    # is reported with
+    chunk_seconds: float = 60.0
+    # Sample rate audio is extracted at, what speech models expect
+    sample_rate: int = 16000
+
+
+class AudioSegment(BaseModel):
+    index: int
+    start_seconds: float
+    end_seconds: float
+    # The segment as a WAV file of its own
+    wav: bytes
+
+
+class TranscriptSegment(BaseModel):
+    index: int
+    start_seconds: float
+    end_seconds: float
+    text: str
+
+
+class TranscriptChunk(BaseModel):
+    index: int
+    start_seconds: float
+    end_seconds: float
+    # The chunk's own transcript, and the text checked: the same preceded by
+    # the end of the previous chunk
+    transcript: str
+    text: str
+
+
+class Transcriber:
+    """Turns one segment of audio into text"""
+
+    async def transcribe(self, segment: AudioSegment) -> str:
+        raise NotImplementedError
+
+
+class OpenAITranscriber(Transcriber):
+    """Transcription through the OpenAI audio API"""
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        model: str = "whisper-1",
+        base_url: Optional[str] = None,
+        language: Optional[str] = None,
+    ):
+        from openai import AsyncOpenAI
+
+        self.openai_client = AsyncOpenAI(api_key=openai_api_key, base_url=base_url)
+        self.model = model
+        self.language = language
+
+    async def transcribe(self, segment: AudioSegment) -> str:
+        options = {"language": self.language} if self.language else {}
+        transcript = await self.openai_client.audio.transcriptions.create(
+            model=self.model,
+            file=(f"segment-{segment.index}.wav", segment.wav),
+            response_format="text",
+            **options,
+        )
+        return transcript if isinstance(transcript, str) else transcript.text
+
+
+def extract_audio(path: str, output_path: str, sample_rate: int = 16000):
+    """Write the audio track of a video (or any media file) as mono WAV"""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("Extracting audio needs ffmpeg on the PATH")
+    process = subprocess.run(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-c:a",
+            "pcm_s16le",
+            output_path,
+        ],
+        capture_output=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg could not extract audio from {path}: "
+            + process.stderr.decode("utf-8", "replace").strip()
+        )
+
+
+def split_wav(path: str, segment_seconds: float = 30.0) -> Iterator[AudioSegment]:
+    """Cut a WAV file into back-to-back segments, read one at a time.
+
+    Cuts fall every segment_seconds whatever is being said, and no audio is
+    repeated across a cut, so the segments' time ranges add up to the file's.
+    """
+    with wave.open(path, "rb") as source:
+        params = source.getparams()
+        frames_per_segment = max(1, int(params.framerate * segment_seconds))
+        position = 0
+        index = 0
+        while True:
+            frames = source.readframes(frames_per_segment)
+            count = len(frames) // (params.sampwidth * params.nchannels)
+            if not count:
+                return
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as target:
+                target.setparams(params)
+                target.writeframes(frames)
+            yield AudioSegment(
+                index=index,
+                start_seconds=position / params.framerate,
+                end_seconds=(position + count) / params.framerate,
+                wav=buffer.getvalue(),
+            )
+            position += count
+            index += 1
+
+
+async def transcribe_segments(
+    segments: Iterable[AudioSegment],
+    transcriber: Transcriber,
+    max_parallel: int = 4,
+) -> AsyncIterator[TranscriptSegment]:
+    """Transcripts of the segments in order, up to max_parallel in flight"""
+    limit = asyncio.Semaphore(max_parallel)
+
+    async def transcribe(segment: AudioSegment) -> TranscriptSegment:
+        async with limit:
+            text = await transcriber.transcribe(segment)
+        return TranscriptSegment(
+            index=segment.index,
+            start_seconds=segment.start_seconds,
+            end_seconds=segment.end_seconds,
+            text=" ".join(text.split()),
+        )
+
+    # Started ahead of the one awaited, so a slow segment does not idle the rest
+    pending = deque()
+    segments = iter(segments)
+    try:
+        while True:
+            while len(pending) < 2 * max_parallel:
+                segment = next(segments, None)
+                if segment is None:
+                    break
+                pending.append(asyncio.ensure_future(transcribe(segment)))
+            if not pending:
+                return
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def chunk_transcript(
+    segments: AsyncIterator[TranscriptSegment],
+    chunk_seconds: float = 60.0,
+    chunking: Optional[ChunkingPolicy] = None,
+) -> AsyncIterator[TranscriptChunk]:
+    """Pack consecutive transcript segments into chunks, each yielded once full"""
+    chunking = chunking or ChunkingPolicy()
+    budget = max(1, chunking.max_chars - chunking.overlap_chars)
+    current: List[TranscriptSegment] = []
+    previous = ""
+    index = 0
+
+    def make_chunk() -> TranscriptChunk:
+        transcript = " ".join(segment.text for segment in current if segment.text)
+        overlap = overlap_text(previous, chunking.overlap_chars)
+        return TranscriptChunk(
+            index=index,
+            start_seconds=current[0].start_seconds,
+            end_seconds=current[-1].end_seconds,
+            transcript=transcript,
+            text=f"{overlap}\n\n{transcript}" if overlap else transcript,
+        )
+
+    async for segment in segments:
+        if current and (
+            segment.end_seconds - current[0].start_seconds > chunk_seconds
+            or sum(len(part.text) + 1 for part in current) + len(segment.text) > budget
+        ):
+            chunk = make_chunk()
+            yield chunk
+            previous = chunk.transcript
+            index += 1
+            current = []
+        current.append(segment)
+    if current:
+        yield make_chunk()
+
+
+async def analyze_media_stream(
+    analyzer,
+    path: str,
+    transcriber: Transcriber,
+    policy: Optional[MediaPolicy] = None,
+    brief_type: Optional[str] = None,
+) -> AsyncIterator[Dict]:
+    """Events of ScriptAnalyzer.analyze_transcript_stream for a media file"""
+    policy = policy or MediaPolicy()
+    with tempfile.TemporaryDirectory() as directory:
+        if path.lower().endswith(WAV_SUFFIXES):
+            audio_path = path
+        else:
+            audio_path = os.path.join(directory, "audio.wav")
+            await asyncio.to_thread(extract_audio, path, audio_path, policy.sample_rate)
+        transcripts = transcribe_segments(
+            split_wav(audio_path, policy.segment_seconds),
+            transcriber,
+            policy.max_parallel,
+        )
+        chunks = chunk_transcript(transcripts, policy.chunk_seconds, analyzer.chunking)
+        async for event in analyzer.analyze_transcript_stream(chunks, brief_type):
+            yield event
+
+
+async def analyze_media(
+    analyzer,
+    path: str,
+    transcriber: Transcriber,
+    policy: Optional[MediaPolicy] = None,
+    brief_type: Optional[str] = None,
+) -> Dict:
+    """Transcribe and analyze a media file, returning the complete analysis"""
+    async for event in analyze_media_stream(
+        analyzer, path, transcriber, policy, brief_type
+    ):
+        analysis = event
+    return analysis
+
+
+async def _main(args):
+    from src.evaluation_engine.environment import analyzer_options
+    from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+
+    options = analyzer_options()
+    analyzer = ScriptAnalyzer(**options)
+    transcriber = OpenAITranscriber(
+        options["openai_api_key"],
+        model=args.model,
+        language=args.language,
+    )
+    policy = MediaPolicy(
+        segment_seconds=args.segment_seconds,
+        max_parallel=args.max_parallel,
+        chunk_seconds=args.chunk_seconds,
+    )
+    async for event in analyze_media_stream(
+        analyzer, args.path, transcriber, policy, args.brief_type
+    ):
+        if "details" in event:
+            event = dict(
+                event,
+                details={
+                    category: [result.to_dict() for result in results]
+                    for category, results in event["details"].items()
+                },
+            )
+        elif "results" in event:
+            event = dict(
+                event, results=[result.to_dict() for result in event["results"]]
+            )
+        print(json.dumps(event), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="video or audio file (WAV is read directly)")
+    parser.add_argument("--brief-type", help="rulepack to check against")
+    parser.add_argument("--model", default="whisper-1", help="transcription model")
+    parser.add_argument("--language", help="spoken language, e.g. en")
+    parser.add_argument("--segment-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--max-parallel", type=int, default=4, help="segments transcribed at once"
+    )
+    parser.add_argument(
+        "--chunk-seconds",
+        type=float,
+        default=60.0,
+        help="longest stretch of audio checked as one chunk",
+    )
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Near-duplicate lookup of previously analyzed scripts.
+
+Creators often resubmit a script with a typo fixed or a sentence reworded,
+which misses the exact-hash analysis cache. NearDuplicateIndex keeps a MinHash
+signature of the word shingles of every analyzed script and finds an earlier
+script whose estimated Jaccard similarity is at least the threshold. LSH
+banding means a lookup only scores the scripts sharing a band with it.
+
+Signatures use one-permutation hashing: every shingle is hashed once into one
+of num_perm bins, and empty bins borrow from their neighbour. That keeps
+indexing cheap in pure Python. Entries can be persisted to SQLite; they are
+reloaded when the index is created.
+
+On a match the policy decides what happens:
+
+- "reuse" returns the earlier analysis as it is;
+- "rerun_affected" re-runs only the checks the edit could affect, reusing the
+  others. The local checks (brand safety and avoided elements) are re-run for
+  any edited paragraph. The whole-script checks are re-run only when added or
+  removed text mentions the brand or one of their rulepack keywords, or when
+  paragraphs were deleted. The text of removed paragraphs is not kept, so the
+  index stores which checks every paragraph mentions next to its hash.
+"""
+
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_cache import AnalysisCache, normalize_content
+from src.evaluation_engine.consolidated import CONSOLIDATED_SECTIONS
+
+REUSE = "reuse"
+RERUN_AFFECTED = "rerun_affected"
+POLICIES = (REUSE, RERUN_AFFECTED)
+# Checks judging each passage on its own, so any edit can change their answer
+LOCAL_CHECKS = ("brand safety", "avoided elements")
+
+_WORD = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_EMPTY_BIN = 0xFFFFFFFF
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def split_paragraphs(content: str) -> List[str]:
+    return [
+        paragraph.strip()
+        for paragraph in _PARAGRAPH_BREAK.split(normalize_content(content))
+        if paragraph.strip()
+    ]
+
+
+def paragraph_hash(paragraph: str) -> int:
+    """Hash of a paragraph that ignores case and spacing"""
+    return _hash64(" ".join(paragraph.lower().split()))
+
+
+def paragraph_mentions(paragraphs: List[str], rulepack) -> array:
+    """For every paragraph, one bit per check (in CONSOLIDATED_SECTIONS order)
+    set when the paragraph mentions that check's terms"""
+    return array(
+        "H",
+        [
+            sum(
+                1 << bit
+                for bit, check in enumerate(CONSOLIDATED_SECTIONS)
+                if rulepack.mentions(check, paragraph)
+            )
+            for paragraph in paragraphs
+        ],
+    )
+
+
+def minhash_signature(content: str, num_perm: int = 128, shingle_size: int = 5):
+    """One-permutation MinHash signature of the word shingles of content"""
+    words = _WORD.findall(content.lower())
+    bins = [_EMPTY_BIN] * num_perm
+    for start in range(max(1, len(words) - shingle_size + 1)):
+        value = _hash64(" ".join(words[start : start + shingle_size]))
+        slot = value % num_perm
+        value >>= 32
+        if value < bins[slot]:
+            bins[slot] = value
+
+    # Densify: an empty bin takes the next filled bin's value, offset by the
+    # distance so the copies do not all agree with each other
+    filled = [slot for slot, value in enumerate(bins) if value != _EMPTY_BIN]
+    if filled and len(filled) < num_perm:
+        for slot in range(num_perm):
+            if bins[slot] == _EMPTY_BIN:
+                distance = 1
+                while bins[(slot + distance) % num_perm] == _EMPTY_BIN:
+                    distance += 1
+                source = bins[(slot + distance) % num_perm]
+                bins[slot] = (source + distance * 0x9E3779B1) & 0xFFFFFFFE
+    return array("I", bins)
+
+
+class ScriptFingerprint:
+    """What the index stores about a script: its signature, paragraph hashes
+    and, given the rulepack, the checks every paragraph mentions"""
+
+    __slots__ = ("signature", "paragraphs", "paragraph_hashes", "mentions")
+
+    def __init__(self, content: str, num_perm: int, shingle_size: int, rulepack=None):
+        self.signature = minhash_signature(content, num_perm, shingle_size)
+        self.paragraphs = split_paragraphs(content)
+        self.paragraph_hashes = array(
+            "Q", [paragraph_hash(paragraph) for paragraph in self.paragraphs]
+        )
+        self.mentions = (
+            paragraph_mentions(self.paragraphs, rulepack)
+            if rulepack is not None
+            else None
+        )
+
+
+class NearDuplicateMatch(BaseModel):
+    # Cache key of the earlier analysis
+    key: str
+    similarity: float
+    policy: str
+    analysis: Dict
+    # Categories to run again; all other categories reuse the earlier results
+    rerun: List[str] = []
+
+    def reused(self) -> Dict[str, List]:
+        """Results of the earlier analysis that still hold, by category"""
+        return {
+            category: results
+            for category, results in self.analysis["details"].items()
+            if category in CONSOLIDATED_SECTIONS and category not in self.rerun
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "similarity": round(self.similarity, 3),
+            "policy": self.policy,
+            "reused_checks": list(self.reused()),
+            "source": self.key[:16],
+        }
+
+
+def affected_checks(
+    previous_hashes,
+    previous_mentions,
+    paragraphs: List[str],
+    paragraph_hashes,
+    rulepack,
+) -> List[str]:
+    """Checks whose answer the edit between two revisions could change.
+
+    previous_mentions holds the paragraph_mentions of the previous revision,
+    None when they were not kept.
+    """
+    previous = set(previous_hashes)
+    current = set(paragraph_hashes)
+    added = [
+        paragraph
+        for paragraph, digest in zip(paragraphs, paragraph_hashes)
+        if digest not in previous
+    ]
+    removed = previous - current
+    if not added and not removed:
+        return []
+    if len(removed) > len(added) or (removed and previous_mentions is None):
+        # Paragraphs were deleted outright, or we cannot tell what they said
+        return list(CONSOLIDATED_SECTIONS)
+
+    # Checks whose terms the removed paragraphs mentioned
+    removed_mentions = 0
+    for digest, mentions in zip(previous_hashes, previous_mentions or []):
+        if digest in removed:
+            removed_mentions |= mentions
+
+    affected = []
+    for bit, check in enumerate(CONSOLIDATED_SECTIONS):
+        if (
+            check in LOCAL_CHECKS
+            or removed_mentions & (1 << bit)
+            or any(rulepack.mentions(check, paragraph) for paragraph in added)
+        ):
+            affected.append(check)
+    return affected
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index over the scripts analyzed so far"""
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        policy: str = RERUN_AFFECTED,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        sqlite_path: Optional[str] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.policy = policy
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.sqlite_path = sqlite_path
+
+        self._keys: List[str] = []
+        self._signatures: List[array] = []
+        self._paragraphs: List[array] = []
+        # Checks mentioned by every paragraph, None for entries written without
+        self._mentions: List[Optional[array]] = []
+        self._by_key: Dict[str, int] = {}
+        self._namespaces: Dict[str, int] = {}
+        # One table per band: band hash -> entry id, or a list of them
+        self._buckets: List[Dict[int, object]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.checks_reused = 0
+
+        if sqlite_path:
+            with self._connect() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS near_duplicates ("
+                    "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, "
+                    "signature BLOB NOT NULL, paragraphs BLOB NOT NULL, "
+                    "created_at REAL NOT NULL, mentions BLOB)"
+                )
+                columns = {
+                    row[1]
+                    for row in connection.execute("PRAGMA table_info(near_duplicates)")
+                }
+                if "mentions" not in columns:
+                    # Tables written before mentions were kept
+                    connection.execute(
+                        "ALTER TABLE near_duplicates ADD COLUMN mentions BLOB"
+                    )
+                rows = connection.execute(
+                    "SELECT key, namespace, signature, paragraphs, mentions "
+                    "FROM near_duplicates ORDER BY created_at"
+                ).fetchall()
+            for key, namespace, signature, paragraphs, mentions in rows:
+                self._insert(
+                    key,
+                    namespace,
+                    array("I", signature),
+                    array("Q", paragraphs),
+                    array("H", mentions) if mentions is not None else None,
+                )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.sqlite_path, timeout=5.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def fingerprint(self, content: str, rulepack=None) -> ScriptFingerprint:
+        return ScriptFingerprint(content, self.num_perm, self.shingle_size, rulepack)
+
+    def _band_hashes(self, namespace_id: int, signature: array) -> List[int]:
+        rows = self.rows
+        return [
+            hash((namespace_id, signature[band * rows : (band + 1) * rows].tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def _insert(self, key: str, namespace: str, signature, paragraphs, mentions):
+        if len(signature) != self.num_perm:
+            # Written by an index with other settings
+            return
+        namespace_id = self._namespaces.setdefault(namespace, len(self._namespaces))
+        entry = len(self._keys)
+        self._keys.append(key)
+        self._signatures.append(signature)
+        self._paragraphs.append(paragraphs)
+        self._mentions.append(mentions)
+        self._by_key[key] = entry
+        for table, band_hash in zip(
+            self._buckets, self._band_hashes(namespace_id, signature)
+        ):
+            bucket = table.get(band_hash)
+            if bucket is None:
+                table[band_hash] = entry
+            elif isinstance(bucket, list):
+                bucket.append(entry)
+            else:
+                table[band_hash] = [bucket, entry]
+
+    def add(self, fingerprint: ScriptFingerprint, namespace: str, key: str):
+        """Index an analyzed script under the cache key of its analysis"""
+        with self._lock:
+            if key in self._by_key:
+                return
+            self._insert(
+                key,
+                namespace,
+                fingerprint.signature,
+                fingerprint.paragraph_hashes,
+                fingerprint.mentions,
+            )
+        if self.sqlite_path:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR IGNORE INTO near_duplicates "
+                    "(key, namespace, signature, paragraphs, created_at, mentions) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        namespace,
+                        fingerprint.signature.tobytes(),
+                        fingerprint.paragraph_hashes.tobytes(),
+                        time.time(),
+                        (
+                            fingerprint.mentions.tobytes()
+                            if fingerprint.mentions is not None
+                            else None
+                        ),
+                    ),
+                )
+
+    def candidates(
+        self, fingerprint: ScriptFingerprint, namespace: str
+    ) -> List[Tuple[float, int]]:
+        """(estimated similarity, entry id) of entries above the threshold, best first"""
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None:
+            return []
+        entries = set()
+        for table, band_hash in zip(
+            self._buckets, self._band_hashes(namespace_id, fingerprint.signature)
+        ):
+            bucket = table.get(band_hash)
+            if bucket is None:
+                continue
+            if isinstance(bucket, list):
+                entries.update(bucket)
+            else:
+                entries.add(bucket)
+
+        signature = fingerprint.signature
+        scored = []
+        for entry in entries:
+            same = sum(
+                1
+                for ours, theirs in zip(signature, self._signatures[entry])
+                if ours == theirs
+            )
+            similarity = same / self.num_perm
+            if similarity >= self.threshold:
+                scored.append((similarity, entry))
+        scored.sort(reverse=True)
+        return scored
+
+    def find(
+        self,
+        fingerprint: ScriptFingerprint,
+        namespace: str,
+        cache: AnalysisCache,
+        rulepack,
+    ) -> Optional[NearDuplicateMatch]:
+        """Best earlier analysis of a similar script still held by the cache"""
+        self.lookups += 1
+        for similarity, entry in self.candidates(fingerprint, namespace):
+            # Probing is not a lookup of this script, so the cache stats ignore it
+            analysis = cache.peek(self._keys[entry])
+            if analysis is None:
+                continue
+            rerun = []
+            if self.policy == RERUN_AFFECTED:
+                rerun = affected_checks(
+                    self._paragraphs[entry],
+                    self._mentions[entry],
+                    fingerprint.paragraphs,
+                    fingerprint.paragraph_hashes,
+                    rulepack,
+                )
+            self.matches += 1
+            self.checks_reused += len(CONSOLIDATED_SECTIONS) - len(rerun)
+            return NearDuplicateMatch(
+                key=self._keys[entry],
+                similarity=similarity,
+                policy=self.policy,
+                analysis=analysis,
+                rerun=rerun,
+            )
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._keys),
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "checks_reused": self.checks_reused,
+        }
@@ -0,0 +1,169 @@
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+
+PRESCREEN_CATEGORY = "prescreen"
+
+
+class PrescreenTerms(BaseModel):
+    # Name of the criterion in the results
+    name: str
+    terms: List[str]
+    severity: Optional[str] = None
+    suggestion: str
+    # Reported when a required criterion finds none of its terms
+    feedback: Optional[str] = None
+
+
+class PrescreenRules(BaseModel):
+    """The [prescreen] table of a rulepack"""
+
+    # Terms that make a script unusable for the brand regardless of context,
+    # by brand safety category
+    reject: Dict[str, List[str]] = {}
+    # Criteria that fail when the script mentions any of their terms
+    avoid: List[PrescreenTerms] = []
+    # Criteria that fail when the script mentions none of their terms
+    require: List[PrescreenTerms] = []
+
+
+class Match(NamedTuple):
+    group: str
+    term: str
+    start: int
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Compile terms into a trie-shaped regex so shared prefixes are tried once"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [
+            re.escape(char) + emit(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if "" in node else pattern
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Multi-pattern matcher that finds every term of every group in one scan"""
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self._groups: Dict[str, str] = {}
+        for group, terms in groups.items():
+            for term in terms:
+                self._groups[term.lower()] = group
+        self._pattern = re.compile(
+            r"(?<![\w-])" + _trie_pattern(self._groups) + r"(?![\w-])"
+        )
+
+    def find_all(self, text: str) -> List[Match]:
+        return [
+            Match(self._groups[found.group()], found.group(), found.start())
+            for found in self._pattern.finditer(text.lower())
+        ]
+
+
+class PrescreenLexicon:
+    """A rulepack's prescreen terms, compiled into one matcher"""
+
+    def __init__(self, rules: PrescreenRules):
+        self.rules = rules
+        groups: Dict[str, List[str]] = {}
+        for category, terms in rules.reject.items():
+            groups[f"reject:{category}"] = terms
+        for rule in rules.avoid:
+            groups[f"avoid:{rule.name}"] = rule.terms
+        for rule in rules.require:
+            groups[f"require:{rule.name}"] = rule.terms
+        groups = {group: terms for group, terms in groups.items() if terms}
+        self.matcher = KeywordMatcher(groups) if groups else None
+
+    def find(self, content: str) -> Dict[str, List[str]]:
+        """Terms found in the content by group"""
+        found: Dict[str, List[str]] = {}
+        if self.matcher is not None:
+            for match in self.matcher.find_all(content):
+                found.setdefault(match.group, []).append(match.term)
+        return found
+
+
+class PrescreenPolicy(BaseModel):
+    # Reject without calling the model when a hard brand safety term is found
+    reject_on_hard_hit: bool = True
+    # Checks still sent to the model after a hard hit, e.g. to give full feedback
+    checks_after_hard_hit: List[str] = []
+
+
+class PrescreenReport(BaseModel):
+    results: List[AnalysisResult]
+    hard_hit: bool
+
+
+def _quote(terms: List[str]) -> str:
+    return ", ".join(f"'{term}'" for term in sorted(set(terms)))
+
+
+def prescreen_script(content: str, lexicon: PrescreenLexicon) -> PrescreenReport:
+    """Run a rulepack's lexicon over the raw script before any model call"""
+    found = lexicon.find(content)
+
+    results = []
+    hard_hit = False
+    for category in lexicon.rules.reject:
+        terms = found.get(f"reject:{category}")
+        if terms:
+            hard_hit = True
+            results.append(
+                AnalysisResult(
+                    criteria=f"{category} (lexicon)",
+                    passed=False,
+                    feedback=f"Script contains {_quote(terms)}",
+                    suggestions=["Remove or rephrase the flagged wording"],
+                    severity="high",
+                )
+            )
+
+    for rule in lexicon.rules.avoid:
+        terms = found.get(f"avoid:{rule.name}")
+        if terms:
+            results.append(
+                AnalysisResult(
+                    criteria=rule.name,
+                    passed=False,
+                    feedback=f"Script mentions {_quote(terms)}",
+                    suggestions=[rule.suggestion],
+                    severity=rule.severity,
+                )
+            )
+
+    for rule in lexicon.rules.require:
+        if f"require:{rule.name}" not in found:
+            results.append(
+                AnalysisResult(
+                    criteria=rule.name,
+                    passed=False,
+                    feedback=rule.feedback
+                    or f"None of {_quote(rule.terms)} found in the script",
+                    suggestions=[rule.suggestion],
+                    severity=rule.severity,
+                )
+            )
+
+    return PrescreenReport(results=results, hard_hit=hard_hit)
@@ -0,0 +1,66 @@
+"""Versioned prompt templates for the analysis checks.
+
+Every request is laid out static-first: a system message holding the check's
+fixed instructions, worded as the original prompt builders had them, then a
+user message holding only the script. Providers that cache prompt prefixes
+(OpenAI caches prefixes of 1024 tokens and more) can then reuse everything
+before the script across scripts.
+
+The templates themselves come from the brand's rulepack (see rulepacks.py).
+A PromptSet renders their static part once, and its version changes whenever
+any template text or version changes, so caches and stored results keyed on it
+never mix answers from different prompts.
+"""
+
+import hashlib
+import sys
+from typing import Dict, List
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+# Bump when the prompts change in a way that should be tracked by name
+PROMPT_SET_VERSION = "3"
+
+
+class PromptTemplate(BaseModel):
+    name: str
+    version: int
+    # Fixed per-check instructions, sent before the script
+    instructions: str
+
+    def fingerprint(self) -> str:
+        return hashlib.sha256(
+            f"{self.name}\x00{self.version}\x00{self.instructions}".encode("utf-8")
+        ).hexdigest()
+
+
+class PromptSet:
+    """The templates of one rulepack with their static parts rendered once"""
+
+    def __init__(self, templates: Dict[str, PromptTemplate]):
+        self.templates = templates
+        self._static = {
+            name: template.instructions for name, template in templates.items()
+        }
+        self.version = f"{PROMPT_SET_VERSION}-{self._fingerprint()}"
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for name in sorted(self.templates):
+            digest.update(self.templates[name].fingerprint().encode("utf-8"))
+        return digest.hexdigest()[:10]
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    def static_prefix(self, name: str) -> str:
+        """System message for a check: its fixed instructions"""
+        return self._static[name]
+
+    def render(self, name: str, content: str) -> List[Dict[str, str]]:
+        """Chat messages for one check, with the script last"""
+        return [
+            {"role": "system", "content": self._static[name]},
+            {"role": "user", "content": f"Script:\n{content}"},
+        ]
@@ -0,0 +1,373 @@
+"""Retries, hedged requests and a circuit breaker around model requests.
+
+Resilience.call / call_async wrap a single request (a function taking the
+seconds left before the deadline, to use as its timeout, and returning the
+completion):
+
+- retryable failures (connection errors, timeouts, 408/409/429/5xx) are
+  retried with full-jitter exponential backoff, honouring Retry-After, within
+  the policy's attempt limit and overall deadline; every attempt is also cut
+  short when the deadline passes
+- once enough latencies have been seen, an attempt that is slower than the
+  configured percentile gets a duplicate (hedged) request, and whichever
+  response arrives first is used
+- consecutive upstream failures open a circuit breaker, after which calls fail
+  immediately with CircuitOpenError until a single probe request succeeds
+
+One Resilience instance is meant to be shared by every check of an analyzer,
+so its latency statistics and breaker state cover all of them.
+"""
+
+import asyncio
+import contextvars
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.instrumentation import record_hedge, record_retry
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Threads available for hedged requests of the sync client
+_HEDGE_WORKERS = 32
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while the circuit breaker is open"""
+
+
+class ResiliencePolicy(BaseModel):
+    max_attempts: int = 4
+    # Backoff before retry n is uniform in [0, min(max_delay, base_delay * 2**n)]
+    base_delay: float = 0.25
+    max_delay: float = 8.0
+    # Seconds a call may spend in total, including attempts and the backoff
+    # between them
+    deadline: float = 60.0
+    # Hedge an attempt that outlives this latency percentile (None disables)
+    hedge_percentile: Optional[float] = 0.95
+    # Latencies needed before hedging starts, and the earliest hedge
+    hedge_min_samples: int = 20
+    hedge_min_delay: float = 1.0
+    # Consecutive failed attempts that open the breaker, and how long it stays open
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def is_retryable(error: BaseException) -> bool:
+    # Imported here so loading this module does not pay for the SDK import
+    from openai import APIConnectionError
+
+    if isinstance(error, (APIConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the upstream asked us to wait, if it said so"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class LatencyTracker:
+    """Sliding window of recent request latencies"""
+
+    def __init__(self, window: int = 256):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - self.clock()
+            if self.state == self.OPEN and remaining <= 0:
+                # Let a single probe through to see whether the upstream is back
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(
+                "OpenAI requests are failing, not retrying for "
+                f"{max(0.0, remaining):.0f}s"
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """Let another probe through when this one ended without an answer"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+
+class Resilience:
+    def __init__(self, policy: Optional[ResiliencePolicy] = None):
+        self.policy = policy or ResiliencePolicy()
+        self.breaker = CircuitBreaker(
+            self.policy.failure_threshold, self.policy.reset_timeout
+        )
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "breaker": self.breaker.state,
+            "p50_seconds": self.latency.percentile(0.5),
+            "hedge_after_seconds": self.hedge_delay(),
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        policy = self.policy
+        if policy.hedge_percentile is None:
+            return None
+        if len(self.latency) < policy.hedge_min_samples:
+            return None
+        return max(
+            policy.hedge_min_delay, self.latency.percentile(policy.hedge_percentile)
+        )
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        ceiling = min(self.policy.max_delay, self.policy.base_delay * 2**attempt)
+        delay = random.uniform(0, ceiling)
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, min(requested, self.policy.max_delay))
+        return delay
+
+    def _before_attempt(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            with self._lock:
+                self.short_circuited += 1
+            raise
+
+    def _after_failure(self, attempt: int, error: BaseException, deadline: float):
+        """Backoff before the next attempt, or re-raise when giving up"""
+        if not is_retryable(error):
+            # The upstream answered (e.g. 400), so it is healthy
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+        if attempt + 1 >= self.policy.max_attempts:
+            raise error
+        delay = self.backoff(attempt, error)
+        if time.monotonic() + delay > deadline:
+            raise error
+        with self._lock:
+            self.retries += 1
+        record_retry()
+        return delay
+
+    def _hedged(self):
+        with self._lock:
+            self.hedges += 1
+        record_hedge()
+
+    async def call_async(self, request: Callable[[float], Awaitable[T]]) -> T:
+        with self._lock:
+            self.calls += 1
+        deadline = time.monotonic() + self.policy.deadline
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                result = await asyncio.wait_for(
+                    self._attempt_async(request, deadline),
+                    timeout=max(0.0, deadline - time.monotonic()),
+                )
+            except Exception as e:
+                delay = self._after_failure(attempt, e, deadline)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled mid-attempt: a half-open probe never reported back
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _attempt_async(
+        self, request: Callable[[float], Awaitable[T]], deadline: float
+    ) -> T:
+        start = time.perf_counter()
+        hedge_after = self.hedge_delay()
+        tasks = [asyncio.ensure_future(request(max(0.0, deadline - time.monotonic())))]
+        try:
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self._hedged()
+                    tasks.append(
+                        asyncio.ensure_future(
+                            request(max(0.0, deadline - time.monotonic()))
+                        )
+                    )
+
+            # First successful response wins; fail only when every request failed
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        self.latency.record(time.perf_counter() - start)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def call(self, request: Callable[[float], T]) -> T:
+        """Sync counterpart of call_async; a sync request cannot be interrupted,
+        so it has to honour the timeout it is given to stay within the deadline"""
+        with self._lock:
+            self.calls += 1
+        deadline = time.monotonic() + self.policy.deadline
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                result = self._attempt(request, deadline)
+            except Exception as e:
+                delay = self._after_failure(attempt, e, deadline)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def _attempt(self, request: Callable[[float], T], deadline: float) -> T:
+        start = time.perf_counter()
+        hedge_after = self.hedge_delay()
+        remaining = max(0.0, deadline - time.monotonic())
+        if hedge_after is None:
+            result = request(remaining)
+            self.latency.record(time.perf_counter() - start)
+            return result
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=_HEDGE_WORKERS)
+        # Copy the context so the requests are recorded against the current check
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, request, remaining)
+        ]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            self._hedged()
+            futures.append(
+                self._executor.submit(
+                    contextvars.copy_context().run,
+                    request,
+                    max(0.0, deadline - time.monotonic()),
+                )
+            )
+
+        # A sync request cannot be cancelled, a losing one finishes in the background
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                raise TimeoutError(f"No response within {self.policy.deadline}s")
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    self.latency.record(time.perf_counter() - start)
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,536 @@
+"""Append-only columnar store of every verdict, with pass-rate rollups.
+
+Each AnalysisResult becomes one row. The row's dimensions are dictionary
+encoded (category, criterion, creator, brand and severity are small integer
+codes into per-store lists of strings) and kept with the timestamp in
+array-backed columns; the passed flags are bit-packed. A row costs about 14
+bytes, and the rollups only read these columns. Feedback and suggestions are
+held separately (a list, or a JSON lines file with an offset index) and read
+per row.
+
+A store with a directory appends its columns to files on flush():
+
+    <directory>/part-<id>/<column>.bin   raw columns, native byte order
+    <directory>/part-<id>/passed.bits    passed flags, 8 rows per byte
+    <directory>/part-<id>/feedback.jsonl and feedback.idx
+    <directory>/part-<id>/dictionaries.json
+
+Every writer appends to a part of its own, so several processes can share a
+directory, and load_results() reads all the parts back into one table.
+
+The rollups group with NumPy (np.bincount over combined codes) when it is
+installed (pip install numpy), and fall back to plain Python loops otherwise.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Set
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.consolidated import CONSOLIDATED_SECTIONS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Dictionary-encoded dimensions and the array typecode of their codes
+DIMENSIONS = {
+    "category": "B",
+    "criterion": "H",
+    "creator": "I",
+    "brand": "H",
+    "severity": "B",
+}
+COLUMNS = dict(DIMENSIONS, timestamp="I")
+# Rollup dimension of the time bucket a row falls in
+TIME = "time"
+# Grouped with np.bincount up to this many groups per row, np.unique beyond
+_BINCOUNT_GROUPS_PER_ROW = 4
+
+
+class _Dictionary:
+    """Strings of a dimension and their codes, in order of first appearance"""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values: Sequence[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def normalize_creator(creator_name: str) -> str:
+    return " ".join(creator_name.lower().split())
+
+
+def replayed_categories(analysis: Dict) -> Set[str]:
+    """Categories whose results repeat verdicts of an earlier analysis: all of
+    them when it came from the cache, from an identical request in flight
+    (whose leader records it) or from an earlier near-duplicate as it was,
+    otherwise the checks reused from a near-duplicate or previous revision"""
+    if analysis.get("coalesced") or (analysis.get("timings") or {}).get("cache_hit"):
+        return set(analysis["details"])
+    replayed = set()
+    for reuse in ("near_duplicate", "revision"):
+        replayed.update((analysis.get(reuse) or {}).get("reused_checks", []))
+    if replayed >= set(CONSOLIDATED_SECTIONS):
+        return set(analysis["details"])
+    return replayed
+
+
+def _dictionaries() -> Dict[str, _Dictionary]:
+    dictionaries = {dimension: _Dictionary() for dimension in DIMENSIONS}
+    # Code 0 is "no severity"
+    dictionaries["severity"].encode("")
+    return dictionaries
+
+
+class ResultsTable:
+    """Rows of one or more stores, queried with the rollups"""
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence[int]],
+        passed: Sequence[bool],
+        dictionaries: Dict[str, List[str]],
+        feedback=None,
+    ):
+        self.rows = len(columns["timestamp"])
+        self.dictionaries = dictionaries
+        self._codes = {
+            dimension: {value: code for code, value in enumerate(values)}
+            for dimension, values in dictionaries.items()
+        }
+        if np is not None:
+            columns = {
+                name: np.asarray(values, dtype=COLUMNS[name])
+                for name, values in columns.items()
+            }
+            passed = np.asarray(passed, dtype=bool)
+        self.columns = columns
+        self.passed = passed
+        # Callable reading the feedback of a row
+        self._feedback = feedback
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def feedback(self, row: int) -> Dict:
+        """Feedback and suggestions of a row"""
+        if self._feedback is None:
+            raise LookupError("This table was built without its feedback")
+        return self._feedback(row)
+
+    def pass_rates(
+        self,
+        by: Sequence[str] = ("criterion",),
+        creator: Optional[str] = None,
+        brand: Optional[str] = None,
+        category: Optional[str] = None,
+        criterion: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        bucket_seconds: int = 86400,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Results, passes and pass rate per group, lowest pass rate first.
+
+        by takes any of the dimensions and "time" (buckets of bucket_seconds,
+        labelled with their start). The other arguments keep only the rows of
+        one creator, brand, category or criterion, and of [since, until).
+        """
+        for dimension in by:
+            if dimension not in DIMENSIONS and dimension != TIME:
+                raise ValueError(f"Unknown rollup dimension {dimension!r}")
+        filters = {}
+        for dimension, value in (
+            ("creator", creator),
+            ("brand", brand),
+            ("category", category),
+            ("criterion", criterion),
+        ):
+            if value is not None:
+                if dimension == "creator":
+                    value = normalize_creator(value)
+                code = self._codes[dimension].get(value)
+                if code is None:
+                    return []
+                filters[dimension] = code
+        rollup = self._rollup_numpy if np is not None else self._rollup_python
+        labels, results, passes = rollup(
+            by, filters, since, until, bucket_seconds, limit
+        )
+        rows = []
+        for index, total in enumerate(results):
+            row = {}
+            for dimension, codes in zip(by, labels):
+                code = codes[index]
+                row[dimension] = (
+                    code if dimension == TIME else self.dictionaries[dimension][code]
+                )
+            row.update(
+                results=total, passed=passes[index], pass_rate=passes[index] / total
+            )
+            rows.append(row)
+        return rows
+
+    def _rollup_numpy(self, by, filters, since, until, bucket_seconds, limit):
+        columns = self.columns
+        mask = None
+        for dimension, code in filters.items():
+            selected = columns[dimension] == code
+            mask = selected if mask is None else mask & selected
+        timestamps = columns["timestamp"]
+        if since is not None:
+            selected = timestamps >= since
+            mask = selected if mask is None else mask & selected
+        if until is not None:
+            selected = timestamps < until
+            mask = selected if mask is None else mask & selected
+
+        def column(name):
+            return columns[name] if mask is None else columns[name][mask]
+
+        passed = self.passed if mask is None else self.passed[mask]
+        if not len(passed):
+            return [[] for _ in by], [], []
+        key = None
+        sizes, first = [], 0
+        for dimension in by:
+            if dimension == TIME:
+                buckets = column("timestamp") // bucket_seconds
+                first = int(buckets.min())
+                codes, size = buckets - first, int(buckets.max()) - first + 1
+            else:
+                codes, size = column(dimension), len(self.dictionaries[dimension])
+            key = codes.astype(np.int64) if key is None else key * size + codes
+            sizes.append(size)
+        if key is None:
+            # No dimension, one group of every row
+            key = np.zeros(len(passed), dtype=np.int64)
+
+        groups = 1
+        for size in sizes:
+            groups *= size
+        if groups <= _BINCOUNT_GROUPS_PER_ROW * len(key):
+            results = np.bincount(key, minlength=groups)
+            passes = np.bincount(key, weights=passed, minlength=groups)
+            keys = np.flatnonzero(results)
+            results, passes = results[keys], passes[keys]
+        else:
+            keys, inverse = np.unique(key, return_inverse=True)
+            results = np.bincount(inverse)
+            passes = np.bincount(inverse, weights=passed)
+
+        # Lowest pass rate first, then the most results; only the groups kept
+        # are turned into Python objects
+        order = np.lexsort((-results, passes / results))[:limit]
+        keys, results, passes = keys[order], results[order], passes[order]
+        labels = []
+        for dimension, codes in zip(by, np.unravel_index(keys, sizes) if by else ()):
+            if dimension == TIME:
+                codes = (codes + first) * bucket_seconds
+            labels.append(codes.tolist())
+        return labels, results.tolist(), passes.astype(np.int64).tolist()
+
+    def _rollup_python(self, by, filters, since, until, bucket_seconds, limit):
+        columns = self.columns
+        results, passes = Counter(), Counter()
+        for row in range(self.rows):
+            timestamp = columns["timestamp"][row]
+            if (since is not None and timestamp < since) or (
+                until is not None and timestamp >= until
+            ):
+                continue
+            if any(columns[name][row] != code for name, code in filters.items()):
+                continue
+            key = tuple(
+                (
+                    timestamp // bucket_seconds * bucket_seconds
+                    if dimension == TIME
+                    else columns[dimension][row]
+                )
+                for dimension in by
+            )
+            results[key] += 1
+            passes[key] += bool(self.passed[row])
+        keys = sorted(
+            results, key=lambda key: (passes[key] / results[key], -results[key])
+        )
+        keys = keys[:limit]
+        labels = [[key[index] for key in keys] for index in range(len(by))]
+        return labels, [results[key] for key in keys], [passes[key] for key in keys]
+
+
+class ResultsStore:
+    """Appends analysis verdicts as rows, in memory or to a directory part"""
+
+    def __init__(self, directory: Optional[str] = None, flush_rows: int = 1000):
+        self.directory = directory
+        # Rows appended before the store writes them out on its own
+        self.flush_rows = flush_rows
+        self._lock = threading.Lock()
+        self._dictionaries = _dictionaries()
+        self._columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self._passed = bytearray()
+        self.rows = 0
+        self._flushed = 0
+        self._flushed_values = {dimension: 0 for dimension in DIMENSIONS}
+        # Feedback of rows not written out yet (all rows without a directory)
+        self._feedback: List[str] = []
+        self.part = None
+        if directory:
+            self.part = os.path.join(directory, f"part-{uuid.uuid4().hex[:12]}")
+            os.makedirs(self.part)
+
+    def append(
+        self,
+        analysis: Dict,
+        creator_name: str,
+        brand: str,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        """Add the results of an analysis, returns the number of rows added.
+
+        Results replayed from an earlier analysis were counted when it was
+        appended, and are skipped.
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        creator_name = normalize_creator(creator_name)
+        replayed = replayed_categories(analysis)
+        with self._lock:
+            added = 0
+            for category, results in analysis["details"].items():
+                if category in replayed:
+                    continue
+                for result in results:
+                    # Failed checks are not verdicts
+                    if result.criteria != "error":
+                        self._append(result, category, creator_name, brand, timestamp)
+                        added += 1
+            if self.directory and self.rows - self._flushed >= self.flush_rows:
+                self._flush()
+            return added
+
+    def _append(
+        self,
+        result: AnalysisResult,
+        category: str,
+        creator_name: str,
+        brand: str,
+        timestamp: int,
+    ):
+        dictionaries, columns = self._dictionaries, self._columns
+        for dimension, value in (
+            ("category", category),
+            ("criterion", result.criteria),
+            ("creator", creator_name),
+            ("brand", brand),
+            ("severity", result.severity or ""),
+        ):
+            columns[dimension].append(dictionaries[dimension].encode(value))
+        columns["timestamp"].append(timestamp)
+        if self.rows % 8 == 0:
+            self._passed.append(0)
+        if result.passed:
+            self._passed[-1] |= 1 << (self.rows % 8)
+        self._feedback.append(
+            json.dumps({"feedback": result.feedback, "suggestions": result.suggestions})
+        )
+        self.rows += 1
+
+    def flush(self):
+        """Write the rows appended since the last flush to the store's part"""
+        if self.directory:
+            with self._lock:
+                self._flush()
+
+    def _flush(self):
+        if self.rows == self._flushed:
+            return
+        start = self._flushed
+        # Feedback first and the timestamps last: a torn flush leaves rows that
+        # load_results() ignores, never rows without their feedback
+        feedback_path = os.path.join(self.part, "feedback.jsonl")
+        offset = os.path.getsize(feedback_path) if start else 0
+        offsets = array("Q")
+        with open(feedback_path, "ab") as handle:
+            for line in self._feedback:
+                offsets.append(offset)
+                encoded = line.encode("utf-8") + b"\n"
+                handle.write(encoded)
+                offset += len(encoded)
+        self._append_file("feedback.idx", offsets)
+        if any(
+            len(self._dictionaries[dimension].values) != flushed
+            for dimension, flushed in self._flushed_values.items()
+        ):
+            path = os.path.join(self.part, "dictionaries.json")
+            with open(path + ".tmp", "w") as handle:
+                json.dump(
+                    {
+                        dimension: dictionary.values
+                        for dimension, dictionary in self._dictionaries.items()
+                    },
+                    handle,
+                )
+            os.replace(path + ".tmp", path)
+            for dimension, dictionary in self._dictionaries.items():
+                self._flushed_values[dimension] = len(dictionary.values)
+        # The last byte of the flags may have been half full
+        with open(os.path.join(self.part, "passed.bits"), "ab+") as handle:
+            handle.truncate(start // 8)
+            handle.write(self._passed[start // 8 :])
+        for name in DIMENSIONS:
+            self._append_file(f"{name}.bin", self._columns[name][start:])
+        self._append_file("timestamp.bin", self._columns["timestamp"][start:])
+        self._feedback = []
+        self._flushed = self.rows
+
+    def _append_file(self, name: str, values: array):
+        with open(os.path.join(self.part, name), "ab") as handle:
+            values.tofile(handle)
+
+    def table(self) -> ResultsTable:
+        """Snapshot of the rows appended so far"""
+        with self._lock:
+            rows = self.rows
+            columns = {name: column[:rows] for name, column in self._columns.items()}
+            passed = _unpack(bytes(self._passed), rows)
+            dictionaries = {
+                dimension: list(dictionary.values)
+                for dimension, dictionary in self._dictionaries.items()
+            }
+            if self.directory:
+                self._flush()
+                feedback = _FeedbackFile(self.part)
+            else:
+                lines = list(self._feedback)
+
+                def feedback(row: int) -> Dict:
+                    return json.loads(lines[row])
+
+        return ResultsTable(columns, passed, dictionaries, feedback)
+
+
+class _FeedbackFile:
+    """Reads rows' feedback through a part's offset index"""
+
+    def __init__(self, part: str):
+        self.part = part
+        self._offsets = None
+
+    def __call__(self, row: int) -> Dict:
+        if self._offsets is None:
+            self._offsets = _read_column(os.path.join(self.part, "feedback.idx"), "Q")
+        with open(os.path.join(self.part, "feedback.jsonl"), "rb") as handle:
+            handle.seek(self._offsets[row])
+            return json.loads(handle.readline())
+
+
+def _unpack(bits: bytes, rows: int) -> Sequence[bool]:
+    if np is not None:
+        return np.unpackbits(
+            np.frombuffer(bits, dtype=np.uint8), count=rows, bitorder="little"
+        ).astype(bool)
+    return [bool(bits[row // 8] >> (row % 8) & 1) for row in range(rows)]
+
+
+def _read_column(path: str, typecode: str) -> Sequence[int]:
+    if np is not None:
+        return np.fromfile(path, dtype=typecode)
+    values = array(typecode)
+    with open(path, "rb") as handle:
+        data = handle.read()
+    values.frombytes(data[: len(data) - len(data) % values.itemsize])
+    return values
+
+
+def load_results(directory: str) -> ResultsTable:
+    """Every part of a store directory as one table"""
+    dictionaries = _dictionaries()
+    columns = {name: [] for name in COLUMNS}
+    passed, parts = [], []
+    start = 0
+    for name in sorted(os.listdir(directory)):
+        part = os.path.join(directory, name)
+        if not name.startswith("part-") or not os.path.exists(
+            os.path.join(part, "dictionaries.json")
+        ):
+            continue
+        with open(os.path.join(part, "dictionaries.json")) as handle:
+            values = json.load(handle)
+        part_columns = {
+            column: _read_column(os.path.join(part, f"{column}.bin"), typecode)
+            for column, typecode in COLUMNS.items()
+        }
+        offsets = os.path.getsize(os.path.join(part, "feedback.idx")) // 8
+        with open(os.path.join(part, "passed.bits"), "rb") as handle:
+            bits = handle.read()
+        # Rows every file of the part has, whatever a torn flush left behind
+        rows = min(offsets, len(bits) * 8, *map(len, part_columns.values()))
+        for dimension in DIMENSIONS:
+            # Codes of the part mapped onto the merged dictionaries
+            lookup = [
+                dictionaries[dimension].encode(value) for value in values[dimension]
+            ]
+            codes = part_columns[dimension][:rows]
+            if np is not None:
+                codes = np.asarray(lookup, dtype=np.int64)[codes]
+            else:
+                codes = [lookup[code] for code in codes]
+            columns[dimension].append(codes)
+        columns["timestamp"].append(part_columns["timestamp"][:rows])
+        passed.append(_unpack(bits, rows))
+        parts.append((start, _FeedbackFile(part)))
+        start += rows
+
+    if np is not None:
+        merged = {
+            name: (
+                np.concatenate(chunks).astype(COLUMNS[name])
+                if chunks
+                else np.zeros(0, dtype=COLUMNS[name])
+            )
+            for name, chunks in columns.items()
+        }
+        flags = np.concatenate(passed) if passed else np.zeros(0, dtype=bool)
+    else:
+        merged = {
+            name: [value for chunk in chunks for value in chunk]
+            for name, chunks in columns.items()
+        }
+        flags = [flag for chunk in passed for flag in chunk]
+
+    def feedback(row: int) -> Dict:
+        for first, reader in reversed(parts):
+            if row >= first:
+                return reader(row - first)
+        raise IndexError(row)
+
+    return ResultsTable(
+        merged,
+        flags,
+        {
+            dimension: dictionary.values
+            for dimension, dictionary in dictionaries.items()
+        },
+        feedback,
+    )
@@ -0,0 +1,334 @@
+"""Incremental re-analysis of a creator's script revisions.
+
+A RevisionStore remembers the latest analyzed revision of every creator (per
+rulepack and model). The script is split into paragraphs, and consecutive
+paragraphs are grouped into segments whose boundaries depend only on the
+paragraphs themselves (a paragraph closes a segment when its hash says so),
+so an edit only changes the segment it falls in. The local checks (brand
+safety and avoided elements by default) run on every segment separately and
+their findings are kept per segment; on the next revision only the segments
+with a changed paragraph are checked again and merged with the kept findings.
+The whole-script checks are re-run only when the edit could affect them (see
+near_duplicates.affected_checks, which is why every revision keeps the checks
+each of its paragraphs mentions), otherwise the previous results are reused.
+
+Reused results carry reused_from_revision, and the analysis reports what was
+re-checked under "revision".
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.chunking import merge_chunk_results
+from src.evaluation_engine.consolidated import CONSOLIDATED_SECTIONS
+from src.evaluation_engine.near_duplicates import (
+    LOCAL_CHECKS,
+    affected_checks,
+    paragraph_hash,
+    paragraph_mentions,
+    split_paragraphs,
+)
+
+
+class RevisionPolicy(BaseModel):
+    # A segment ends at a paragraph whose hash is a multiple of boundary_every,
+    # once it has min_segment_chars, and always at max_segment_chars
+    min_segment_chars: int = 400
+    max_segment_chars: int = 2400
+    boundary_every: int = 2
+    # Checks run per segment; the others always see the whole script
+    categories: List[str] = list(LOCAL_CHECKS)
+    # Segments of one check in flight at once
+    max_parallel: int = 8
+
+
+class Segment(BaseModel):
+    # Identifies the segment's paragraphs, whatever their position
+    id: str
+    index: int
+    text: str
+
+
+class Revision(BaseModel):
+    number: int
+    paragraph_hashes: List[int]
+    # paragraph_mentions of the paragraphs, None for revisions kept without
+    paragraph_mentions: Optional[List[int]] = None
+    # Results of every check, as in the analysis details
+    details: Dict[str, List[AnalysisResult]]
+    # Findings of the per-segment checks, by check and segment id
+    findings: Dict[str, Dict[str, List[AnalysisResult]]] = {}
+
+
+def build_segments(
+    paragraphs: List[str], hashes: List[int], policy: RevisionPolicy
+) -> List[Segment]:
+    segments = []
+    current, chars = [], 0
+    for paragraph, digest in zip(paragraphs, hashes):
+        current.append((paragraph, digest))
+        chars += len(paragraph)
+        if chars >= policy.max_segment_chars or (
+            chars >= policy.min_segment_chars and digest % policy.boundary_every == 0
+        ):
+            segments.append(_segment(current, len(segments)))
+            current, chars = [], 0
+    if current:
+        segments.append(_segment(current, len(segments)))
+    return segments
+
+
+def _segment(paragraphs, index: int) -> Segment:
+    digest = hashlib.blake2b(digest_size=8)
+    for _, paragraph_digest in paragraphs:
+        digest.update(paragraph_digest.to_bytes(8, "little"))
+    return Segment(
+        id=digest.hexdigest(),
+        index=index,
+        text="\n\n".join(paragraph for paragraph, _ in paragraphs),
+    )
+
+
+def _reused(results: List[AnalysisResult], number: int) -> List[AnalysisResult]:
+    return [
+        result.model_copy(update={"reused_from_revision": number}) for result in results
+    ]
+
+
+class RevisionPlan:
+    """What an analysis of a new revision can reuse and has to run"""
+
+    def __init__(
+        self,
+        key: str,
+        content: str,
+        previous: Optional[Revision],
+        policy: RevisionPolicy,
+        rulepack,
+    ):
+        self.key = key
+        self.previous = previous
+        self.categories = policy.categories
+        self.number = previous.number + 1 if previous else 1
+        # Segments checked for this revision
+        self.checked = 0
+        paragraphs = split_paragraphs(content)
+        self.paragraph_hashes = [paragraph_hash(paragraph) for paragraph in paragraphs]
+        self.paragraph_mentions = paragraph_mentions(paragraphs, rulepack).tolist()
+        self.segments = build_segments(paragraphs, self.paragraph_hashes, policy)
+        # Findings kept from the previous revision, completed while analyzing
+        self.findings: Dict[str, Dict[str, List[AnalysisResult]]] = {
+            category: {
+                segment.id: previous.findings[category][segment.id]
+                for segment in self.segments
+                if previous and segment.id in previous.findings.get(category, {})
+            }
+            for category in self.categories
+        }
+        self.changed_paragraphs = []
+        self.rerun = list(CONSOLIDATED_SECTIONS)
+        if previous:
+            known = set(previous.paragraph_hashes)
+            self.changed_paragraphs = [
+                index + 1
+                for index, digest in enumerate(self.paragraph_hashes)
+                if digest not in known
+            ]
+            self.rerun = affected_checks(
+                previous.paragraph_hashes,
+                previous.paragraph_mentions,
+                paragraphs,
+                self.paragraph_hashes,
+                rulepack,
+            )
+
+    def pending(self, category: str) -> List[Segment]:
+        """Segments a per-segment check has no findings for yet"""
+        found = self.findings[category]
+        return [segment for segment in self.segments if segment.id not in found]
+
+    def record(self, category: str, segment: Segment, results: List[AnalysisResult]):
+        self.checked += 1
+        if not any(result.criteria == "error" for result in results):
+            self.findings[category][segment.id] = results
+
+    def merge(self, category: str, fresh: Dict[str, List[AnalysisResult]]):
+        """A per-segment check's results over the whole script"""
+        found = self.findings[category]
+        return merge_chunk_results(
+            [
+                fresh[segment.id] if segment.id in fresh else found[segment.id]
+                for segment in self.segments
+            ]
+        )
+
+    def reused(self) -> Dict[str, List[AnalysisResult]]:
+        """Results of the previous revision that still hold, by category"""
+        if self.previous is None:
+            return {}
+        reused = {}
+        for category, results in self.previous.details.items():
+            if category not in CONSOLIDATED_SECTIONS:
+                continue
+            if category in self.categories:
+                if not self.pending(category):
+                    reused[category] = _reused(
+                        self.merge(category, {}), self.previous.number
+                    )
+            elif category not in self.rerun:
+                reused[category] = _reused(results, self.previous.number)
+        return reused
+
+    def summary(self, details: Dict) -> Dict:
+        return {
+            "number": self.number,
+            "changed_paragraphs": self.changed_paragraphs,
+            "reused_checks": [
+                category
+                for category, results in details.items()
+                if results and all(result.reused_from_revision for result in results)
+            ],
+            "segments": len(self.segments),
+        }
+
+
+class RevisionStore:
+    """Latest analyzed revision of every creator, in memory and optionally SQLite"""
+
+    def __init__(
+        self,
+        policy: Optional[RevisionPolicy] = None,
+        max_entries: int = 10000,
+        sqlite_path: Optional[str] = None,
+    ):
+        self.policy = policy or RevisionPolicy()
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self._memory: "OrderedDict[str, Revision]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.revisions = 0
+        self.segments_checked = 0
+        self.segments_reused = 0
+
+        if sqlite_path:
+            with self._connect() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS revisions ("
+                    "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                    "updated_at REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.sqlite_path, timeout=5.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def version(self) -> str:
+        """Settings that change the results, for cache keys"""
+        policy = self.policy
+        return (
+            f"{policy.min_segment_chars}:{policy.max_segment_chars}:"
+            f"{policy.boundary_every}:" + ",".join(policy.categories)
+        )
+
+    def get(self, key: str) -> Optional[Revision]:
+        with self._lock:
+            revision = self._memory.get(key)
+            if revision is not None:
+                self._memory.move_to_end(key)
+                return revision
+        if not self.sqlite_path:
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT payload FROM revisions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        revision = Revision(**json.loads(row[0]))
+        with self._lock:
+            self._remember(key, revision)
+        return revision
+
+    def _remember(self, key: str, revision: Revision):
+        self._memory[key] = revision
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def plan(
+        self, creator_name: str, namespace: str, content: str, rulepack, fresh=False
+    ) -> RevisionPlan:
+        """Plan the analysis of a creator's new revision (fresh ignores the last one)"""
+        key = f"{' '.join(creator_name.lower().split())}|{namespace}"
+        previous = None if fresh else self.get(key)
+        return RevisionPlan(key, content, previous, self.policy, rulepack)
+
+    def record(self, plan: RevisionPlan, analysis: Dict):
+        """Keep an analyzed revision as the base of the creator's next one"""
+        revision = Revision(
+            number=plan.number,
+            paragraph_hashes=plan.paragraph_hashes,
+            paragraph_mentions=plan.paragraph_mentions,
+            details={
+                category: results
+                for category, results in analysis["details"].items()
+                if category in CONSOLIDATED_SECTIONS
+            },
+            findings=plan.findings,
+        )
+        with self._lock:
+            self._remember(plan.key, revision)
+            self.revisions += 1
+            self.segments_checked += plan.checked
+            self.segments_reused += (
+                len(plan.segments) * len(plan.categories) - plan.checked
+            )
+        if self.sqlite_path:
+            payload = json.dumps(
+                {
+                    "number": revision.number,
+                    "paragraph_hashes": revision.paragraph_hashes,
+                    "paragraph_mentions": revision.paragraph_mentions,
+                    "details": {
+                        category: [result.to_dict() for result in results]
+                        for category, results in revision.details.items()
+                    },
+                    "findings": {
+                        category: {
+                            segment: [result.to_dict() for result in results]
+                            for segment, results in found.items()
+                        }
+                        for category, found in revision.findings.items()
+                    },
+                }
+            )
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO revisions (key, payload, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (plan.key, payload, time.time()),
+                )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "creators": len(self._memory),
+            "revisions": self.revisions,
+            "segments_checked": self.segments_checked,
+            "segments_reused": self.segments_reused,
+        }
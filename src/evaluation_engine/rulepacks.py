@@ -0,0 +1,353 @@
+"""Per-brand rulepacks: the prompts and pass rules of a sponsor's brief.
+
+Each brand has one TOML file in packs/ (see packs/milanote.toml) holding the
+instructions sent to the model for every check, the criteria read back from
+its answers and the prescreen lexicon run before any model call. A file is
+compiled once into a CompiledRulepack - the rendered prompts plus one
+precompiled matcher per keyword list - and kept in a
+RulepackRegistry keyed by brand and version. Requests pick a pack through
+ScriptSubmission.brief_type (no brief type means the default brand), so a
+request only pays for a dict lookup. The registry re-reads a pack when its
+file changes, checking the file at most every reload_interval seconds.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tomllib
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.consolidated import CONSOLIDATED_SECTIONS
+from src.evaluation_engine.helpers import SectionIndex
+from src.evaluation_engine.prescreen import PrescreenLexicon, PrescreenRules
+from src.evaluation_engine.prompts import PromptSet, PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+RULEPACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+DEFAULT_BRAND = "milanote"
+# Checks every pack has to define; "consolidated" only needs instructions
+RULEPACK_CHECKS = [*CONSOLIDATED_SECTIONS, "consolidated"]
+# Brief types map straight to file names, so nothing else is accepted
+_BRAND_NAME = re.compile(r"[a-z0-9][a-z0-9_-]*")
+
+
+class RulepackError(ValueError):
+    """A rulepack file that cannot be loaded or compiled"""
+
+
+class UnknownRulepackError(ValueError):
+    """No rulepack exists for the requested brief type"""
+
+
+class CriterionRule(BaseModel):
+    # Name of the criterion in the results
+    name: str
+    # Header the model reports it under, as asked for in the instructions
+    header: str
+    # Fails when its section mentions any of these
+    fail_if_any: List[str] = []
+    # Passes only when every group has a mention
+    require: List[List[str]] = []
+    # Headers of other sections also searched for the required keywords
+    search_also: List[str] = []
+    # Report the model's severity when the criterion fails
+    report_severity: bool = False
+    # Report the criterion when its header is present but its section is empty
+    report_if_empty: bool = False
+
+
+class CheckRules(BaseModel):
+    # Version of the check's prompt template
+    version: int
+    instructions: str
+    criteria: List[CriterionRule] = []
+    # Besides the brand and the criteria keywords, terms whose edit can change
+    # the check's answer (see near_duplicates.py)
+    rerun_terms: List[str] = []
+
+
+class Rulepack(BaseModel):
+    brand: str
+    brand_name: str
+    version: int
+    checks: Dict[str, CheckRules]
+    prescreen: PrescreenRules = PrescreenRules()
+
+
+def _matcher(keywords: List[str]) -> Optional[re.Pattern]:
+    """One regex finding any of the keywords in lowercased text"""
+    if not keywords:
+        return None
+    return re.compile(
+        "|".join(re.escape(keyword.lower()) for keyword in keywords if keyword)
+    )
+
+
+class _Criterion:
+    __slots__ = (
+        "name",
+        "header",
+        "fail",
+        "require",
+        "search_also",
+        "severity",
+        "if_empty",
+    )
+
+    def __init__(self, rule: CriterionRule):
+        self.name = rule.name
+        self.header = rule.header
+        self.fail = _matcher(rule.fail_if_any)
+        self.require = [_matcher(group) for group in rule.require if group]
+        self.search_also = rule.search_also
+        self.severity = rule.report_severity
+        self.if_empty = rule.report_if_empty
+
+    def _fails(self, index: SectionIndex, section) -> Tuple[bool, bool]:
+        """Whether the criterion fails, and whether a keyword decided it"""
+        if self.fail is not None and self.fail.search(section.lower) is not None:
+            return True, True
+        if not self.require:
+            return False, False
+        texts = [section.lower] + [
+            index.details(header).lower for header in self.search_also
+        ]
+        found = all(
+            any(matcher.search(text) for text in texts) for matcher in self.require
+        )
+        # Passing on required keywords is a keyword decision, missing them is not
+        return not found, found
+
+    def evaluate(self, index: SectionIndex) -> Optional[AnalysisResult]:
+        section = index.details(self.header)
+        if not section.text and not (self.if_empty and self.header in index):
+            return None
+
+        failed, _ = self._fails(index, section)
+        return AnalysisResult(
+            criteria=self.name,
+            passed=not failed,
+            feedback=section.feedback(),
+            suggestions=section.suggestions() if failed else None,
+            severity=section.severity() if failed and self.severity else None,
+        )
+
+
+class CompiledRulepack:
+    """A rulepack ready to render prompts and judge answers"""
+
+    def __init__(self, pack: Rulepack, source: Optional[str] = None):
+        self.brand = pack.brand
+        self.brand_name = pack.brand_name
+        self.version = pack.version
+        self.source = source
+        self.prompts = PromptSet(
+            {
+                name: PromptTemplate(
+                    name=name, version=rules.version, instructions=rules.instructions
+                )
+                for name, rules in pack.checks.items()
+            }
+        )
+        # Changes with any prompt template; results are also keyed on the rules
+        self.prompt_version = self.prompts.version
+        self.prescreen = PrescreenLexicon(pack.prescreen)
+        self._criteria: Dict[str, List[_Criterion]] = {
+            name: [_Criterion(rule) for rule in rules.criteria]
+            for name, rules in pack.checks.items()
+        }
+        # The brand and every term a check's answer depends on
+        self._terms = {
+            name: _matcher(
+                [pack.brand_name, *rules.rerun_terms]
+                + [
+                    keyword
+                    for rule in rules.criteria
+                    for keywords in [rule.fail_if_any, *rule.require]
+                    for keyword in keywords
+                ]
+            )
+            for name, rules in pack.checks.items()
+        }
+        rules_digest = hashlib.sha256(
+            pack.model_dump_json(
+                exclude={"checks": {"__all__": {"instructions"}}}
+            ).encode("utf-8")
+        ).hexdigest()[:10]
+        # Identifies the pack in cache keys and results
+        self.key = f"{self.brand}@{self.version}:{rules_digest}"
+
+    def render(self, check: str, content: str) -> List[Dict[str, str]]:
+        return self.prompts.render(check, content)
+
+    def mentions(self, check: str, text: str) -> bool:
+        """Whether text mentions the brand or anything the check looks for"""
+        return self._terms[check].search(text.lower()) is not None
+
+    def decisions(
+        self, check: str, response: str
+    ) -> List[Tuple[str, Optional[str], bool]]:
+        """(criterion, lowercased section or None when missing, whether a keyword
+        decided it) for every criterion of a check"""
+        index = SectionIndex(response)
+        decisions = []
+        for criterion in self._criteria[check]:
+            section = index.details(criterion.header)
+            if not section.text:
+                decisions.append((criterion.name, None, False))
+                continue
+            _, by_keyword = criterion._fails(index, section)
+            decisions.append((criterion.name, section.lower, by_keyword))
+        return decisions
+
+    def evaluate(self, check: str, response: str) -> List[AnalysisResult]:
+        """Results of a check's criteria found in the model's answer"""
+        index = SectionIndex(response)
+        results = []
+        for criterion in self._criteria[check]:
+            result = criterion.evaluate(index)
+            if result is not None:
+                results.append(result)
+        return results
+
+
+def compile_rulepack(data: Dict, source: Optional[str] = None) -> CompiledRulepack:
+    """Validate a parsed rulepack and compile it"""
+    try:
+        pack = Rulepack(**data)
+    except ValidationError as e:
+        raise RulepackError(f"Invalid rulepack {source or ''}: {e}") from e
+
+    missing = [check for check in RULEPACK_CHECKS if check not in pack.checks]
+    if missing:
+        raise RulepackError(
+            f"Rulepack {pack.brand} is missing checks: {', '.join(missing)}"
+        )
+    for name, rules in pack.checks.items():
+        # The model can only answer under headers the instructions ask for
+        instructions = rules.instructions.lower()
+        for rule in rules.criteria:
+            if rule.header.lower() not in instructions:
+                raise RulepackError(
+                    f"Rulepack {pack.brand}: header {rule.header!r} of {name} "
+                    "is not mentioned in its instructions"
+                )
+    consolidated = pack.checks["consolidated"].instructions
+    for marker in CONSOLIDATED_SECTIONS.values():
+        if marker not in consolidated:
+            raise RulepackError(
+                f"Rulepack {pack.brand}: consolidated instructions lack {marker}"
+            )
+    return CompiledRulepack(pack, source)
+
+
+def load_rulepack(path: str) -> CompiledRulepack:
+    try:
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+    except tomllib.TOMLDecodeError as e:
+        raise RulepackError(f"Invalid rulepack {path}: {e}") from e
+    return compile_rulepack(data, path)
+
+
+class _PackFile:
+    __slots__ = ("signature", "pack", "checked_at")
+
+    def __init__(self, signature: Tuple[int, int], pack: CompiledRulepack):
+        self.signature = signature
+        self.pack = pack
+        self.checked_at = time.monotonic()
+
+
+class RulepackRegistry:
+    """Compiled rulepacks of a directory, reloaded when their files change"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        default_brand: str = DEFAULT_BRAND,
+        reload_interval: float = 2.0,
+    ):
+        self.directory = directory or RULEPACK_DIR
+        self.default_brand = default_brand
+        # Seconds between checks of a pack's file (0 checks on every request)
+        self.reload_interval = reload_interval
+        # Every compiled pack by (brand, version)
+        self.compiled: Dict[Tuple[str, int], CompiledRulepack] = {}
+        self._files: Dict[str, _PackFile] = {}
+        self._lock = threading.Lock()
+
+    def brands(self) -> List[str]:
+        return sorted(
+            name[: -len(".toml")]
+            for name in os.listdir(self.directory)
+            if name.endswith(".toml")
+        )
+
+    def get(self, brief_type: Optional[str] = None) -> CompiledRulepack:
+        """Compiled pack for a brief type, the default brand when None"""
+        brand = (brief_type or self.default_brand).strip().lower()
+        entry = self._files.get(brand)
+        if (
+            entry is not None
+            and time.monotonic() - entry.checked_at < self.reload_interval
+        ):
+            return entry.pack
+        with self._lock:
+            return self._refresh(brand)
+
+    def _refresh(self, brand: str) -> CompiledRulepack:
+        if not _BRAND_NAME.fullmatch(brand):
+            raise UnknownRulepackError(f"No rulepack for brief type {brand!r}")
+        path = os.path.join(self.directory, f"{brand}.toml")
+        entry = self._files.get(brand)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if entry is not None:
+                # Keep serving a pack whose file was removed while running
+                entry.checked_at = time.monotonic()
+                return entry.pack
+            raise UnknownRulepackError(f"No rulepack for brief type {brand!r}")
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry.signature == signature:
+            entry.checked_at = time.monotonic()
+            return entry.pack
+
+        try:
+            pack = load_rulepack(path)
+        except RulepackError as e:
+            if entry is None:
+                raise
+            # A bad edit must not take the brand down; keep the last good pack
+            logger.warning("Keeping rulepack %s: %s", entry.pack.key, e)
+            entry.signature = signature
+            entry.checked_at = time.monotonic()
+            return entry.pack
+
+        if pack.brand != brand:
+            raise RulepackError(f"{path} defines brand {pack.brand!r}")
+        self.compiled[(pack.brand, pack.version)] = pack
+        self._files[brand] = _PackFile(signature, pack)
+        return pack
+
+
+_REGISTRY: Optional[RulepackRegistry] = None
+
+
+def default_registry() -> RulepackRegistry:
+    """Registry of the packs shipped with the code, shared by every analyzer"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = RulepackRegistry()
+    return _REGISTRY
@@ -1,242 +1,298 @@
-from enum import Enum
 import sys
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
-import openai
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 
 sys.path.append("./")
 
+from src.evaluation_engine.analysis_cache import (
+    AnalysisCache,
+    is_cacheable,
+    make_cache_key,
+)
 from src.evaluation_engine.analysis_result import AnalysisResult
-from src.evaluation_engine.criteria import (
-    AVOID_ELEMENTS,
-    CORE_REQUIREMENTS,
-    SCRIPT_FLOW,
+from src.evaluation_engine.cascade import ModelCascade
+from src.evaluation_engine.chunking import (
+    Chunk,
+    ChunkingPolicy,
+    merge_chunk_results,
+    split_into_chunks,
 )
-from src.evaluation_engine.script_submission import ScriptSubmission
-from src.evaluation_engine.helpers import (
-    check_section_requirements,
-    extract_feedback,
-    extract_section,
-    extract_severity,
-    extract_suggestions,
+from src.evaluation_engine.consolidated import split_consolidated_sections
+from src.evaluation_engine.near_duplicates import (
+    NearDuplicateIndex,
+    NearDuplicateMatch,
+    ScriptFingerprint,
+)
+from src.evaluation_engine.instrumentation import (
+    AnalysisTimings,
+    emit_emf,
+    measure_parse,
+    record_check,
+    record_completion,
 )
+from src.evaluation_engine.prescreen import (
+    PRESCREEN_CATEGORY,
+    PrescreenPolicy,
+    prescreen_script,
+)
+from src.evaluation_engine.resilience import Resilience
+from src.evaluation_engine.revisions import RevisionPlan, RevisionStore
+from src.evaluation_engine.rulepacks import (
+    CompiledRulepack,
+    RulepackRegistry,
+    default_registry,
+)
+from src.evaluation_engine.script_submission import ScriptSubmission
 
 
 class ScriptAnalyzer:
-    def __init__(self, openai_api_key: str):
-        self.openai_client = openai.Client(api_key=openai_api_key)
-
-    def _check_brand_safety(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for brand safety concerns. This is critical as Milanote has strict content guidelines.
-
-        Check for ANY presence of:
-        1. Adult Content:
-           - Explicit themes
-           - Adult language
-           - Inappropriate imagery references
-           - Suggestive content
-
-        2. Political Content:
-           - Politically polarizing topics
-           - Controversial political statements
-           - Political bias or advocacy
-           - Divisive political commentary
-
-        3. Harassment/Attacks:
-           - Personal attacks
-           - Targeted harassment
-           - Negative comments about individuals/groups
-           - Discriminatory language
-
-        4. Misinformation:
-           - Unverified theories presented as facts
-           - Conspiracy theories
-           - Unsubstantiated claims
-           - Misleading information
-
-        Script:
-        {content}
-
-        For each category:
-        1. Flag ANY presence of problematic content (even subtle references)
-        2. Mark severity (Low/Medium/High)
-        3. Quote specific problematic phrases or references
-        4. Indicate if the content is completely brand-safe or needs modification
-
-        This is a zero-tolerance check - any presence of these elements should result in immediate flagging.
-        """
-
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,  # Lower temperature for more conservative/consistent checking
-        )
-
-        # Process the response
-        analysis = response.choices[0].message.content
-        return self._process_brand_safety_analysis(analysis)
-
-    def _check_core_requirements(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for how it introduces and describes Milanote.
-
-        Key aspects to evaluate:
-        1. Introduction of Milanote:
-           - Looking for descriptions that convey Milanote is a tool for organizing creative projects
-           - Accept variations that capture the same meaning (e.g., "platform for organizing creative work", "creative organization tool")
-           - The core message should emphasize both "organizing" and "creative projects"
-
-        2. Product Description and Features:
-           - Should have description about Milanote
-           - Can be described in the creator's own words/style
+    model = "gpt-4o-mini"
+    temperature = 0.3  # Lower temperature for more conservative/consistent checking
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        consolidated: bool = False,
+        cache: Optional[AnalysisCache] = None,
+        prescreen_policy: Optional[PrescreenPolicy] = None,
+        base_url: Optional[str] = None,
+        emit_metrics: bool = False,
+        chunking: Optional[ChunkingPolicy] = None,
+        resilience: Optional[Resilience] = None,
+        rulepacks: Optional[RulepackRegistry] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        revisions: Optional[RevisionStore] = None,
+        cascade: Optional[ModelCascade] = None,
+    ):
+        # Imported here so loading this module does not pay for the SDK import
+        import openai
+
+        self.openai_client = openai.Client(api_key=openai_api_key, base_url=base_url)
+        if resilience is not None:
+            # Retries are handled by the resilience layer instead of the SDK
+            self.openai_client = self.openai_client.with_options(max_retries=0)
+        # Ask for all four checks in one request instead of four separate ones
+        self.consolidated = consolidated
+        # Optional result cache shared between analyzer instances
+        self.cache = cache
+        # Local lexicon check run on the raw script before any model call
+        self.prescreen_policy = prescreen_policy
+        # Print per-check token, latency and cost metrics as CloudWatch EMF lines
+        self.emit_metrics = emit_metrics
+        # Split long scripts and run the local checks on every chunk in parallel
+        self.chunking = chunking
+        # Retries, hedging and circuit breaking shared by every check
+        self.resilience = resilience
+        # Per-brand prompts and pass rules, picked by the submission's brief type
+        self.rulepacks = rulepacks or default_registry()
+        # Answers lightly edited resubmissions from earlier analyses (needs cache)
+        self.near_duplicates = near_duplicates
+        # Re-checks only what changed since the creator's previous revision
+        self.revisions = revisions
+        # Cheap first pass per check, ambiguous answers go to a stronger model
+        self.cascade = cascade
+
+    @property
+    def prompt_version(self) -> str:
+        """Prompt version of the default brand's rulepack"""
+        return self.rulepacks.get().prompt_version
+
+    def _rulepack(self, rulepack: Optional[CompiledRulepack]) -> CompiledRulepack:
+        return rulepack if rulepack is not None else self.rulepacks.get()
+
+    def _checks(self, rulepack: Optional[CompiledRulepack] = None) -> Dict:
+        return {
+            category: partial(check, rulepack=rulepack)
+            for category, check in (
+                ("brand safety", self._check_brand_safety),
+                ("core requirements", self._check_core_requirements),
+                ("script flow", self._check_script_flow),
+                ("avoided elements", self._check_avoided_elements),
+            )
+        }
 
-        Note: The script might not contain explicit screen direction cues like "[Screen: Show Logo]" - focus on the spoken/narration content.
+    def _create_completion(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ):
+        if self.resilience is None:
+            return self._request_completion(messages, model)
+        return self.resilience.call(
+            lambda timeout: self._request_completion(messages, model, timeout)
+        )
 
-        Script:
-        {content}
+    def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        model = model or self.model
+        # Without one, the client's own timeout applies
+        options = {"timeout": timeout} if timeout is not None else {}
+        start = time.perf_counter()
+        with self.openai_client.chat.completions.with_streaming_response.create(
+            model=model,
+            messages=messages,
+            temperature=self.temperature,
+            **options,
+        ) as raw_response:
+            # The headers have arrived, the body has not been read yet
+            ttfb = time.perf_counter() - start
+            response = raw_response.parse()
+        record_completion(model, response, ttfb, raw_response.retries_taken)
+        return response
+
+    def _complete_check(
+        self, check: str, prompt: List[Dict[str, str]], process, rulepack
+    ) -> List[AnalysisResult]:
+        """Ask for one check and process the answer, escalated when ambiguous"""
+        first_model = None
+        if self.cascade is not None:
+            first_model, _ = self.cascade.route(check, self.model)
+        response = self._create_completion(prompt, first_model)
+        answer = response.choices[0].message.content
+        with measure_parse():
+            results = process(answer, rulepack)
+        return self._escalate(check, prompt, process, rulepack, answer, results)
+
+    def _escalate(
+        self,
+        check: str,
+        prompt: List[Dict[str, str]],
+        process,
+        rulepack,
+        answer: str,
+        results: List[AnalysisResult],
+    ) -> List[AnalysisResult]:
+        """The stronger model's results when the cascade finds the answer ambiguous"""
+        if self.cascade is None:
+            return results
+        _, escalation = self.cascade.route(check, self.model)
+        reasons = []
+        if escalation is not None:
+            with measure_parse():
+                reasons = self.cascade.ambiguities(check, answer or "", rulepack)
+        self.cascade.record(check, reasons, escalation)
+        if not reasons:
+            return results
+        response = self._create_completion(prompt, escalation)
+        with measure_parse():
+            return process(response.choices[0].message.content, rulepack)
 
-        Provide analysis of:
-        1. How effectively the script introduces Milanote (quote the relevant text)
-        2. Whether the core message is conveyed, even if using different phrasing
-        3. Explicity state which key aspects are present or not.
-        """
+    def _build_brand_safety_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("brand safety", content)
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
+    def _check_brand_safety(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_brand_safety_prompt(content, rulepack)
 
-        # Process response with more flexible matching
-        analysis = response.choices[0].message.content
-        return self._process_core_requirements_analysis(analysis)
-
-    def _check_script_flow(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for content flow and narrative structure. 
-        Note: The script might not contain explicit screen directions - focus on the narrative content.
-
-        Expected content elements (can be in any natural order):
-        1. Introduction of Milanote
-           - Should introduce the tool and its purpose
-
-        2. Personal Usage Example
-           - Should describe how the creator uses Milanote
-           - Should mention specific use cases or projects
-           - Visual elements like board demonstrations may be implied in the narrative
-
-        3. Feature Descriptions
-           - Should mention key features (templates, collaboration, etc.)
-           - Should explain benefits in creator's own style
-           - Details should be presented in an accessible way
-
-        4. Audience Benefits
-           - Should explain how viewers can use Milanote
-           - May highlight the presence of existing templates for different kinds of use cases or projects
-           - Should mention different use cases or user types
-           - Should mention about how teams can ollaborate and share work
-
-        5. Call to Action
-           - Must encourage audience to use Milanote
-           - Must mention it's free
-           - Must reference sign-up process (not download)
-
-        Script:
-        {content}
-
-        Analyze:
-        1. Whether each key element is present in the narrative
-        2. How naturally the elements flow together
-        3. Whether the script feels authentic to the creator while covering key points
-        4. Any missing essential information
-        """
-
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+        return self._complete_check(
+            "brand safety", prompt, self._process_brand_safety_analysis, rulepack
         )
 
-        # Process the response
-        analysis = response.choices[0].message.content
-        return self._process_script_flow_analysis(analysis)
-
-    def _check_avoided_elements(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Review the following script for problematic elements, focusing on the actual content rather than formatting or screen directions.
+    def _build_core_requirements_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("core requirements", content)
 
-        Check for these issues while allowing for natural variation in expression:
+    def _check_core_requirements(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_core_requirements_prompt(content, rulepack)
+
+        return self._complete_check(
+            "core requirements",
+            prompt,
+            self._process_core_requirements_analysis,
+            rulepack,
+        )
 
-        1. Content Problems:
-           - Too focused on YouTube-specific content
-           - Missing essential information about Milanote
-           - Incorrect feature descriptions
-           - Confusing or misleading explanations
+    def _build_script_flow_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("script flow", content)
 
-        2. Tone/Style Issues:
-           - Overly promotional language
-           - Inauthentic or forced delivery
-           - Too technical or complicated explanation
+    def _check_script_flow(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_script_flow_prompt(content, rulepack)
 
-        Script:
-        {content}
+        return self._complete_check(
+            "script flow", prompt, self._process_script_flow_analysis, rulepack
+        )
 
-        Provide:
-        1. Any identified issues that would hurt the effectiveness of the sponsorship
-        2. Whether the script maintains authenticity while meeting requirements
-        3. Suggestions for improvement that preserve the creator's voice
-        """
+    def _build_avoided_elements_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("avoided elements", content)
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+    def _check_avoided_elements(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_avoided_elements_prompt(content, rulepack)
+
+        return self._complete_check(
+            "avoided elements",
+            prompt,
+            self._process_avoided_elements_analysis,
+            rulepack,
         )
 
-        analysis = response.choices[0].message.content
+    def _check_consolidated(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> Dict[str, List[AnalysisResult]]:
+        rulepack = self._rulepack(rulepack)
+        prompt = rulepack.render("consolidated", content)
+
+        first_model = None
+        if self.cascade is not None:
+            first_model, _ = self.cascade.route("consolidated", self.model)
+        response = self._create_completion(prompt, first_model)
+
+        processors = {
+            "brand safety": self._process_brand_safety_analysis,
+            "core requirements": self._process_core_requirements_analysis,
+            "script flow": self._process_script_flow_analysis,
+            "avoided elements": self._process_avoided_elements_analysis,
+        }
+        # Hand each section to the same processing used by the individual checks
+        with measure_parse():
+            sections = split_consolidated_sections(response.choices[0].message.content)
+            results = {
+                category: process(sections[category], rulepack)
+                for category, process in processors.items()
+            }
+        if self.cascade is None:
+            return results
 
-        return self._process_avoided_elements_analysis(analysis)
+        # Ambiguous sections are asked again on their own, with the check's prompt
+        return {
+            category: self._escalate(
+                category,
+                rulepack.render(category, content),
+                processors[category],
+                rulepack,
+                sections[category],
+                category_results,
+            )
+            for category, category_results in results.items()
+        }
 
     def _process_brand_safety_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for brand safety analysis"""
         try:
-            results = []
-
-            # Brand safety categories
-            categories = {
-                "adult content": ["explicit", "inappropriate"],
-                "political": ["political", "polarizing", "controversial"],
-                "harassment": ["personal attack", "discriminatory"],
-                "misinformation": ["unverified", "conspiracy", "misleading"],
-            }
-
-            for category, keywords in categories.items():
-                category_text = extract_section(openai_response, category)
-                if category_text:
-                    # Any mention of issues in these categories should fail
-                    has_issues = any(
-                        keyword in category_text.lower() for keyword in keywords
-                    )
-                    severity = extract_severity(category_text)
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{category}",
-                            passed=not has_issues,
-                            feedback=extract_feedback(category_text),
-                            suggestions=(
-                                extract_suggestions(category_text)
-                                if has_issues
-                                else None
-                            ),
-                            severity=severity if has_issues else None,
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate("brand safety", openai_response)
 
         except Exception as e:
             return [
@@ -249,74 +305,13 @@ class ScriptAnalyzer:
             ]
 
     def _process_core_requirements_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for core requirements analysis"""
         try:
-            results = []
-
-            # Extract introduction analysis
-            if "introduction" in openai_response.lower():
-                intro_text = extract_section(openai_response, "introduction")
-
-                # Check if core message is conveyed (allowing for variations)
-                core_message_conveyed = any(
-                    [
-                        "tool for organizing" in intro_text.lower(),
-                        "creative organization" in intro_text.lower(),
-                        "organize creative" in intro_text.lower(),
-                        "creative projects" in intro_text.lower(),
-                    ]
-                )
-
-                results.append(
-                    AnalysisResult(
-                        criteria="introduction",
-                        passed=core_message_conveyed,
-                        feedback=extract_feedback(intro_text),
-                        suggestions=(
-                            extract_suggestions(intro_text)
-                            if not core_message_conveyed
-                            else None
-                        ),
-                    )
-                )
-
-            # Extract product description analysis
-            if "product description" in openai_response.lower():
-                desc_text = extract_section(openai_response, "product description")
-
-                # Check for key product elements
-                has_canvas = any(
-                    keyword in text.lower()
-                    for keyword in ["canvas", "workspace", "mind map", "plan"]
-                    for text in [desc_text, intro_text]
-                )
-                has_planning = any(
-                    keyword in text.lower()
-                    for keyword in ["planning", "brainstorming", "organizing"]
-                    for text in [desc_text, intro_text]
-                )
-                has_collab = any(
-                    keyword in text.lower()
-                    for keyword in ["collab", "team work", "members"]
-                    for text in [desc_text, intro_text]
-                )
-
-                results.append(
-                    AnalysisResult(
-                        criteria="product_description",
-                        passed=all([has_canvas, has_planning, has_collab]),
-                        feedback=extract_feedback(desc_text),
-                        suggestions=(
-                            extract_suggestions(desc_text)
-                            if not all([has_canvas, has_planning, has_collab])
-                            else None
-                        ),
-                    )
-                )
-
-            return results
+            return self._rulepack(rulepack).evaluate(
+                "core requirements", openai_response
+            )
 
         except Exception as e:
             return [
@@ -330,36 +325,13 @@ class ScriptAnalyzer:
                 )
             ]
 
-    def _process_avoided_elements_analysis(self, analysis):
+    def _process_avoided_elements_analysis(
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
         try:
-            results = []
-
-            categories = {
-                "content problems": ["missing", "incorrect", "confusing"],
-                "tone": ["promotional", "inauthentic", "technical"],
-            }
-
-            for category, keywords in categories.items():
-                category_text = extract_section(analysis, category)
-                if category_text:
-                    has_issues = any(
-                        keyword in category_text.lower() for keyword in keywords
-                    )
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{category}",
-                            passed=not has_issues,
-                            feedback=extract_feedback(category_text),
-                            suggestions=(
-                                extract_suggestions(category_text)
-                                if has_issues
-                                else None
-                            ),
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate(
+                "avoided elements", openai_response
+            )
 
         except Exception as e:
             return [
@@ -374,41 +346,11 @@ class ScriptAnalyzer:
             ]
 
     def _process_script_flow_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for script flow analysis"""
         try:
-            results = []
-
-            # Expected sections in the flow
-            sections = [
-                "introduction",
-                "personal usage",
-                "feature descriptions",
-                "audience benefits",
-                "Call to Action",
-            ]
-
-            for section in sections:
-                section_text = extract_section(openai_response, section)
-                if section_text:
-                    # Check section requirements based on type
-                    passed = check_section_requirements(section, section_text)
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{section}",
-                            passed=passed,
-                            feedback=extract_feedback(section_text),
-                            suggestions=(
-                                extract_suggestions(section_text)
-                                if not passed
-                                else None
-                            ),
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate("script flow", openai_response)
 
         except Exception as e:
             return [
@@ -420,19 +362,279 @@ class ScriptAnalyzer:
                 )
             ]
 
+    def _cache_version(self, rulepack: Optional[CompiledRulepack] = None) -> str:
+        """Everything besides the script that an analysis depends on"""
+        rulepack = self._rulepack(rulepack)
+        prompt_version = f"{rulepack.prompt_version}+rulepack:{rulepack.key}"
+        if self.consolidated:
+            prompt_version += "+consolidated"
+        if self.prescreen_policy is not None:
+            policy = self.prescreen_policy
+            prompt_version += f"+prescreen:{policy.reject_on_hard_hit}:" + ",".join(
+                policy.checks_after_hard_hit
+            )
+        if self.chunking is not None:
+            chunking = self.chunking
+            prompt_version += (
+                f"+chunked:{chunking.max_chars}:{chunking.overlap_chars}:"
+                + ",".join(chunking.categories)
+            )
+        if self.revisions is not None:
+            prompt_version += f"+revisions:{self.revisions.version()}"
+        if self.cascade is not None:
+            prompt_version += f"+cascade:{self.cascade.version()}"
+        return prompt_version
+
+    def cache_key(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> str:
+        return make_cache_key(
+            content, self._cache_version(rulepack), self.model, self.temperature
+        )
+
+    def _results_namespace(self, rulepack: CompiledRulepack) -> str:
+        """Scope in which earlier results can be reused for another script"""
+        return f"{self._cache_version(rulepack)}|{self.model}|{self.temperature}"
+
+    def _store(
+        self,
+        key: Optional[str],
+        analysis: Dict,
+        rulepack: CompiledRulepack,
+        match: Optional[NearDuplicateMatch] = None,
+        fingerprint: Optional[ScriptFingerprint] = None,
+        plan: Optional[RevisionPlan] = None,
+    ) -> Dict:
+        """Mark reused results and remember the analysis for later scripts"""
+        if match is not None:
+            analysis["near_duplicate"] = match.summary()
+        if plan is not None:
+            analysis["revision"] = plan.summary(analysis["details"])
+        if not is_cacheable(analysis):
+            return analysis
+        if plan is not None:
+            self.revisions.record(plan, analysis)
+        if key is not None:
+            self.cache.put(key, analysis)
+            if fingerprint is not None:
+                self.near_duplicates.add(
+                    fingerprint, self._results_namespace(rulepack), key
+                )
+        return analysis
+
+    def _find_near_duplicate(
+        self, content: str, rulepack: CompiledRulepack
+    ) -> Tuple[Optional[ScriptFingerprint], Optional[NearDuplicateMatch]]:
+        if self.near_duplicates is None:
+            return None, None
+        fingerprint = self.near_duplicates.fingerprint(content, rulepack)
+        match = self.near_duplicates.find(
+            fingerprint,
+            self._results_namespace(rulepack),
+            self.cache,
+            rulepack,
+        )
+        return fingerprint, match
+
+    def _plan_revision(
+        self, submission: ScriptSubmission, rulepack: CompiledRulepack, fresh: bool
+    ) -> Optional[RevisionPlan]:
+        if self.revisions is None:
+            return None
+        return self.revisions.plan(
+            submission.creator_name,
+            self._results_namespace(rulepack),
+            submission.content,
+            rulepack,
+            fresh=fresh,
+        )
+
     def analyze_script(
-        self, submission: ScriptSubmission
+        self, submission: ScriptSubmission, bypass_cache: bool = False
     ) -> Dict[str, List[AnalysisResult]]:
-        """Main analysis method that runs all checks"""
-        results = {
-            "brand safety": self._check_brand_safety(submission.content),
-            "core requirements": self._check_core_requirements(submission.content),
-            "script flow": self._check_script_flow(submission.content),
-            "avoided elements": self._check_avoided_elements(submission.content),
-        }
+        """Main analysis method, served from the cache when an identical script was seen"""
+        timings = AnalysisTimings()
+        rulepack = self.rulepacks.get(submission.brief_type)
+        if self.cache is None or bypass_cache:
+            plan = self._plan_revision(submission, rulepack, fresh=bypass_cache)
+            analysis = self._analyze(submission, timings, rulepack, plan=plan)
+            self._store(None, analysis, rulepack, plan=plan)
+            return self._finalize(analysis, timings, rulepack)
+
+        key = self.cache_key(submission.content, rulepack)
+        cached = self.cache.get(key)
+        if cached is not None:
+            timings.cache_hit = True
+            return self._finalize(cached, timings, rulepack)
+
+        # The creator's previous revision, or else an earlier lightly edited
+        # script, may answer some or all checks
+        plan = self._plan_revision(submission, rulepack, fresh=False)
+        fingerprint = match = None
+        if plan is None or plan.previous is None:
+            fingerprint, match = self._find_near_duplicate(submission.content, rulepack)
+        if match is not None and not match.rerun:
+            analysis = match.analysis
+        else:
+            analysis = self._analyze(submission, timings, rulepack, match, plan)
+        self._store(key, analysis, rulepack, match, fingerprint, plan)
+        return self._finalize(analysis, timings, rulepack)
+
+    def _finalize(
+        self, analysis: Dict, timings: AnalysisTimings, rulepack: CompiledRulepack
+    ) -> Dict:
+        # Cached analyses keep the version they were produced with
+        analysis.setdefault("prompt_version", rulepack.prompt_version)
+        timings.finish()
+        analysis["timings"] = timings.to_dict()
+        if self.emit_metrics:
+            emit_emf(timings, analysis["status"])
+        return analysis
+
+    def _run_check(
+        self,
+        category: str,
+        check,
+        content: str,
+        timings: AnalysisTimings,
+        part: Optional[str] = None,
+    ) -> List[AnalysisResult]:
+        with record_check(timings, category, self.model, part):
+            return check(content)
+
+    def _chunks(self, content: str) -> Optional[List[Chunk]]:
+        """Chunks of content when it is long enough to be split, else None"""
+        if self.chunking is None or len(content) <= self.chunking.max_chars:
+            return None
+        return split_into_chunks(
+            content, self.chunking.max_chars, self.chunking.overlap_chars
+        )
+
+    def _run_category(
+        self,
+        category: str,
+        check,
+        content: str,
+        chunks: Optional[List[Chunk]],
+        timings: Optional[AnalysisTimings] = None,
+        plan: Optional[RevisionPlan] = None,
+    ) -> List[AnalysisResult]:
+        """Run one check on the whole content, or on every chunk and merge them"""
+        if plan is not None and category in plan.categories:
+            return self._run_segments(category, check, plan, timings)
+        if chunks is None or category not in self.chunking.categories:
+            return self._run_check(category, check, content, timings)
+
+        # The client is thread-safe, so the chunks are checked at the same time
+        workers = min(len(chunks), self.chunking.max_parallel)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_chunk = list(
+                pool.map(
+                    lambda chunk: self._run_check(
+                        category,
+                        check,
+                        chunk.text,
+                        timings,
+                        f"part {chunk.index + 1}/{len(chunks)}",
+                    ),
+                    chunks,
+                )
+            )
+        return merge_chunk_results(per_chunk)
+
+    def _run_segments(
+        self,
+        category: str,
+        check,
+        plan: RevisionPlan,
+        timings: Optional[AnalysisTimings] = None,
+    ) -> List[AnalysisResult]:
+        """Run a check on the segments that changed and merge in the kept findings"""
+        pending = plan.pending(category)
+        fresh = {}
+        if pending:
+            workers = min(len(pending), self.revisions.policy.max_parallel)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                per_segment = list(
+                    pool.map(
+                        lambda segment: self._run_check(
+                            category,
+                            check,
+                            segment.text,
+                            timings,
+                            f"segment {segment.index + 1}/{len(plan.segments)}",
+                        ),
+                        pending,
+                    )
+                )
+            for segment, results in zip(pending, per_segment):
+                plan.record(category, segment, results)
+                fresh[segment.id] = results
+        return plan.merge(category, fresh)
+
+    def _analyze(
+        self,
+        submission: ScriptSubmission,
+        timings: Optional[AnalysisTimings] = None,
+        rulepack: Optional[CompiledRulepack] = None,
+        match: Optional[NearDuplicateMatch] = None,
+        plan: Optional[RevisionPlan] = None,
+    ) -> Dict[str, List[AnalysisResult]]:
+        """Main analysis method that runs all checks, or those earlier results lack"""
+        if rulepack is None:
+            rulepack = self.rulepacks.get(submission.brief_type)
+        report = None
+        if self.prescreen_policy is not None:
+            report = prescreen_script(submission.content, rulepack.prescreen)
+        chunks = self._chunks(submission.content)
+        if plan is not None and plan.previous is not None:
+            reused = plan.reused()
+        else:
+            reused = match.reused() if match is not None else {}
+
+        if report and report.hard_hit and self.prescreen_policy.reject_on_hard_hit:
+            # Zero-tolerance terms found locally, only run the checks still wanted
+            results = {
+                category: (
+                    reused[category]
+                    if category in reused
+                    else self._run_category(
+                        category, check, submission.content, chunks, timings, plan
+                    )
+                )
+                for category, check in self._checks(rulepack).items()
+                if category in self.prescreen_policy.checks_after_hard_hit
+            }
+            results[PRESCREEN_CATEGORY] = report.results
+            return {"status": "REJECTED", "details": results}
+
+        # Chunked scripts, per-segment checks and partial re-runs always take
+        # the per-check path
+        if self.consolidated and chunks is None and plan is None and match is None:
+            results = self._run_check(
+                "consolidated",
+                partial(self._check_consolidated, rulepack=rulepack),
+                submission.content,
+                timings,
+            )
+        else:
+            results = {
+                category: (
+                    reused[category]
+                    if category in reused
+                    else self._run_category(
+                        category, check, submission.content, chunks, timings, plan
+                    )
+                )
+                for category, check in self._checks(rulepack).items()
+            }
+        if report:
+            results[PRESCREEN_CATEGORY] = report.results
 
         # If any brand safety check fails, mark the entire submission as failed
-        if any(not result.passed for result in results["brand safety"]):
+        if (report and report.hard_hit) or any(
+            not result.passed for result in results["brand safety"]
+        ):
             return {"status": "REJECTED", "details": results}
 
         return {"status": "APPROVED", "details": results}
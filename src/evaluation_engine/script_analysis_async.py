@@ -1,242 +1,344 @@
-from enum import Enum
+import asyncio
 import sys
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
-from openai import AsyncOpenAI
+import time
+from functools import partial
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple, Union
 
 sys.path.append("./")
 
+from src.evaluation_engine.analysis_cache import (
+    AnalysisCache,
+    is_cacheable,
+    make_cache_key,
+)
 from src.evaluation_engine.analysis_result import AnalysisResult
-from src.evaluation_engine.criteria import (
-    AVOID_ELEMENTS,
-    CORE_REQUIREMENTS,
-    SCRIPT_FLOW,
+from src.evaluation_engine.bulk_analysis import BulkAnalysisItem, BulkAnalysisSummary
+from src.evaluation_engine.cascade import ModelCascade
+from src.evaluation_engine.chunking import (
+    Chunk,
+    ChunkingPolicy,
+    format_span,
+    merge_chunk_results,
+    split_into_chunks,
 )
-from src.evaluation_engine.script_submission import ScriptSubmission
-from src.evaluation_engine.helpers import (
-    check_section_requirements,
-    extract_feedback,
-    extract_section,
-    extract_severity,
-    extract_suggestions,
+from src.evaluation_engine.consolidated import split_consolidated_sections
+from src.evaluation_engine.near_duplicates import (
+    NearDuplicateIndex,
+    NearDuplicateMatch,
+    ScriptFingerprint,
+)
+from src.evaluation_engine.media_ingestion import TranscriptChunk
+from src.evaluation_engine.instrumentation import (
+    AnalysisTimings,
+    emit_emf,
+    measure_parse,
+    record_check,
+    record_completion,
+)
+from src.evaluation_engine.prescreen import (
+    PRESCREEN_CATEGORY,
+    PrescreenPolicy,
+    prescreen_script,
 )
+from src.evaluation_engine.resilience import Resilience
+from src.evaluation_engine.revisions import RevisionPlan, RevisionStore
+from src.evaluation_engine.rulepacks import (
+    CompiledRulepack,
+    RulepackRegistry,
+    default_registry,
+)
+from src.evaluation_engine.script_submission import ScriptSubmission
+from src.evaluation_engine.single_flight import SingleFlight
 
+# Order of the categories in the result dict, independent of completion order
+CHECK_CATEGORIES = [
+    "brand safety",
+    "core requirements",
+    "script flow",
+    "avoided elements",
+]
 
-class ScriptAnalyzer:
-    def __init__(self, openai_api_key: str):
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
-
-    async def _check_brand_safety(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for brand safety concerns. This is critical as Milanote has strict content guidelines.
-
-        Check for ANY presence of:
-        1. Adult Content:
-           - Explicit themes
-           - Adult language
-           - Inappropriate imagery references
-           - Suggestive content
-
-        2. Political Content:
-           - Politically polarizing topics
-           - Controversial political statements
-           - Political bias or advocacy
-           - Divisive political commentary
-
-        3. Harassment/Attacks:
-           - Personal attacks
-           - Targeted harassment
-           - Negative comments about individuals/groups
-           - Discriminatory language
-
-        4. Misinformation:
-           - Unverified theories presented as facts
-           - Conspiracy theories
-           - Unsubstantiated claims
-           - Misleading information
-
-        Script:
-        {content}
-
-        For each category:
-        1. Flag ANY presence of problematic content (even subtle references)
-        2. Mark severity (Low/Medium/High)
-        3. Quote specific problematic phrases or references
-        4. Indicate if the content is completely brand-safe or needs modification
-
-        This is a zero-tolerance check - any presence of these elements should result in immediate flagging.
-        """
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,  # Lower temperature for more conservative/consistent checking
+class ScriptAnalyzer:
+    model = "gpt-4o-mini"
+    temperature = 0.3  # Lower temperature for more conservative/consistent checking
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        concurrent: bool = True,
+        check_timeout: Optional[float] = 60.0,
+        consolidated: bool = False,
+        cache: Optional[AnalysisCache] = None,
+        max_openai_calls: Optional[int] = None,
+        prescreen_policy: Optional[PrescreenPolicy] = None,
+        base_url: Optional[str] = None,
+        emit_metrics: bool = False,
+        chunking: Optional[ChunkingPolicy] = None,
+        resilience: Optional[Resilience] = None,
+        rulepacks: Optional[RulepackRegistry] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        revisions: Optional[RevisionStore] = None,
+        cascade: Optional[ModelCascade] = None,
+        http_client=None,
+        single_flight: Optional[SingleFlight] = None,
+    ):
+        # Imported here so loading this module does not pay for the SDK import
+        from openai import AsyncOpenAI
+
+        # http_client: connection pool to use instead of the SDK's default one
+        self.openai_client = AsyncOpenAI(
+            api_key=openai_api_key, base_url=base_url, http_client=http_client
         )
+        if resilience is not None:
+            # Retries are handled by the resilience layer instead of the SDK
+            self.openai_client = self.openai_client.with_options(max_retries=0)
+        # Run the four checks at the same time instead of one after another
+        self.concurrent = concurrent
+        # Seconds each check may take before it is reported as an error
+        self.check_timeout = check_timeout
+        # Ask for all four checks in one request instead of four separate ones
+        self.consolidated = consolidated
+        # Optional result cache shared between analyzer instances
+        self.cache = cache
+        # Upper bound on OpenAI requests in flight across every script analyzed
+        self._call_semaphore = (
+            asyncio.Semaphore(max_openai_calls) if max_openai_calls else None
+        )
+        self.last_bulk_summary: Optional[BulkAnalysisSummary] = None
+        # Local lexicon check run on the raw script before any model call
+        self.prescreen_policy = prescreen_policy
+        # Print per-check token, latency and cost metrics as CloudWatch EMF lines
+        self.emit_metrics = emit_metrics
+        # Split long scripts and run the local checks on every chunk in parallel
+        self.chunking = chunking
+        # Retries, hedging and circuit breaking shared by every check
+        self.resilience = resilience
+        # Per-brand prompts and pass rules, picked by the submission's brief type
+        self.rulepacks = rulepacks or default_registry()
+        # Answers lightly edited resubmissions from earlier analyses (needs cache)
+        self.near_duplicates = near_duplicates
+        # Re-checks only what changed since the creator's previous revision
+        self.revisions = revisions
+        # Cheap first pass per check, ambiguous answers go to a stronger model
+        self.cascade = cascade
+        # Identical submissions in flight at once share one analysis
+        self.single_flight = single_flight
+
+    @property
+    def prompt_version(self) -> str:
+        """Prompt version of the default brand's rulepack"""
+        return self.rulepacks.get().prompt_version
+
+    def _rulepack(self, rulepack: Optional[CompiledRulepack]) -> CompiledRulepack:
+        return rulepack if rulepack is not None else self.rulepacks.get()
+
+    def _checks(self, rulepack: Optional[CompiledRulepack] = None) -> Dict:
+        return {
+            category: partial(check, rulepack=rulepack)
+            for category, check in (
+                ("brand safety", self._check_brand_safety),
+                ("core requirements", self._check_core_requirements),
+                ("script flow", self._check_script_flow),
+                ("avoided elements", self._check_avoided_elements),
+            )
+        }
 
-        # Process the response
-        analysis = response.choices[0].message.content
-        return self._process_brand_safety_analysis(analysis)
-
-    async def _check_core_requirements(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for how it introduces and describes Milanote.
-
-        Key aspects to evaluate:
-        1. Introduction of Milanote:
-           - Looking for descriptions that convey Milanote is a tool for organizing creative projects
-           - Accept variations that capture the same meaning (e.g., "platform for organizing creative work", "creative organization tool")
-           - The core message should emphasize both "organizing" and "creative projects"
-
-        2. Product Description and Features:
-           - Should have description about Milanote
-           - Can be described in the creator's own words/style
+    async def _create_completion(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ):
+        if self.resilience is None:
+            return await self._send_completion(messages, model)
+        return await self.resilience.call_async(
+            lambda timeout: self._send_completion(messages, model, timeout)
+        )
 
-        Note: The script might not contain explicit screen direction cues like "[Screen: Show Logo]" - focus on the spoken/narration content.
+    async def _send_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        if self._call_semaphore is None:
+            return await self._request_completion(messages, model, timeout)
+
+        async with self._call_semaphore:
+            return await self._request_completion(messages, model, timeout)
+
+    async def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        model = model or self.model
+        # Without one, the client's own timeout applies
+        options = {"timeout": timeout} if timeout is not None else {}
+        start = time.perf_counter()
+        async with self.openai_client.chat.completions.with_streaming_response.create(
+            model=model,
+            messages=messages,
+            temperature=self.temperature,
+            **options,
+        ) as raw_response:
+            # The headers have arrived, the body has not been read yet
+            ttfb = time.perf_counter() - start
+            response = await raw_response.parse()
+        record_completion(model, response, ttfb, raw_response.retries_taken)
+        return response
+
+    async def _complete_check(
+        self, check: str, prompt: List[Dict[str, str]], process, rulepack
+    ) -> List[AnalysisResult]:
+        """Ask for one check and process the answer, escalated when ambiguous"""
+        first_model = None
+        if self.cascade is not None:
+            first_model, _ = self.cascade.route(check, self.model)
+        response = await self._create_completion(prompt, first_model)
+        answer = response.choices[0].message.content
+        with measure_parse():
+            results = process(answer, rulepack)
+        return await self._escalate(check, prompt, process, rulepack, answer, results)
+
+    async def _escalate(
+        self,
+        check: str,
+        prompt: List[Dict[str, str]],
+        process,
+        rulepack,
+        answer: str,
+        results: List[AnalysisResult],
+    ) -> List[AnalysisResult]:
+        """The stronger model's results when the cascade finds the answer ambiguous"""
+        if self.cascade is None:
+            return results
+        _, escalation = self.cascade.route(check, self.model)
+        reasons = []
+        if escalation is not None:
+            with measure_parse():
+                reasons = self.cascade.ambiguities(check, answer or "", rulepack)
+        self.cascade.record(check, reasons, escalation)
+        if not reasons:
+            return results
+        response = await self._create_completion(prompt, escalation)
+        with measure_parse():
+            return process(response.choices[0].message.content, rulepack)
 
-        Script:
-        {content}
+    def _build_brand_safety_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("brand safety", content)
 
-        Provide analysis of:
-        1. How effectively the script introduces Milanote (quote the relevant text)
-        2. Whether the core message is conveyed, even if using different phrasing
-        3. Explicity state which key aspects are present or not.
-        """
+    async def _check_brand_safety(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_brand_safety_prompt(content, rulepack)
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+        return await self._complete_check(
+            "brand safety", prompt, self._process_brand_safety_analysis, rulepack
         )
 
-        # Process response with more flexible matching
-        analysis = response.choices[0].message.content
-        return self._process_core_requirements_analysis(analysis)
-
-    async def _check_script_flow(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Analyze the following script for content flow and narrative structure. 
-        Note: The script might not contain explicit screen directions - focus on the narrative content.
-
-        Expected content elements (can be in any natural order):
-        1. Introduction of Milanote
-           - Should introduce the tool and its purpose
-
-        2. Personal Usage Example
-           - Should describe how the creator uses Milanote
-           - Should mention specific use cases or projects
-           - Visual elements like board demonstrations may be implied in the narrative
-
-        3. Feature Descriptions
-           - Should mention key features (templates, collaboration, etc.)
-           - Should explain benefits in creator's own style
-           - Details should be presented in an accessible way
-
-        4. Audience Benefits
-           - Should explain how viewers can use Milanote
-           - May highlight the presence of existing templates for different kinds of use cases or projects
-           - Should mention different use cases or user types
-           - Should mention about how teams can ollaborate and share work
-
-        5. Call to Action
-           - Must encourage audience to use Milanote
-           - Must mention it's free
-           - Must reference sign-up process (not download)
-
-        Script:
-        {content}
-
-        Analyze:
-        1. Whether each key element is present in the narrative
-        2. How naturally the elements flow together
-        3. Whether the script feels authentic to the creator while covering key points
-        4. Any missing essential information
-        """
+    def _build_core_requirements_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("core requirements", content)
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+    async def _check_core_requirements(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_core_requirements_prompt(content, rulepack)
+
+        return await self._complete_check(
+            "core requirements",
+            prompt,
+            self._process_core_requirements_analysis,
+            rulepack,
         )
 
-        # Process the response
-        analysis = response.choices[0].message.content
-        return self._process_script_flow_analysis(analysis)
+    def _build_script_flow_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("script flow", content)
 
-    async def _check_avoided_elements(self, content: str) -> List[AnalysisResult]:
-        prompt = f"""
-        Review the following script for problematic elements, focusing on the actual content rather than formatting or screen directions.
-
-        Check for these issues while allowing for natural variation in expression:
-
-        1. Content Problems:
-           - Too focused on YouTube-specific content
-           - Missing essential information about Milanote
-           - Incorrect feature descriptions
-           - Confusing or misleading explanations
-
-        2. Tone/Style Issues:
-           - Overly promotional language
-           - Inauthentic or forced delivery
-           - Too technical or complicated explanation
+    async def _check_script_flow(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_script_flow_prompt(content, rulepack)
 
-        Script:
-        {content}
+        return await self._complete_check(
+            "script flow", prompt, self._process_script_flow_analysis, rulepack
+        )
 
-        Provide:
-        1. Any identified issues that would hurt the effectiveness of the sponsorship
-        2. Whether the script maintains authenticity while meeting requirements
-        3. Suggestions for improvement that preserve the creator's voice
-        """
+    def _build_avoided_elements_prompt(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[Dict[str, str]]:
+        return self._rulepack(rulepack).render("avoided elements", content)
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+    async def _check_avoided_elements(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
+        rulepack = self._rulepack(rulepack)
+        prompt = self._build_avoided_elements_prompt(content, rulepack)
+
+        return await self._complete_check(
+            "avoided elements",
+            prompt,
+            self._process_avoided_elements_analysis,
+            rulepack,
         )
 
-        analysis = response.choices[0].message.content
+    async def _check_consolidated(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> Dict[str, List[AnalysisResult]]:
+        rulepack = self._rulepack(rulepack)
+        prompt = rulepack.render("consolidated", content)
+
+        first_model = None
+        if self.cascade is not None:
+            first_model, _ = self.cascade.route("consolidated", self.model)
+        response = await self._create_completion(prompt, first_model)
+
+        processors = {
+            "brand safety": self._process_brand_safety_analysis,
+            "core requirements": self._process_core_requirements_analysis,
+            "script flow": self._process_script_flow_analysis,
+            "avoided elements": self._process_avoided_elements_analysis,
+        }
+        # Hand each section to the same processing used by the individual checks
+        with measure_parse():
+            sections = split_consolidated_sections(response.choices[0].message.content)
+            results = {
+                category: process(sections[category], rulepack)
+                for category, process in processors.items()
+            }
+        if self.cascade is None:
+            return results
 
-        return self._process_avoided_elements_analysis(analysis)
+        # Ambiguous sections are asked again on their own, with the check's prompt
+        escalated = await asyncio.gather(
+            *(
+                self._escalate(
+                    category,
+                    rulepack.render(category, content),
+                    processors[category],
+                    rulepack,
+                    sections[category],
+                    category_results,
+                )
+                for category, category_results in results.items()
+            )
+        )
+        return dict(zip(results, escalated))
 
     def _process_brand_safety_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for brand safety analysis"""
         try:
-            results = []
-
-            # Brand safety categories
-            categories = {
-                "adult content": ["explicit", "inappropriate"],
-                "political": ["political", "polarizing", "controversial"],
-                "harassment": ["personal attack", "discriminatory"],
-                "misinformation": ["unverified", "conspiracy", "misleading"],
-            }
-
-            for category, keywords in categories.items():
-                category_text = extract_section(openai_response, category)
-                if category_text:
-                    # Any mention of issues in these categories should fail
-                    has_issues = any(
-                        keyword in category_text.lower() for keyword in keywords
-                    )
-                    severity = extract_severity(category_text)
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{category}",
-                            passed=not has_issues,
-                            feedback=extract_feedback(category_text),
-                            suggestions=(
-                                extract_suggestions(category_text)
-                                if has_issues
-                                else None
-                            ),
-                            severity=severity if has_issues else None,
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate("brand safety", openai_response)
 
         except Exception as e:
             return [
@@ -249,74 +351,13 @@ class ScriptAnalyzer:
             ]
 
     def _process_core_requirements_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for core requirements analysis"""
         try:
-            results = []
-
-            # Extract introduction analysis
-            if "introduction" in openai_response.lower():
-                intro_text = extract_section(openai_response, "introduction")
-
-                # Check if core message is conveyed (allowing for variations)
-                core_message_conveyed = any(
-                    [
-                        "tool for organizing" in intro_text.lower(),
-                        "creative organization" in intro_text.lower(),
-                        "organize creative" in intro_text.lower(),
-                        "creative projects" in intro_text.lower(),
-                    ]
-                )
-
-                results.append(
-                    AnalysisResult(
-                        criteria="introduction",
-                        passed=core_message_conveyed,
-                        feedback=extract_feedback(intro_text),
-                        suggestions=(
-                            extract_suggestions(intro_text)
-                            if not core_message_conveyed
-                            else None
-                        ),
-                    )
-                )
-
-            # Extract product description analysis
-            if "product description" in openai_response.lower():
-                desc_text = extract_section(openai_response, "product description")
-
-                # Check for key product elements
-                has_canvas = any(
-                    keyword in text.lower()
-                    for keyword in ["canvas", "workspace", "mind map", "plan"]
-                    for text in [desc_text, intro_text]
-                )
-                has_planning = any(
-                    keyword in text.lower()
-                    for keyword in ["planning", "brainstorming", "organizing"]
-                    for text in [desc_text, intro_text]
-                )
-                has_collab = any(
-                    keyword in text.lower()
-                    for keyword in ["collab", "team work", "members"]
-                    for text in [desc_text, intro_text]
-                )
-
-                results.append(
-                    AnalysisResult(
-                        criteria="product_description",
-                        passed=all([has_canvas, has_planning, has_collab]),
-                        feedback=extract_feedback(desc_text),
-                        suggestions=(
-                            extract_suggestions(desc_text)
-                            if not all([has_canvas, has_planning, has_collab])
-                            else None
-                        ),
-                    )
-                )
-
-            return results
+            return self._rulepack(rulepack).evaluate(
+                "core requirements", openai_response
+            )
 
         except Exception as e:
             return [
@@ -330,36 +371,13 @@ class ScriptAnalyzer:
                 )
             ]
 
-    def _process_avoided_elements_analysis(self, analysis):
+    def _process_avoided_elements_analysis(
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> List[AnalysisResult]:
         try:
-            results = []
-
-            categories = {
-                "content problems": ["missing", "incorrect", "confusing"],
-                "tone": ["promotional", "inauthentic", "technical"],
-            }
-
-            for category, keywords in categories.items():
-                category_text = extract_section(analysis, category)
-                if category_text:
-                    has_issues = any(
-                        keyword in category_text.lower() for keyword in keywords
-                    )
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{category}",
-                            passed=not has_issues,
-                            feedback=extract_feedback(category_text),
-                            suggestions=(
-                                extract_suggestions(category_text)
-                                if has_issues
-                                else None
-                            ),
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate(
+                "avoided elements", openai_response
+            )
 
         except Exception as e:
             return [
@@ -374,41 +392,11 @@ class ScriptAnalyzer:
             ]
 
     def _process_script_flow_analysis(
-        self, openai_response: str
+        self, openai_response: str, rulepack: Optional[CompiledRulepack] = None
     ) -> List[AnalysisResult]:
         """Process OpenAI response for script flow analysis"""
         try:
-            results = []
-
-            # Expected sections in the flow
-            sections = [
-                "introduction",
-                "personal usage",
-                "feature descriptions",
-                "audience benefits",
-                "Call to Action",
-            ]
-
-            for section in sections:
-                section_text = extract_section(openai_response, section)
-                if section_text:
-                    # Check section requirements based on type
-                    passed = check_section_requirements(section, section_text)
-
-                    results.append(
-                        AnalysisResult(
-                            criteria=f"{section}",
-                            passed=passed,
-                            feedback=extract_feedback(section_text),
-                            suggestions=(
-                                extract_suggestions(section_text)
-                                if not passed
-                                else None
-                            ),
-                        )
-                    )
-
-            return results
+            return self._rulepack(rulepack).evaluate("script flow", openai_response)
 
         except Exception as e:
             return [
@@ -420,21 +408,600 @@ class ScriptAnalyzer:
                 )
             ]
 
+    async def _run_check(
+        self,
+        category: str,
+        check,
+        content: str,
+        timings: Optional[AnalysisTimings] = None,
+        part: Optional[str] = None,
+    ):
+        """Run a single check, turning timeouts and failures into an error result"""
+        name = f"{category} ({part})" if part else category
+        try:
+            with record_check(timings, category, self.model, part):
+                if self.check_timeout is None:
+                    return await check(content)
+                return await asyncio.wait_for(
+                    check(content), timeout=self.check_timeout
+                )
+
+        except asyncio.TimeoutError:
+            feedback = (
+                f"Timed out after {self.check_timeout}s while running {name} check"
+            )
+        except Exception as e:
+            feedback = f"Error running {name} check: {str(e)}"
+
+        return [
+            AnalysisResult(
+                criteria="error",
+                passed=False,
+                feedback=feedback,
+                suggestions=[f"Please review {name} manually or resubmit the script"],
+            )
+        ]
+
+    def _cache_version(self, rulepack: Optional[CompiledRulepack] = None) -> str:
+        """Everything besides the script that an analysis depends on"""
+        rulepack = self._rulepack(rulepack)
+        prompt_version = f"{rulepack.prompt_version}+rulepack:{rulepack.key}"
+        if self.consolidated:
+            prompt_version += "+consolidated"
+        if self.prescreen_policy is not None:
+            policy = self.prescreen_policy
+            prompt_version += f"+prescreen:{policy.reject_on_hard_hit}:" + ",".join(
+                policy.checks_after_hard_hit
+            )
+        if self.chunking is not None:
+            chunking = self.chunking
+            prompt_version += (
+                f"+chunked:{chunking.max_chars}:{chunking.overlap_chars}:"
+                + ",".join(chunking.categories)
+            )
+        if self.revisions is not None:
+            prompt_version += f"+revisions:{self.revisions.version()}"
+        if self.cascade is not None:
+            prompt_version += f"+cascade:{self.cascade.version()}"
+        return prompt_version
+
+    def cache_key(
+        self, content: str, rulepack: Optional[CompiledRulepack] = None
+    ) -> str:
+        return make_cache_key(
+            content, self._cache_version(rulepack), self.model, self.temperature
+        )
+
+    def _results_namespace(self, rulepack: CompiledRulepack) -> str:
+        """Scope in which earlier results can be reused for another script"""
+        return f"{self._cache_version(rulepack)}|{self.model}|{self.temperature}"
+
+    def _store(
+        self,
+        key: Optional[str],
+        analysis: Dict,
+        rulepack: CompiledRulepack,
+        match: Optional[NearDuplicateMatch] = None,
+        fingerprint: Optional[ScriptFingerprint] = None,
+        plan: Optional[RevisionPlan] = None,
+    ) -> Dict:
+        """Mark reused results and remember the analysis for later scripts"""
+        if match is not None:
+            analysis["near_duplicate"] = match.summary()
+        if plan is not None:
+            analysis["revision"] = plan.summary(analysis["details"])
+        if not is_cacheable(analysis):
+            return analysis
+        if plan is not None:
+            self.revisions.record(plan, analysis)
+        if key is not None:
+            self.cache.put(key, analysis)
+            if fingerprint is not None:
+                self.near_duplicates.add(
+                    fingerprint, self._results_namespace(rulepack), key
+                )
+        return analysis
+
+    def _find_near_duplicate(
+        self, content: str, rulepack: CompiledRulepack
+    ) -> Tuple[Optional[ScriptFingerprint], Optional[NearDuplicateMatch]]:
+        if self.near_duplicates is None:
+            return None, None
+        fingerprint = self.near_duplicates.fingerprint(content, rulepack)
+        match = self.near_duplicates.find(
+            fingerprint,
+            self._results_namespace(rulepack),
+            self.cache,
+            rulepack,
+        )
+        return fingerprint, match
+
+    def _plan_revision(
+        self, submission: ScriptSubmission, rulepack: CompiledRulepack, fresh: bool
+    ) -> Optional[RevisionPlan]:
+        if self.revisions is None:
+            return None
+        return self.revisions.plan(
+            submission.creator_name,
+            self._results_namespace(rulepack),
+            submission.content,
+            rulepack,
+            fresh=fresh,
+        )
+
     async def analyze_script(
-        self, submission: ScriptSubmission
+        self, submission: ScriptSubmission, bypass_cache: bool = False
     ) -> Dict[str, List[AnalysisResult]]:
-        """Main analysis method that runs all checks"""
-        results = {
-            "brand safety": await self._check_brand_safety(submission.content),
-            "core requirements": await self._check_core_requirements(
-                submission.content
-            ),
-            "script flow": await self._check_script_flow(submission.content),
-            "avoided elements": await self._check_avoided_elements(submission.content),
-        }
+        """Main analysis method, served from the cache when an identical script was seen"""
+        if self.single_flight is None:
+            return await self._analyze_script(submission, bypass_cache)
+        rulepack = self.rulepacks.get(submission.brief_type)
+        key = self.cache_key(submission.content, rulepack)
+        if self.revisions is not None:
+            # Revisions are tracked per creator
+            key += "|" + " ".join(submission.creator_name.lower().split())
+        if bypass_cache:
+            key += "|fresh"
+        return await self.single_flight.run(
+            key, partial(self._analyze_script, submission, bypass_cache)
+        )
+
+    async def _analyze_script(
+        self, submission: ScriptSubmission, bypass_cache: bool = False
+    ) -> Dict[str, List[AnalysisResult]]:
+        # The last event of the stream is the complete analysis
+        async for event in self.analyze_script_stream(submission, bypass_cache):
+            analysis = event
+        return analysis
+
+    async def analyze_script_stream(
+        self, submission: ScriptSubmission, bypass_cache: bool = False
+    ) -> AsyncIterator[Dict]:
+        """Analyze a script, yielding each category as soon as its check completes.
+
+        Yields {"category": ..., "results": [...]} once per category, then the
+        same {"status": ..., "details": ..., "timings": ...} dict that
+        analyze_script returns.
+        """
+        timings = AnalysisTimings()
+        rulepack = self.rulepacks.get(submission.brief_type)
+        key = None
+        if self.cache is not None and not bypass_cache:
+            key = self.cache_key(submission.content, rulepack)
+            cached = self.cache.get(key)
+            if cached is not None:
+                for category, results in cached["details"].items():
+                    yield {"category": category, "results": results}
+                timings.cache_hit = True
+                yield self._finalize(cached, timings, rulepack)
+                return
+
+        # The creator's previous revision, or else an earlier lightly edited
+        # script, may answer some or all checks
+        plan = self._plan_revision(submission, rulepack, fresh=bypass_cache)
+        fingerprint = match = None
+        if key is not None and (plan is None or plan.previous is None):
+            fingerprint, match = self._find_near_duplicate(submission.content, rulepack)
+        if match is not None and not match.rerun:
+            for category, results in match.analysis["details"].items():
+                yield {"category": category, "results": results}
+            analysis = self._store(
+                key, match.analysis, rulepack, match, fingerprint, plan
+            )
+            yield self._finalize(analysis, timings, rulepack)
+            return
+        if plan is not None and plan.previous is not None:
+            reused = plan.reused()
+        else:
+            reused = match.reused() if match is not None else {}
+
+        results = {}
+        report = None
+        categories = CHECK_CATEGORIES
+        if self.prescreen_policy is not None:
+            report = prescreen_script(submission.content, rulepack.prescreen)
+            # Local findings are ready before any model call has returned
+            yield {"category": PRESCREEN_CATEGORY, "results": report.results}
+
+            if report.hard_hit and self.prescreen_policy.reject_on_hard_hit:
+                # Zero-tolerance terms found locally, only run the checks still wanted
+                categories = [
+                    category
+                    for category in CHECK_CATEGORIES
+                    if category in self.prescreen_policy.checks_after_hard_hit
+                ]
+
+        for category in categories:
+            if category in reused:
+                results[category] = reused[category]
+                yield {"category": category, "results": results[category]}
+
+        async for category, category_results in self._iter_checks(
+            submission.content,
+            [category for category in categories if category not in results],
+            timings,
+            rulepack,
+            plan,
+            match,
+        ):
+            results[category] = category_results
+            yield {"category": category, "results": category_results}
+
+        # Same category order whichever check finished first
+        details = {category: results[category] for category in categories}
+        if report:
+            details[PRESCREEN_CATEGORY] = report.results
 
         # If any brand safety check fails, mark the entire submission as failed
-        if any(not result.passed for result in results["brand safety"]):
-            return {"status": "REJECTED", "details": results}
+        if (report and report.hard_hit) or any(
+            not result.passed for result in details.get("brand safety", [])
+        ):
+            analysis = {"status": "REJECTED", "details": details}
+        else:
+            analysis = {"status": "APPROVED", "details": details}
+
+        self._store(key, analysis, rulepack, match, fingerprint, plan)
+        yield self._finalize(analysis, timings, rulepack)
+
+    async def analyze_transcript_stream(
+        self, chunks: AsyncIterator[TranscriptChunk], brief_type: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """Analyze a transcript while it is still being transcribed.
+
+        The chunked checks start on every chunk as soon as it arrives, the
+        others on the whole transcript after the last one. Yields a
+        {"chunk", "start_seconds", "end_seconds", "transcript"} event per chunk
+        and a {"finding", "start_seconds", "end_seconds", "results"} event with
+        the failed criteria of every chunk check that has some, as they come;
+        then one event per category as in analyze_script_stream, and the
+        analysis with the full "transcript" added. Transcripts are not cached.
+        """
+        timings = AnalysisTimings()
+        rulepack = self.rulepacks.get(brief_type)
+        checks = self._checks(rulepack)
+        chunking = self.chunking or ChunkingPolicy()
+        limit = asyncio.Semaphore(chunking.max_parallel)
+        per_chunk = {
+            category: []
+            for category in CHECK_CATEGORIES
+            if category in chunking.categories
+        }
+        spans = []
+        transcripts = []
+        # Chunk and finding events, in the order they happen; None once the
+        # last chunk is in
+        events = asyncio.Queue()
+
+        async def run_chunk(category: str, chunk: TranscriptChunk):
+            async with limit:
+                results = await self._run_check(
+                    category,
+                    checks[category],
+                    chunk.text,
+                    timings,
+                    format_span(chunk.start_seconds, chunk.end_seconds),
+                )
+            failed = [result for result in results if not result.passed]
+            if failed:
+                events.put_nowait(
+                    {
+                        "finding": category,
+                        "start_seconds": chunk.start_seconds,
+                        "end_seconds": chunk.end_seconds,
+                        "results": failed,
+                    }
+                )
+            return results
+
+        async def read_chunks():
+            try:
+                async for chunk in chunks:
+                    spans.append((chunk.start_seconds, chunk.end_seconds))
+                    transcripts.append(chunk.transcript)
+                    for category in per_chunk:
+                        task = asyncio.ensure_future(run_chunk(category, chunk))
+                        per_chunk[category].append(task)
+                        tasks.append(task)
+                    events.put_nowait(
+                        {
+                            "chunk": chunk.index,
+                            "start_seconds": chunk.start_seconds,
+                            "end_seconds": chunk.end_seconds,
+                            "transcript": chunk.transcript,
+                        }
+                    )
+            finally:
+                events.put_nowait(None)
 
-        return {"status": "APPROVED", "details": results}
+        async def merged(category: str):
+            per_span = await asyncio.gather(*per_chunk[category])
+            return category, merge_chunk_results(list(per_span), spans)
+
+        async def whole(category: str, transcript: str):
+            return category, await self._run_check(
+                category, checks[category], transcript, timings
+            )
+
+        tasks = []
+        reader = asyncio.ensure_future(read_chunks())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            # Raises what stopped the transcription, if anything did
+            await reader
+            transcript = "\n\n".join(text for text in transcripts if text)
+            if not transcript:
+                raise ValueError("No speech was transcribed")
+
+            categories = [
+                asyncio.ensure_future(
+                    merged(category)
+                    if category in per_chunk
+                    else whole(category, transcript)
+                )
+                for category in CHECK_CATEGORIES
+            ]
+            tasks += categories
+            results = {}
+            for next_done in asyncio.as_completed(categories):
+                category, category_results = await next_done
+                # A merged category comes after the findings of its chunks
+                while not events.empty():
+                    yield events.get_nowait()
+                results[category] = category_results
+                yield {"category": category, "results": category_results}
+        finally:
+            # Transcription failed, or the consumer stopped listening
+            reader.cancel()
+            for task in tasks:
+                task.cancel()
+
+        details = {category: results[category] for category in CHECK_CATEGORIES}
+        failed = any(not result.passed for result in details["brand safety"])
+        analysis = {
+            "status": "REJECTED" if failed else "APPROVED",
+            "details": details,
+            "transcript": transcript,
+        }
+        yield self._finalize(analysis, timings, rulepack)
+
+    def _finalize(
+        self, analysis: Dict, timings: AnalysisTimings, rulepack: CompiledRulepack
+    ) -> Dict:
+        # Cached analyses keep the version they were produced with
+        analysis.setdefault("prompt_version", rulepack.prompt_version)
+        timings.finish()
+        analysis["timings"] = timings.to_dict()
+        if self.emit_metrics:
+            emit_emf(timings, analysis["status"])
+        return analysis
+
+    def _chunks(self, content: str) -> Optional[List[Chunk]]:
+        """Chunks of content when it is long enough to be split, else None"""
+        if self.chunking is None or len(content) <= self.chunking.max_chars:
+            return None
+        return split_into_chunks(
+            content, self.chunking.max_chars, self.chunking.overlap_chars
+        )
+
+    async def _run_category(
+        self,
+        category: str,
+        check,
+        content: str,
+        chunks: Optional[List[Chunk]],
+        timings: Optional[AnalysisTimings] = None,
+        plan: Optional[RevisionPlan] = None,
+    ) -> List[AnalysisResult]:
+        """Run one check on the whole content, or on every chunk and merge them"""
+        if plan is not None and category in plan.categories:
+            return await self._run_segments(category, check, plan, timings)
+        if chunks is None or category not in self.chunking.categories:
+            return await self._run_check(category, check, content, timings)
+
+        def run(chunk: Chunk):
+            return self._run_check(
+                category,
+                check,
+                chunk.text,
+                timings,
+                f"part {chunk.index + 1}/{len(chunks)}",
+            )
+
+        if not self.concurrent:
+            per_chunk = [await run(chunk) for chunk in chunks]
+        else:
+            # Takes as long as the slowest chunk rather than the whole script
+            limit = asyncio.Semaphore(self.chunking.max_parallel)
+
+            async def limited(chunk: Chunk):
+                async with limit:
+                    return await run(chunk)
+
+            per_chunk = await asyncio.gather(*(limited(chunk) for chunk in chunks))
+        return merge_chunk_results(per_chunk)
+
+    async def _run_segments(
+        self,
+        category: str,
+        check,
+        plan: RevisionPlan,
+        timings: Optional[AnalysisTimings] = None,
+    ) -> List[AnalysisResult]:
+        """Run a check on the segments that changed and merge in the kept findings"""
+        pending = plan.pending(category)
+
+        def run(segment):
+            return self._run_check(
+                category,
+                check,
+                segment.text,
+                timings,
+                f"segment {segment.index + 1}/{len(plan.segments)}",
+            )
+
+        if not self.concurrent:
+            per_segment = [await run(segment) for segment in pending]
+        else:
+            limit = asyncio.Semaphore(self.revisions.policy.max_parallel)
+
+            async def limited(segment):
+                async with limit:
+                    return await run(segment)
+
+            per_segment = await asyncio.gather(
+                *(limited(segment) for segment in pending)
+            )
+        fresh = {}
+        for segment, results in zip(pending, per_segment):
+            plan.record(category, segment, results)
+            fresh[segment.id] = results
+        return plan.merge(category, fresh)
+
+    async def _iter_checks(
+        self,
+        content: str,
+        categories: List[str],
+        timings: Optional[AnalysisTimings] = None,
+        rulepack: Optional[CompiledRulepack] = None,
+        plan: Optional[RevisionPlan] = None,
+        match: Optional[NearDuplicateMatch] = None,
+    ) -> AsyncIterator[Tuple[str, List[AnalysisResult]]]:
+        """Run the checks for the given categories, yielding them as they complete"""
+        rulepack = self._rulepack(rulepack)
+        checks = self._checks(rulepack)
+        chunks = self._chunks(content)
+
+        # A long script would defeat the point of chunking in one combined prompt,
+        # so chunked scripts, per-segment checks and partial re-runs always take
+        # the per-check path
+        if self.consolidated and chunks is None and plan is None and match is None:
+            combined = await self._run_check(
+                "consolidated",
+                partial(self._check_consolidated, rulepack=rulepack),
+                content,
+                timings,
+            )
+            for category in categories:
+                # A failed consolidated call returns one error list for every category
+                yield category, (
+                    combined[category] if isinstance(combined, dict) else combined
+                )
+            return
+
+        if not self.concurrent:
+            for category in categories:
+                yield category, await self._run_category(
+                    category, checks[category], content, chunks, timings, plan
+                )
+            return
+
+        async def tagged(category: str):
+            return category, await self._run_category(
+                category, checks[category], content, chunks, timings, plan
+            )
+
+        tasks = [asyncio.ensure_future(tagged(category)) for category in categories]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer may stop listening (e.g. a disconnected client)
+            for task in tasks:
+                task.cancel()
+
+    async def _analyze_item(
+        self, index: int, submission: ScriptSubmission
+    ) -> BulkAnalysisItem:
+        start = time.perf_counter()
+        try:
+            analysis = await self.analyze_script(submission)
+            return BulkAnalysisItem(
+                index=index,
+                submission=submission,
+                analysis=analysis,
+                elapsed_seconds=time.perf_counter() - start,
+            )
+        except Exception as e:
+            return BulkAnalysisItem(
+                index=index,
+                submission=submission,
+                error=str(e),
+                elapsed_seconds=time.perf_counter() - start,
+            )
+
+    async def analyze_many(
+        self,
+        submissions: Union[Iterable[ScriptSubmission], AsyncIterator[ScriptSubmission]],
+        max_concurrency: int = 8,
+        ordered: bool = False,
+    ) -> AsyncIterator[BulkAnalysisItem]:
+        """Analyze many submissions, yielding each result as it is ready.
+
+        At most max_concurrency submissions are pulled from the iterator and held
+        at once (in flight or, when ordered, waiting for earlier ones), so an
+        arbitrarily long iterator is consumed in bounded memory. A failing
+        submission is yielded with its error set instead of stopping the run.
+        The throughput and failure summary is left in last_bulk_summary.
+        """
+        if hasattr(submissions, "__anext__"):
+            iterator = submissions
+        else:
+            iterator = _as_async_iterator(submissions)
+
+        summary = BulkAnalysisSummary()
+        self.last_bulk_summary = summary
+        start = time.perf_counter()
+        pending: Dict[asyncio.Task, int] = {}
+        finished: Dict[int, BulkAnalysisItem] = {}
+        next_index = 0
+        next_to_yield = 0
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) + len(finished) < max_concurrency:
+                    try:
+                        submission = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.create_task(
+                        self._analyze_item(next_index, submission)
+                    )
+                    pending[task] = next_index
+                    next_index += 1
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=pending.get):
+                    del pending[task]
+                    item = task.result()
+                    summary.record(item)
+                    summary.elapsed_seconds = time.perf_counter() - start
+                    if ordered:
+                        finished[item.index] = item
+                    else:
+                        yield item
+
+                while next_to_yield in finished:
+                    yield finished.pop(next_to_yield)
+                    next_to_yield += 1
+
+        finally:
+            # The consumer may stop early; do not leave analyses running
+            for task in pending:
+                task.cancel()
+            summary.elapsed_seconds = time.perf_counter() - start
+
+
+async def _as_async_iterator(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
@@ -0,0 +1,99 @@
+"""Single-flight coalescing of identical analyses that are in flight at once.
+
+The first request for a key (the analysis cache key: normalized content, prompt
+and rulepack version, model and temperature) starts the analysis in a task of
+its own; identical requests arriving before it finishes await that task instead
+of starting their own OpenAI calls. Once it finishes the key is released, and
+later requests go through the cache as usual.
+
+A waiter that is cancelled (e.g. its client disconnected) only stops waiting;
+the shared analysis is cancelled when its last waiter gives up. Only the first
+waiter to get the analysis back receives it as it is, the others get a shallow
+copy marked "coalesced", so exactly one of them records the verdict even when
+the request that started it was cancelled.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "delivered")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        # Whether a waiter has had the analysis unmarked
+        self.delivered = False
+
+
+class SingleFlight:
+    """Shares one in-flight analysis between the identical requests awaiting it"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        # Analyses started, and requests that joined one instead
+        self.flights = 0
+        self.coalesced = 0
+        # Waiters that gave up, and analyses cancelled as their last one did
+        self.waiters_cancelled = 0
+        self.flights_cancelled = 0
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, analyze: Callable[[], Awaitable[Dict]]) -> Dict:
+        """analyze()'s result, shared with every run of the same key meanwhile"""
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._start(key, analyze)
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            # shield: cancelling one waiter must not cancel the shared task
+            analysis = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.waiters_cancelled += 1
+                if flight.waiters == 1:
+                    self._release(key, flight)
+                    flight.task.cancel()
+                    self.flights_cancelled += 1
+            raise
+        finally:
+            flight.waiters -= 1
+        if flight.delivered:
+            return dict(analysis, coalesced=True)
+        flight.delivered = True
+        return analysis
+
+    def _start(self, key: str, analyze) -> _Flight:
+        flight = _Flight(asyncio.ensure_future(analyze()))
+        self._flights[key] = flight
+        self.flights += 1
+        flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+        return flight
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task):
+        self._release(key, flight)
+        if not task.cancelled():
+            # Retrieved here too, in case every waiter gave up just before
+            task.exception()
+
+    def _release(self, key: str, flight: _Flight):
+        # A cancelled flight may already have been replaced by a new one
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        requests = self.flights + self.coalesced
+        return {
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / requests if requests else None,
+            "waiters_cancelled": self.waiters_cancelled,
+            "flights_cancelled": self.flights_cancelled,
+            "in_flight": self.in_flight(),
+        }
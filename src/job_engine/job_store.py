@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+sys.path.append("./")
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+
+class Job(BaseModel):
+    job_id: str
+    status: str
+    submission: Dict
+    # Check categories finished so far by the current attempt
+    completed: List[str] = []
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    created_at: float
+    updated_at: float
+
+
+class JobStore:
+    """SQLite-backed job queue with leases.
+
+    Workers claim a job by taking a lease on it and must heartbeat before the
+    lease expires. A job whose lease has expired (its worker crashed or hung)
+    can be claimed again by any worker sharing the same database file, so no
+    job is lost. Claims run in an IMMEDIATE transaction, which makes them
+    atomic across processes.
+
+    The queue is a single-host queue: everything that submits, polls or works
+    on jobs has to open the same file on one machine's local disk. SQLite's
+    WAL mode relies on shared memory and file locks that network filesystems
+    (NFS, EFS, SMB) do not provide, so the file must not be shared across
+    hosts, and separate Lambda containers each with their own /tmp never see
+    each other's jobs.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "submission TEXT NOT NULL, completed TEXT NOT NULL DEFAULT '[]', "
+                "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "lease_owner TEXT, lease_expires REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_claimable "
+                "ON jobs (status, lease_expires, created_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, committed and closed on exit
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def submit(self, submission: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, status, submission, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(submission, default=str), now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = 60.0) -> Optional[Job]:
+        """Lease the oldest queued job, or one whose previous lease has expired"""
+        now = time.time()
+        with self._transaction() as connection:
+            while True:
+                row = connection.execute(
+                    "SELECT job_id, attempts FROM jobs WHERE status = ? "
+                    "OR (status = ? AND lease_expires < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                job_id, attempts = row
+                if attempts >= self.max_attempts:
+                    # Crashed every worker that took it, stop retrying
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, "
+                        "lease_expires = NULL, updated_at = ? WHERE job_id = ?",
+                        (FAILED, f"Gave up after {attempts} attempts", now, job_id),
+                    )
+                    continue
+
+                connection.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+                    "completed = '[]', lease_owner = ?, lease_expires = ?, "
+                    "updated_at = ? WHERE job_id = ?",
+                    (RUNNING, worker_id, now + lease_seconds, now, job_id),
+                )
+                return self._get(connection, job_id)
+
+    def _update_owned(self, job_id: str, worker_id: str, assignments: str, values):
+        """Update a job only while the worker still holds its lease"""
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? "
+                "WHERE job_id = ? AND status = ? AND lease_owner = ?",
+                (*values, time.time(), job_id, RUNNING, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = 60.0):
+        return self._update_owned(
+            job_id, worker_id, "lease_expires = ?", (time.time() + lease_seconds,)
+        )
+
+    def record_progress(self, job_id: str, worker_id: str, completed: List[str]):
+        return self._update_owned(
+            job_id, worker_id, "completed = ?", (json.dumps(completed),)
+        )
+
+    def complete(self, job_id: str, worker_id: str, result: Dict):
+        return self._update_owned(
+            job_id,
+            worker_id,
+            "status = ?, result = ?, lease_owner = NULL, lease_expires = NULL",
+            (DONE, json.dumps(result)),
+        )
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        return self._update_owned(
+            job_id,
+            worker_id,
+            "status = ?, error = ?, lease_owner = NULL, lease_expires = NULL",
+            (FAILED, error),
+        )
+
+    def _get(self, connection: sqlite3.Connection, job_id: str) -> Optional[Job]:
+        row = connection.execute(
+            "SELECT job_id, status, submission, completed, result, error, attempts, "
+            "lease_owner, lease_expires, created_at, updated_at "
+            "FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            job_id=row[0],
+            status=row[1],
+            submission=json.loads(row[2]),
+            completed=json.loads(row[3]),
+            result=json.loads(row[4]) if row[4] else None,
+            error=row[5],
+            attempts=row[6],
+            lease_owner=row[7],
+            lease_expires=row[8],
+            created_at=row[9],
+            updated_at=row[10],
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as connection:
+            return self._get(connection, job_id)
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as connection:
+            return dict(
+                connection.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
@@ -0,0 +1,169 @@
+"""Worker processes that drain the job queue.
+
+The queue is a SQLite file on the local disk of the host that also serves the
+job Lambda handlers (see JobStore):
+
+python src/job_engine/worker.py --store /var/lib/jobs/jobs.sqlite --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+from typing import Callable, Optional
+
+sys.path.append("./")
+
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+from src.job_engine.job_store import Job, JobStore
+from src.response_engine.script_analysis_response_handler import (
+    ScriptAnalysisResponseHandler,
+)
+
+
+def default_analyzer() -> ScriptAnalyzer:
+    from src.evaluation_engine.environment import analyzer_options
+
+    # Same settings as the Lambda and the server, rulepacks included
+    return ScriptAnalyzer(**analyzer_options())
+
+
+class LeaseLost(Exception):
+    pass
+
+
+async def _keep_lease(store: JobStore, job: Job, worker_id: str, lease_seconds: float):
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        renewed = await asyncio.to_thread(
+            store.heartbeat, job.job_id, worker_id, lease_seconds
+        )
+        if not renewed:
+            raise LeaseLost(job.job_id)
+
+
+async def _analyze_job(
+    store: JobStore, analyzer: ScriptAnalyzer, job: Job, worker_id: str
+):
+    submission = ScriptSubmission(**job.submission)
+    completed = []
+    analysis = None
+    async for event in analyzer.analyze_script_stream(submission):
+        if "status" in event:
+            analysis = event
+            continue
+        completed.append(event["category"])
+        await asyncio.to_thread(store.record_progress, job.job_id, worker_id, completed)
+
+    if analysis["status"] == "REJECTED":
+        response = ScriptAnalysisResponseHandler.rejection(details=analysis["details"])
+    else:
+        response = ScriptAnalysisResponseHandler.success(details=analysis["details"])
+    body = dict(response["body"], prompt_version=analysis.get("prompt_version"))
+    await asyncio.to_thread(store.complete, job.job_id, worker_id, body)
+
+
+async def process_job(
+    store: JobStore,
+    analyzer: ScriptAnalyzer,
+    job: Job,
+    worker_id: str,
+    lease_seconds: float,
+):
+    """Analyze one claimed job while keeping its lease alive"""
+    work = asyncio.ensure_future(_analyze_job(store, analyzer, job, worker_id))
+    lease = asyncio.ensure_future(_keep_lease(store, job, worker_id, lease_seconds))
+    try:
+        await asyncio.wait([work, lease], return_when=asyncio.FIRST_COMPLETED)
+        if not work.done():
+            # Another worker reclaimed the job, drop this attempt
+            work.cancel()
+            lease.exception()
+            return
+        work.result()
+    except Exception as e:
+        await asyncio.to_thread(store.fail, job.job_id, worker_id, str(e))
+    finally:
+        lease.cancel()
+
+
+async def run_worker(
+    store_path: str,
+    worker_id: Optional[str] = None,
+    concurrency: int = 4,
+    lease_seconds: float = 60.0,
+    poll_interval: float = 1.0,
+    analyzer_factory: Callable[[], ScriptAnalyzer] = default_analyzer,
+    max_idle_polls: Optional[int] = None,
+):
+    """Claim and process jobs until stopped.
+
+    Runs `concurrency` claim loops on one event loop sharing one analyzer. With
+    max_idle_polls set, the worker exits once the queue stays empty that long.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    store = JobStore(store_path)
+    analyzer = analyzer_factory()
+
+    async def loop(slot: int):
+        idle_polls = 0
+        while max_idle_polls is None or idle_polls < max_idle_polls:
+            job = await asyncio.to_thread(store.claim, worker_id, lease_seconds)
+            if job is None:
+                idle_polls += 1
+                await asyncio.sleep(poll_interval)
+                continue
+            idle_polls = 0
+            await process_job(store, analyzer, job, worker_id, lease_seconds)
+
+    await asyncio.gather(*(loop(slot) for slot in range(concurrency)))
+
+
+def _worker_process(store_path: str, index: int, kwargs: dict):
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    asyncio.run(run_worker(store_path, worker_id=worker_id, **kwargs))
+
+
+def run_worker_pool(store_path: str, workers: int = 2, **kwargs):
+    """Start worker processes that share one queue file and wait for them"""
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process, args=(store_path, index, kwargs), daemon=True
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analysis job workers")
+    parser.add_argument(
+        "--store",
+        default=os.environ.get("JOB_STORE_PATH"),
+        help="queue file on this host's local disk (default: $JOB_STORE_PATH)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs per worker")
+    parser.add_argument("--lease-seconds", type=float, default=60.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("--store or JOB_STORE_PATH is required")
+
+    run_worker_pool(
+        args.store,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+    )
+
+
+if __name__ == "__main__":
+    main()
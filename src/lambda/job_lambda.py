@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+
+sys.path.append("./")
+
+from src.response_engine.response_builder import (
+    job_status_body,
+    lambda_response,
+    message_body,
+)
+
+# Queue shared with the workers in src/job_engine/worker.py. JOB_STORE_PATH has
+# to name a file on the local disk of the one host running these handlers and
+# the workers (a container image run as a long-lived service, not separate
+# Lambda containers, whose /tmp is private to each): see JobStore.
+_JOB_STORE = None
+# Same RULEPACK_DIR as the workers judging the jobs
+_RULEPACKS = None
+
+
+def get_job_store():
+    global _JOB_STORE
+    if _JOB_STORE is None:
+        from src.job_engine.job_store import JobStore
+
+        path = os.environ.get("JOB_STORE_PATH")
+        if not path:
+            raise RuntimeError(
+                "JOB_STORE_PATH must name the job queue file shared with the workers"
+            )
+        _JOB_STORE = JobStore(path)
+    return _JOB_STORE
+
+
+def get_rulepacks():
+    global _RULEPACKS
+    if _RULEPACKS is None:
+        from src.evaluation_engine.environment import rulepack_registry
+
+        _RULEPACKS = rulepack_registry()
+    return _RULEPACKS
+
+
+def submit_job_handler(event, context):
+    """Queue a script for analysis and return its job id immediately"""
+    try:
+        body = json.loads(event.get("body"))
+        script_content = body.get("content", "")
+        creator_name = body.get("creator_name", "")
+        if not script_content or not creator_name:
+            return lambda_response(
+                "BAD_REQUEST",
+                message_body(
+                    "BAD_REQUEST",
+                    "The request body must include 'content' and 'creator name'.",
+                ),
+            )
+
+        from src.evaluation_engine.rulepacks import RulepackError, UnknownRulepackError
+        from src.evaluation_engine.script_submission import ScriptSubmission
+
+        submission = ScriptSubmission(
+            content=script_content,
+            creator_name=creator_name,
+            brief_type=body.get("brief_type"),
+        )
+        # Reject unknown brief types now rather than failing the job later
+        try:
+            get_rulepacks().get(submission.brief_type)
+        except (UnknownRulepackError, RulepackError) as e:
+            return lambda_response("BAD_REQUEST", message_body("BAD_REQUEST", str(e)))
+        job_id = get_job_store().submit(
+            {
+                "content": submission.content,
+                "creator_name": submission.creator_name,
+                "submission_date": submission.submission_date.isoformat(),
+                "brief_type": submission.brief_type,
+            }
+        )
+        return lambda_response("ACCEPTED", message_body("ACCEPTED", {"job_id": job_id}))
+
+    except Exception as e:
+        return lambda_response("SERVER_ERROR", message_body("SERVER_ERROR", str(e)))
+
+
+def job_status_handler(event, context):
+    """Progress of a job and, once finished, the usual analysis response body"""
+    try:
+        parameters = event.get("queryStringParameters") or {}
+        job_id = parameters.get("job_id")
+        if not job_id:
+            return lambda_response(
+                "BAD_REQUEST",
+                message_body("BAD_REQUEST", "The query string must include 'job_id'."),
+            )
+
+        job = get_job_store().get(job_id)
+        if job is None:
+            return lambda_response(
+                "NOT_FOUND", message_body("NOT_FOUND", {"job_id": job_id})
+            )
+
+        from src.evaluation_engine.script_analysis_async import CHECK_CATEGORIES
+
+        return lambda_response(
+            "JOB_STATUS",
+            job_status_body(
+                job.status,
+                {
+                    "job_id": job.job_id,
+                    "attempts": job.attempts,
+                    "progress": {
+                        "completed": job.completed,
+                        "total": len(CHECK_CATEGORIES),
+                    },
+                    "result": job.result,
+                    "error": job.error,
+                },
+            ),
+        )
+
+    except Exception as e:
+        return lambda_response("SERVER_ERROR", message_body("SERVER_ERROR", str(e)))
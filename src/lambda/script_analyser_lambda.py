@@ -1,39 +1,130 @@
 import json
+import logging
 import os
 import sys
 
 sys.path.append("./")
 
-from src.evaluation_engine.script_analysis import ScriptAnalyzer
-from src.evaluation_engine.script_submission import ScriptSubmission
-from src.response_engine.script_analysis_response_handler import (
-    ScriptAnalysisResponseHandler,
+from src.response_engine.response_builder import (
+    analysis_body,
+    lambda_response,
+    message_body,
 )
 
+logger = logging.getLogger(__name__)
+
+# Built once per container on first use (or by warm_up) and reused by every warm
+# invocation, together with its OpenAI client and connection pool. The analyzer
+# modules, pydantic and the openai SDK are only imported at that point.
+_ANALYZER = None
+
+
+def _build_analyzer():
+    from src.evaluation_engine.environment import analyzer_options
+    from src.evaluation_engine.script_analysis import ScriptAnalyzer
+
+    return ScriptAnalyzer(**analyzer_options())
+
+
+def get_analyzer():
+    global _ANALYZER
+    if _ANALYZER is None:
+        _ANALYZER = _build_analyzer()
+    return _ANALYZER
+
+
+_RESULTS_STORE = None
+
+
+def get_results_store():
+    global _RESULTS_STORE
+    if _RESULTS_STORE is None:
+        from src.evaluation_engine.environment import results_store
+
+        _RESULTS_STORE = results_store()
+    return _RESULTS_STORE
+
+
+def record_results(analysis, creator_name: str, brand: str):
+    """Add an analysis to the results store; the verdict is returned whether or
+    not that works (replayed results are skipped by the store itself)"""
+    try:
+        results_store = get_results_store()
+        if results_store is not None:
+            results_store.append(analysis, creator_name, brand)
+    except Exception:
+        logger.exception("Could not record results for %s", creator_name)
+
+
+def warm_up():
+    """Import everything and build the shared analyzer ahead of the first request"""
+    from src.evaluation_engine.script_submission import ScriptSubmission
+
+    analyzer = get_analyzer()
+    # Compiles the default rulepack, prescreen lexicon included
+    analyzer.rulepacks.get()
+    ScriptSubmission(content="warm up", creator_name="warm up")
+    return analyzer
+
+
+# Set EAGER_INIT=1 (e.g. with provisioned concurrency) to do the work during the
+# Lambda init phase instead of on the first invocation
+if os.environ.get("EAGER_INIT") == "1":
+    warm_up()
+
 
 def lambda_handler(event, context):
     try:
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
+        # Scheduled warm-up pings only prime the container
+        if event.get("warmup"):
+            warm_up()
+            return {"statusCode": 200, "body": {"status": "WARM"}}
+
         body = json.loads(event.get("body"))
         script_content = body.get("content", "")
         creator_name = body.get("creator_name", "")
         if not script_content or not creator_name:
-            return ScriptAnalysisResponseHandler.bad_request(
-                details="The request body must include 'content' and 'creator name'."
+            return lambda_response(
+                "BAD_REQUEST",
+                message_body(
+                    "BAD_REQUEST",
+                    "The request body must include 'content' and 'creator name'.",
+                ),
             )
 
-        analyzer = ScriptAnalyzer(openai_api_key=openai_api_key)
-        submission = ScriptSubmission(content=script_content, creator_name=creator_name)
-        analysis_results = analyzer.analyze_script(submission)
-        if analysis_results["status"] == "REJECTED":
-            response = ScriptAnalysisResponseHandler.rejection(
-                details=analysis_results.get("details")
-            )
-        else:
-            response = ScriptAnalysisResponseHandler.success(
-                details=analysis_results.get("details")
+        from src.evaluation_engine.rulepacks import (
+            RulepackError,
+            UnknownRulepackError,
+        )
+        from src.evaluation_engine.script_submission import ScriptSubmission
+
+        analyzer = get_analyzer()
+        submission = ScriptSubmission(
+            content=script_content,
+            creator_name=creator_name,
+            brief_type=body.get("brief_type"),
+        )
+        try:
+            analysis_results = analyzer.analyze_script(
+                submission, bypass_cache=bool(body.get("bypass_cache", False))
             )
-        return response
+        except (UnknownRulepackError, RulepackError) as e:
+            return lambda_response("BAD_REQUEST", message_body("BAD_REQUEST", str(e)))
+        record_results(
+            analysis_results,
+            creator_name,
+            analyzer.rulepacks.get(submission.brief_type).brand,
+        )
+        # Serialized straight from the results, nothing shared between requests
+        extras = {}
+        if body.get("timings") or os.environ.get("RETURN_TIMINGS") == "1":
+            extras["timings"] = analysis_results.get("timings")
+        for reuse in ("near_duplicate", "revision"):
+            if analysis_results.get(reuse):
+                extras[reuse] = analysis_results[reuse]
+        return lambda_response(
+            analysis_results["status"], analysis_body(analysis_results, **extras)
+        )
 
     except Exception as e:
-        return ScriptAnalysisResponseHandler.error(details=str(e))
+        return lambda_response("SERVER_ERROR", message_body("SERVER_ERROR", str(e)))
@@ -0,0 +1,108 @@
+"""Analysis responses serialized straight to JSON bytes.
+
+Every envelope in ScriptAnalysisResponse is serialized once, up to its
+"details" key (which comes last in every template), so building a response
+only serializes the details and any extra fields and joins the fragments.
+Nothing shared is ever mutated, so responses can be built from any number of
+threads or tasks at once.
+
+orjson is used when it is installed (pip install orjson), the standard json
+module otherwise.
+"""
+
+import json
+import sys
+from typing import Dict, List
+
+sys.path.append("./")
+
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.response_engine.script_analysis_response import ScriptAnalysisResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+if orjson is not None:
+    dumps = orjson.dumps
+else:
+    _encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def dumps(value) -> bytes:
+        return _encode(value).encode("utf-8")
+
+
+class Envelope:
+    """A response template serialized up to its details"""
+
+    __slots__ = ("status_code", "prefix")
+
+    def __init__(self, template: Dict):
+        self.status_code = template["statusCode"]
+        body = dumps(template["body"])
+        tail = b'"details":null}'
+        if not body.endswith(tail):
+            raise ValueError("details must be the last key of a response body")
+        self.prefix = body[: -len(tail)] + b'"details":'
+
+    def render(self, details: bytes = b"null", **fields) -> bytes:
+        """The body with already serialized details, then fields in order"""
+        if not fields:
+            return self.prefix + details + b"}"
+        extra = b"".join(
+            b"," + dumps(name) + b":" + dumps(value) for name, value in fields.items()
+        )
+        return self.prefix + details + extra + b"}"
+
+
+ENVELOPES = {
+    name: Envelope(getattr(ScriptAnalysisResponse, name))
+    for name in (
+        "BAD_REQUEST",
+        "APPROVED",
+        "REJECTED",
+        "ACCEPTED",
+        "NOT_FOUND",
+        "SERVER_ERROR",
+    )
+}
+
+
+def results_json(details: Dict[str, List[AnalysisResult]]) -> bytes:
+    """Analysis details in the shape details_formatting produces, as JSON"""
+    return dumps(
+        {
+            category: [result.to_dict() for result in results]
+            for category, results in details.items()
+        }
+    )
+
+
+def analysis_body(analysis: Dict, **fields) -> bytes:
+    """Response body of an analyze_script result, extra fields appended"""
+    envelope = ENVELOPES["REJECTED" if analysis["status"] == "REJECTED" else "APPROVED"]
+    return envelope.render(results_json(analysis["details"]), **fields)
+
+
+def message_body(name: str, details=None, **fields) -> bytes:
+    """Response body of any other envelope, with plain JSON details"""
+    return ENVELOPES[name].render(dumps(details), **fields)
+
+
+def job_status_body(status: str, details=None) -> bytes:
+    """Body of a job status response, whose status is the job's own"""
+    return dumps(
+        dict(ScriptAnalysisResponse.JOB_STATUS["body"], status=status, details=details)
+    )
+
+
+def lambda_response(name: str, body: bytes) -> Dict:
+    """Lambda (function URL) response carrying a serialized body"""
+    return {
+        "statusCode": getattr(ScriptAnalysisResponse, name)["statusCode"],
+        "headers": dict(JSON_HEADERS),
+        "body": body.decode("utf-8"),
+    }
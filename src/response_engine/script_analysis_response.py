@@ -34,6 +34,33 @@ class ScriptAnalysisResponse:
         },
     }
 
+    ACCEPTED = {
+        "statusCode": StatusCodes.ACCEPTED,
+        "body": {
+            "status": "ACCEPTED",
+            "message": "Script queued for analysis, poll the job for its result.",
+            "details": None,
+        },
+    }
+
+    NOT_FOUND = {
+        "statusCode": StatusCodes.NOT_FOUND,
+        "body": {
+            "status": "NOT FOUND",
+            "message": "No analysis job exists with this id.",
+            "details": None,
+        },
+    }
+
+    JOB_STATUS = {
+        "statusCode": StatusCodes.SUCCESS,
+        "body": {
+            "status": None,
+            "message": "Current state of the analysis job.",
+            "details": None,
+        },
+    }
+
     SERVER_ERROR = {
         "statusCode": StatusCodes.INTERNAL_SERVER_ERROR,
         "body": {
@@ -14,28 +14,46 @@ def details_formatting(details):
     return details_dict
 
 
+def _response(template, **body):
+    # A new body for every response, the templates are shared by all requests
+    return {
+        "statusCode": template["statusCode"],
+        "body": {**template["body"], **body},
+    }
+
+
 class ScriptAnalysisResponseHandler:
 
     @staticmethod
     def bad_request(details=None):
-        response = ScriptAnalysisResponse.BAD_REQUEST.copy()
-        response["body"]["details"] = details
-        return response
+        return _response(ScriptAnalysisResponse.BAD_REQUEST, details=details)
 
     @staticmethod
     def success(details=None):
-        response = ScriptAnalysisResponse.APPROVED.copy()
-        response["body"]["details"] = details_formatting(details)
-        return response
+        return _response(
+            ScriptAnalysisResponse.APPROVED, details=details_formatting(details)
+        )
 
     @staticmethod
     def rejection(details=None):
-        response = ScriptAnalysisResponse.REJECTED.copy()
-        response["body"]["details"] = details_formatting(details)
-        return response
+        return _response(
+            ScriptAnalysisResponse.REJECTED, details=details_formatting(details)
+        )
+
+    @staticmethod
+    def accepted(details=None):
+        return _response(ScriptAnalysisResponse.ACCEPTED, details=details)
+
+    @staticmethod
+    def not_found(details=None):
+        return _response(ScriptAnalysisResponse.NOT_FOUND, details=details)
+
+    @staticmethod
+    def job_status(status, details=None):
+        return _response(
+            ScriptAnalysisResponse.JOB_STATUS, status=status, details=details
+        )
 
     @staticmethod
     def error(details=None):
-        response = ScriptAnalysisResponse.SERVER_ERROR.copy()
-        response["body"]["details"] = details
-        return response
+        return _response(ScriptAnalysisResponse.SERVER_ERROR, details=details)
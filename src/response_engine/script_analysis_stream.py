@@ -0,0 +1,70 @@
+import sys
+from typing import AsyncIterator, Callable, Dict, Optional
+
+sys.path.append("./")
+
+from src.response_engine.response_builder import dumps
+from src.response_engine.script_analysis_response import ScriptAnalysisResponse
+from src.response_engine.script_analysis_response_handler import details_formatting
+
+NDJSON = "ndjson"
+SSE = "sse"
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    SSE: "text/event-stream",
+}
+
+
+def check_event(category: str, results) -> Dict:
+    """One completed check category, in the shape details_formatting produces"""
+    return {"event": "check", "details": details_formatting({category: results})}
+
+
+def status_event(status: str) -> Dict:
+    body = (
+        ScriptAnalysisResponse.REJECTED
+        if status == "REJECTED"
+        else ScriptAnalysisResponse.APPROVED
+    )["body"]
+    return {"event": "status", "status": body["status"], "message": body["message"]}
+
+
+def error_event(details: str) -> Dict:
+    body = ScriptAnalysisResponse.SERVER_ERROR["body"]
+    return {
+        "event": "error",
+        "status": body["status"],
+        "message": body["message"],
+        "details": details,
+    }
+
+
+def encode_event(event: Dict, stream_format: str = NDJSON) -> str:
+    data = dumps(event).decode("utf-8")
+    if stream_format == SSE:
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def stream_analysis(
+    analyzer,
+    submission,
+    stream_format: str = NDJSON,
+    bypass_cache: bool = False,
+    on_analysis: Optional[Callable[[Dict], None]] = None,
+) -> AsyncIterator[str]:
+    """Encoded events for one submission: a check event per category as it
+    completes, followed by a final status (or error) event. on_analysis is
+    called with the finished analysis before its status event is sent"""
+    try:
+        async for event in analyzer.analyze_script_stream(submission, bypass_cache):
+            if "status" in event:
+                if on_analysis is not None:
+                    on_analysis(event)
+                yield encode_event(status_event(event["status"]), stream_format)
+            else:
+                yield encode_event(
+                    check_event(event["category"], event["results"]), stream_format
+                )
+    except Exception as e:
+        yield encode_event(error_event(str(e)), stream_format)
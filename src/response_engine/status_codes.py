@@ -1,4 +1,6 @@
 class StatusCodes:
     SUCCESS = 200
+    ACCEPTED = 202
     BAD_REQUEST = 400
+    NOT_FOUND = 404
     INTERNAL_SERVER_ERROR = 500
@@ -0,0 +1,408 @@
+"""Long-running ASGI server around the async ScriptAnalyzer.
+
+Every worker process runs one event loop, one analyzer and one AsyncOpenAI
+client whose connection pool is shared by all the requests it serves, so
+concurrent scripts reuse warm keep-alive connections instead of each paying
+for its own container and TLS handshakes. When a client disconnects, its
+analysis is cancelled together with its in-flight OpenAI requests.
+
+Routes, with the JSON contract of the script Lambda (and ui/script.js):
+
+    POST /, /analyze   {"content", "creator_name", "brief_type"?,
+                        "bypass_cache"?, "timings"?} -> the Lambda's body
+    POST /stream       ?format=ndjson|sse, one event per completed check
+                       (its verdict is recorded like /analyze's)
+    GET  /health       in-flight, served, cancelled and coalesced request counts
+
+The analyzer is configured from the same environment variables as the Lambda
+(see evaluation_engine.environment), plus:
+
+    OPENAI_MAX_CONNECTIONS   connections per worker (default 100)
+    OPENAI_MAX_KEEPALIVE     idle connections kept open (default 100)
+    OPENAI_KEEPALIVE_EXPIRY  seconds an idle connection is kept (default 60)
+    MAX_OPENAI_CALLS         OpenAI requests in flight per worker (unset: no limit)
+    SINGLE_FLIGHT            0 stops identical concurrent requests sharing one
+                             analysis (default 1)
+    CORS_ALLOW_ORIGIN        origin allowed to call the server (unset: no CORS)
+
+Run it with uvicorn (pip install uvicorn), one process per worker:
+
+    python src/server/asgi.py --port 8000 --workers 4
+    uvicorn src.server.asgi:app --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+sys.path.append("./")
+
+from src.response_engine.response_builder import (
+    ENVELOPES,
+    JSON_HEADERS,
+    analysis_body,
+    dumps,
+    message_body,
+)
+from src.response_engine.script_analysis_stream import (
+    CONTENT_TYPES,
+    NDJSON,
+    stream_analysis,
+)
+
+ANALYZE_PATHS = ("/", "/analyze")
+STREAM_PATH = "/stream"
+HEALTH_PATH = "/health"
+
+
+def build_http_client():
+    """Connection pool shared by every OpenAI request of a worker"""
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(
+                os.environ.get("OPENAI_MAX_KEEPALIVE", "100")
+            ),
+            # Longer than the SDK's 5 s, so connections survive gaps between bursts
+            keepalive_expiry=float(os.environ.get("OPENAI_KEEPALIVE_EXPIRY", "60")),
+        ),
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    )
+
+
+def build_analyzer():
+    from src.evaluation_engine.environment import analyzer_options
+    from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+    from src.evaluation_engine.single_flight import SingleFlight
+
+    max_openai_calls = os.environ.get("MAX_OPENAI_CALLS")
+    return ScriptAnalyzer(
+        **analyzer_options(),
+        http_client=build_http_client(),
+        max_openai_calls=int(max_openai_calls) if max_openai_calls else None,
+        single_flight=(
+            SingleFlight() if os.environ.get("SINGLE_FLIGHT", "1") == "1" else None
+        ),
+    )
+
+
+async def _read_body(receive) -> Tuple[bytes, bool]:
+    """The request body, and whether the client went away while sending it"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b"", True
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks), False
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class AnalysisServer:
+    """ASGI application serving analyses from one shared analyzer per process"""
+
+    def __init__(self, analyzer_factory=build_analyzer):
+        self.analyzer_factory = analyzer_factory
+        self.analyzer = None
+        self.results_store = None
+        self.cors_origin = os.environ.get("CORS_ALLOW_ORIGIN")
+        self.in_flight = 0
+        self.served = 0
+        # Requests whose client disconnected before the analysis finished
+        self.cancelled = 0
+
+    async def startup(self):
+        from src.evaluation_engine.environment import results_store
+
+        if self.analyzer is None:
+            # Built on the worker's own loop, which its client and semaphore bind to
+            self.analyzer = self.analyzer_factory()
+            self.results_store = results_store()
+
+    async def shutdown(self):
+        if self.analyzer is not None:
+            await self.analyzer.openai_client.close()
+            self.analyzer = None
+        if self.results_store is not None:
+            self.results_store.flush()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        # Servers without lifespan support build it on the first request
+        await self.startup()
+        method, path = scope["method"], scope["path"]
+        if method == "OPTIONS":
+            await self._respond(send, 204, b"")
+        elif method == "GET" and path == HEALTH_PATH:
+            await self._respond(send, 200, dumps(self.health()))
+        elif method == "POST" and path in ANALYZE_PATHS:
+            await self._analyze(scope, receive, send)
+        elif method == "POST" and path == STREAM_PATH:
+            await self._stream(scope, receive, send)
+        else:
+            await self._respond(
+                send, 404, message_body("NOT_FOUND", f"No route {method} {path}")
+            )
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def health(self) -> Dict:
+        health = {
+            "status": "OK",
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "cancelled": self.cancelled,
+        }
+        if self.analyzer is not None and self.analyzer.single_flight is not None:
+            health["single_flight"] = self.analyzer.single_flight.stats()
+        return health
+
+    def _headers(self, content_type: str) -> List[Tuple[bytes, bytes]]:
+        headers = [(b"content-type", content_type.encode())]
+        if self.cors_origin:
+            headers += [
+                (b"access-control-allow-origin", self.cors_origin.encode()),
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", b"content-type"),
+            ]
+        return headers
+
+    async def _respond(self, send, status: int, body: bytes):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": self._headers(JSON_HEADERS["Content-Type"]),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _submission(self, receive, send):
+        """(submission, payload), or Nones when an error response was sent"""
+        from pydantic import ValidationError
+        from src.evaluation_engine.script_submission import ScriptSubmission
+
+        body, disconnected = await _read_body(receive)
+        if disconnected:
+            raise ClientDisconnected()
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            await self._respond(send, 400, message_body("BAD_REQUEST", str(e)))
+            return None, None
+        if (
+            not isinstance(payload, dict)
+            or not payload.get("content")
+            or not payload.get("creator_name")
+        ):
+            await self._respond(
+                send,
+                400,
+                message_body(
+                    "BAD_REQUEST",
+                    "The request body must include 'content' and 'creator name'.",
+                ),
+            )
+            return None, None
+        try:
+            submission = ScriptSubmission(
+                content=payload["content"],
+                creator_name=payload["creator_name"],
+                brief_type=payload.get("brief_type"),
+            )
+        except ValidationError as e:
+            # e.g. a content or creator_name that is not a string
+            await self._respond(send, 400, message_body("BAD_REQUEST", str(e)))
+            return None, None
+        return submission, payload
+
+    async def _until_disconnect(self, work, receive):
+        """Run work, cancelling it (and its OpenAI requests) if the client leaves"""
+        task = asyncio.ensure_future(work)
+        watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+        self.in_flight += 1
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+            return task.result()
+        finally:
+            self.in_flight -= 1
+            watcher.cancel()
+            # The server itself may be cancelling this request
+            task.cancel()
+
+    def _record(self, analysis, submission):
+        """Add an analysis to the results store without failing the request"""
+        if self.results_store is None:
+            return
+        try:
+            self.results_store.append(
+                analysis,
+                submission.creator_name,
+                self.analyzer.rulepacks.get(submission.brief_type).brand,
+            )
+        except Exception:
+            logger.exception("Could not record results for %s", submission.creator_name)
+
+    async def _analyze(self, scope, receive, send):
+        from src.evaluation_engine.rulepacks import RulepackError, UnknownRulepackError
+
+        try:
+            submission, payload = await self._submission(receive, send)
+            if submission is None:
+                return
+            analysis = await self._until_disconnect(
+                self.analyzer.analyze_script(
+                    submission, bypass_cache=bool(payload.get("bypass_cache", False))
+                ),
+                receive,
+            )
+        except ClientDisconnected:
+            self.cancelled += 1
+            return
+        except (UnknownRulepackError, RulepackError) as e:
+            await self._respond(send, 400, message_body("BAD_REQUEST", str(e)))
+            return
+        except Exception as e:
+            await self._respond(send, 500, message_body("SERVER_ERROR", str(e)))
+            return
+
+        self._record(analysis, submission)
+        extras = {}
+        if payload.get("timings") or os.environ.get("RETURN_TIMINGS") == "1":
+            extras["timings"] = analysis.get("timings")
+        for reuse in ("near_duplicate", "revision"):
+            if analysis.get(reuse):
+                extras[reuse] = analysis[reuse]
+        self.served += 1
+        await self._respond(
+            send,
+            ENVELOPES[analysis["status"]].status_code,
+            analysis_body(analysis, **extras),
+        )
+
+    async def _stream(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        stream_format = query.get("format", [NDJSON])[0]
+        if stream_format not in CONTENT_TYPES:
+            await self._respond(
+                send,
+                400,
+                message_body("BAD_REQUEST", f"Unknown format {stream_format!r}"),
+            )
+            return
+        try:
+            submission, payload = await self._submission(receive, send)
+        except ClientDisconnected:
+            self.cancelled += 1
+            return
+        if submission is None:
+            return
+
+        async def stream():
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": self._headers(CONTENT_TYPES[stream_format])
+                    + [(b"cache-control", b"no-cache")],
+                }
+            )
+            async for chunk in stream_analysis(
+                self.analyzer,
+                submission,
+                stream_format,
+                bool(payload.get("bypass_cache", False)),
+                on_analysis=lambda analysis: self._record(analysis, submission),
+            ):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk.encode("utf-8"),
+                        "more_body": True,
+                    }
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+        try:
+            await self._until_disconnect(stream(), receive)
+        except (ClientDisconnected, OSError):
+            # OSError: the server failed to send to a client that is gone
+            self.cancelled += 1
+            return
+        self.served += 1
+
+
+app = AnalysisServer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("SERVER_WORKERS", "1")),
+        help="worker processes, each with its own loop, analyzer and pool",
+    )
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The server runs on uvicorn: pip install uvicorn")
+
+    uvicorn.run(
+        "src.server.asgi:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        # Longer than a load balancer's idle timeout, so it never reuses a
+        # connection the server has just closed
+        timeout_keep_alive=75,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine.analysis_cache import AnalysisCache
+from src.evaluation_engine.results_store import ResultsStore
+from src.evaluation_engine.script_analysis_async import ScriptAnalyzer
+from src.evaluation_engine.single_flight import SingleFlight
+from src.server.asgi import AnalysisServer
+
+SUBMISSION = {
+    "content": "Milanote is a tool for organizing creative projects. Sign up free "
+    "with the link in the description.",
+    "creator_name": "Ana",
+}
+
+
+class BrokenStore:
+    def append(self, *args):
+        raise OSError("disk full")
+
+    def flush(self):
+        pass
+
+
+def build_analyzer():
+    analyzer = ScriptAnalyzer(openai_api_key="test")
+    analyzer.openai_client = StubAsyncOpenAI(LatencyModel(0, 0, 0))
+    return analyzer
+
+
+async def post(server, path, payload):
+    messages = [{"type": "http.request", "body": json.dumps(payload).encode()}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # The client stays connected until the response is sent
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b""}
+    await server(scope, receive, send)
+    start = next(
+        message for message in sent if message["type"] == "http.response.start"
+    )
+    body = b"".join(
+        message.get("body", b"")
+        for message in sent
+        if message["type"] == "http.response.body"
+    )
+    return start["status"], json.loads(body)
+
+
+def test_store_failures_do_not_fail_the_request():
+    async def scenario():
+        server = AnalysisServer(build_analyzer)
+        await server.startup()
+        server.results_store = BrokenStore()
+        return await post(server, "/analyze", SUBMISSION)
+
+    status, body = asyncio.run(scenario())
+
+    assert status == 200
+    assert body["status"] == "APPROVED"
+
+
+class RecordingStore:
+    def __init__(self):
+        self.appended = []
+
+    def append(self, analysis, creator_name, brand):
+        self.appended.append((analysis["status"], creator_name, brand))
+
+    def flush(self):
+        pass
+
+
+def test_bodies_of_the_wrong_type_are_bad_requests():
+    async def scenario():
+        server = AnalysisServer(build_analyzer)
+        await server.startup()
+        return [
+            await post(server, "/analyze", dict(SUBMISSION, content=["not", "text"])),
+            await post(server, "/analyze", [SUBMISSION]),
+        ]
+
+    assert [status for status, _ in asyncio.run(scenario())] == [400, 400]
+
+
+def test_streamed_verdicts_are_recorded():
+    async def scenario():
+        server = AnalysisServer(build_analyzer)
+        await server.startup()
+        server.results_store = RecordingStore()
+        sent = []
+
+        async def receive():
+            if not sent:
+                sent.append(True)
+                return {"type": "http.request", "body": json.dumps(SUBMISSION).encode()}
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "POST", "path": "/stream"}
+        await server(scope, receive, send)
+        return server.results_store.appended
+
+    assert asyncio.run(scenario()) == [("APPROVED", "Ana", "milanote")]
+
+
+def test_coalesced_requests_are_recorded_once():
+    def build_coalescing_analyzer():
+        analyzer = ScriptAnalyzer(
+            openai_api_key="test", cache=AnalysisCache(), single_flight=SingleFlight()
+        )
+        # Slow enough for identical requests to be in flight together
+        analyzer.openai_client = StubAsyncOpenAI(LatencyModel(0.05, 0, 0))
+        return analyzer
+
+    async def scenario(requests):
+        server = AnalysisServer(build_coalescing_analyzer)
+        await server.startup()
+        server.results_store = ResultsStore()
+        responses = await asyncio.gather(
+            *(post(server, "/analyze", SUBMISSION) for _ in range(requests))
+        )
+        assert [status for status, _ in responses] == [200] * requests
+        return server
+
+    once = asyncio.run(scenario(1))
+    twice = asyncio.run(scenario(2))
+
+    assert twice.analyzer.single_flight.stats()["coalesced"] == 1
+    assert once.results_store.rows > 0
+    assert twice.results_store.rows == once.results_store.rows
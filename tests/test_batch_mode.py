@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append("./")
+
+from src.evaluation_engine.batch_mode import (
+    BATCH_CHECKS,
+    iter_batch_requests,
+    make_custom_id,
+    make_submission_id,
+    parse_custom_id,
+    read_batch_results,
+)
+from src.evaluation_engine.rulepacks import UnknownRulepackError
+from src.evaluation_engine.script_analysis import ScriptAnalyzer
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "batch")
+
+
+def read_lines(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as source:
+        return [line for line in source if line.strip()]
+
+
+def submissions():
+    return [
+        ScriptSubmission(**json.loads(line)) for line in read_lines("submissions.jsonl")
+    ]
+
+
+@pytest.fixture
+def analyzer():
+    # Only the prompt builders and processors are used, no request is sent
+    return ScriptAnalyzer(openai_api_key="test")
+
+
+def test_ingests_canned_results_into_verdicts(analyzer):
+    verdicts = list(read_batch_results(analyzer, read_lines("results.jsonl")))
+
+    assert [verdict.status for verdict in verdicts] == ["APPROVED", "REJECTED"]
+    assert all(not verdict.failed_checks for verdict in verdicts)
+    political = {
+        result.criteria: result for result in verdicts[1].details["brand safety"]
+    }["political"]
+    assert not political.passed
+    assert political.severity == "high"
+
+
+def test_verdicts_keep_the_prompt_version_they_were_written_with(analyzer):
+    verdicts = list(read_batch_results(analyzer, read_lines("results.jsonl")))
+
+    # The fixture was written with prompts the current pack no longer has
+    assert {verdict.prompt_version for verdict in verdicts} == {"fixture-1"}
+    assert {verdict.brief_type for verdict in verdicts} == {"milanote"}
+
+
+def test_request_ids_match_the_results_file(analyzer):
+    lines = list(iter_batch_requests(analyzer, submissions()))
+    assert len(lines) == 2 * len(BATCH_CHECKS)
+
+    written = [parse_custom_id(json.loads(line)["custom_id"]) for line in lines]
+    returned = [
+        parse_custom_id(json.loads(line)["custom_id"])
+        for line in read_lines("results.jsonl")
+    ]
+    assert [(script_id, brand, check) for script_id, brand, _, check in written] == [
+        (script_id, brand, check) for script_id, brand, _, check in returned
+    ]
+    pack = analyzer.rulepacks.get("milanote")
+    assert {version for _, _, version, _ in written} == {pack.prompt_version}
+    assert written[0][0] == make_submission_id(submissions()[0], 0)
+
+
+def test_missing_answers_are_reported_as_failed_checks(analyzer):
+    lines = read_lines("results.jsonl")
+    # The first script's script flow answer never arrived
+    lines = [
+        line for line in lines if '__script_flow"' not in line or "-00000001-" in line
+    ]
+
+    verdicts = list(read_batch_results(analyzer, lines))
+
+    first = next(
+        verdict for verdict in verdicts if "-00000000-" in verdict.submission_id
+    )
+    assert first.failed_checks == ["script_flow"]
+    assert first.details["script flow"][0].criteria == "error"
+
+
+def test_unknown_brief_types_are_rejected_when_writing(analyzer):
+    submission = ScriptSubmission(content="Hi", creator_name="Ana", brief_type="nobody")
+
+    with pytest.raises(UnknownRulepackError):
+        list(iter_batch_requests(analyzer, [submission]))
+
+
+def test_brands_with_double_underscores_round_trip():
+    rulepack = SimpleNamespace(brand="acme__co_", prompt_version="3-0123456789")
+
+    custom_id = make_custom_id("script-00000000-abc", rulepack, "brand_safety")
+
+    assert parse_custom_id(custom_id) == (
+        "script-00000000-abc",
+        "acme__co_",
+        "3-0123456789",
+        "brand_safety",
+    )
+
+
+def test_removed_brands_get_an_error_verdict_and_the_file_goes_on(analyzer):
+    lines = read_lines("results.jsonl")
+    # The first script's pack was removed after its requests were written
+    lines = [
+        line.replace("__milanote__", "__removed__") if "-00000000-" in line else line
+        for line in lines
+    ]
+
+    verdicts = list(read_batch_results(analyzer, lines))
+
+    assert len(verdicts) == 2
+    removed, kept = verdicts
+    assert removed.brief_type == "removed"
+    assert removed.failed_checks == list(BATCH_CHECKS)
+    assert removed.details["brand safety"][0].criteria == "error"
+    assert kept.status == "REJECTED" and not kept.failed_checks
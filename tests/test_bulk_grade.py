@@ -0,0 +1,90 @@
+import asyncio
+import json
+import queue
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubAsyncOpenAI
+from src.evaluation_engine import bulk_grade, environment, script_analysis_async
+from src.evaluation_engine.bulk_grade import ERROR_STATUS
+
+CONTENT = (
+    "Milanote is a tool for organizing creative projects. Sign up free with the "
+    "link in the description."
+)
+
+
+class StubbedAnalyzer(script_analysis_async.ScriptAnalyzer):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.openai_client = StubAsyncOpenAI(LatencyModel(0, 0, 0))
+
+
+class BrokenStore:
+    def append(self, *args):
+        raise OSError("disk full")
+
+    def flush(self):
+        pass
+
+
+def grade_in_process(monkeypatch, tasks):
+    monkeypatch.setattr(script_analysis_async, "ScriptAnalyzer", StubbedAnalyzer)
+    monkeypatch.setattr(
+        environment, "analyzer_options", lambda: {"openai_api_key": "test"}
+    )
+    monkeypatch.setattr(environment, "results_store", BrokenStore)
+    pending, results = queue.Queue(), queue.Queue()
+    for task in tasks:
+        pending.put(task)
+    pending.put(None)
+
+    asyncio.run(bulk_grade._work(pending, results, concurrency=2))
+
+    rows = []
+    while not results.empty():
+        rows.append(results.get())
+    return {row["id"]: row for row in rows}
+
+
+def test_every_script_gets_a_row(monkeypatch):
+    rows = grade_in_process(
+        monkeypatch,
+        [
+            ("first", {"content": CONTENT, "creator_name": "Ana"}),
+            # No creator name, so never a valid ScriptSubmission
+            ("invalid", {"content": CONTENT}),
+            ("last", {"content": CONTENT, "creator_name": "Ana"}),
+        ],
+    )
+
+    assert set(rows) == {"first", "invalid", "last"}
+    assert rows["invalid"]["status"] == ERROR_STATUS
+    assert rows["invalid"]["error"].startswith("Invalid submission")
+    # The results store failing does not cost the verdicts
+    assert rows["first"]["status"] == rows["last"]["status"] == "APPROVED"
+
+
+def test_jsonl_lines_without_an_id_or_a_creator_still_get_a_row(monkeypatch, tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        "\n".join(
+            json.dumps(fields)
+            for fields in (
+                {"content": CONTENT, "creator_name": "Ana"},
+                {"content": "x"},
+            )
+        ),
+        encoding="utf-8",
+    )
+
+    # Read in the parent process, before any worker starts
+    tasks = list(bulk_grade.iter_input(str(corpus)))
+    rows = grade_in_process(monkeypatch, tasks)
+
+    first, invalid = (script_id for script_id, _ in tasks)
+    assert first.startswith("script-00000000-")
+    assert invalid == "line-00000001"
+    assert rows[first]["status"] == "APPROVED"
+    assert rows[invalid]["status"] == ERROR_STATUS
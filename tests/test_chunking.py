@@ -0,0 +1,25 @@
+import sys
+
+import pytest
+from pydantic import ValidationError
+
+sys.path.append("./")
+
+from src.evaluation_engine.chunking import ChunkingPolicy, split_into_chunks
+
+
+def test_overlap_must_be_shorter_than_a_chunk():
+    with pytest.raises(ValidationError, match="overlap_chars"):
+        ChunkingPolicy(max_chars=500, overlap_chars=500)
+
+
+def test_chunks_cover_the_content_in_order():
+    policy = ChunkingPolicy(max_chars=80, overlap_chars=20)
+    content = "\n\n".join(f"Paragraph {index} is about boards." for index in range(6))
+
+    chunks = split_into_chunks(content, policy.max_chars, policy.overlap_chars)
+
+    assert len(chunks) > 1
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.text.endswith(content[chunk.start : chunk.end])
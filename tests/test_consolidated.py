@@ -0,0 +1,61 @@
+import asyncio
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.bench_revisions import EDITS, first_revision
+from src.benchmarks.stub_openai import (
+    LatencyModel,
+    StubAsyncOpenAI,
+    StubOpenAI,
+    canned_response,
+    classify_prompt,
+)
+from src.evaluation_engine import script_analysis, script_analysis_async
+from src.evaluation_engine.analysis_cache import AnalysisCache
+from src.evaluation_engine.near_duplicates import NearDuplicateIndex
+from src.evaluation_engine.script_submission import ScriptSubmission
+
+
+def analyze_twice(module, client):
+    """Requests sent for a script and then a lightly edited copy of it"""
+    sent = []
+
+    def responder(prompt):
+        sent.append(classify_prompt(prompt))
+        return canned_response(prompt)
+
+    analyzer = module.ScriptAnalyzer(
+        openai_api_key="test",
+        consolidated=True,
+        cache=AnalysisCache(),
+        near_duplicates=NearDuplicateIndex(),
+    )
+    analyzer.openai_client = client(LatencyModel(0, 0, 0), responder)
+    edited = EDITS["typo"](first_revision())
+    analyses = []
+    for paragraphs in (first_revision(), edited):
+        submission = ScriptSubmission(
+            content="\n\n".join(paragraphs), creator_name="Ana"
+        )
+        analysis = analyzer.analyze_script(submission)
+        if asyncio.iscoroutine(analysis):
+            analysis = asyncio.run(analysis)
+        analyses.append(analysis)
+    return sent, analyses[-1]
+
+
+def test_partial_reruns_take_the_per_check_path_in_both_analyzers():
+    for module, client in (
+        (script_analysis, StubOpenAI),
+        (script_analysis_async, StubAsyncOpenAI),
+    ):
+        sent, analysis = analyze_twice(module, client)
+
+        assert analysis["near_duplicate"]["reused_checks"]
+        # The first script in one request, then only the checks the edit affects
+        assert sent[0] == "consolidated"
+        assert "consolidated" not in sent[1:]
+        assert sorted(sent[1:]) == sorted(
+            set(analysis["details"]) - set(analysis["near_duplicate"]["reused_checks"])
+        )
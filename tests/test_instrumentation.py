@@ -0,0 +1,35 @@
+import json
+import sys
+
+sys.path.append("./")
+
+from src.evaluation_engine.instrumentation import (
+    AnalysisTimings,
+    emf_lines,
+    record_check,
+)
+
+
+def test_chunk_labels_are_not_emf_dimensions():
+    timings = AnalysisTimings()
+    for index in range(3):
+        with record_check(
+            timings, "brand safety", "gpt-4o-mini", f"part {index + 1}/3"
+        ):
+            pass
+    with record_check(timings, "script flow", "gpt-4o-mini"):
+        pass
+
+    lines = [json.loads(line) for line in emf_lines(timings, "APPROVED")]
+
+    checks = lines[:-1]
+    assert [line["Check"] for line in checks] == ["brand safety"] * 3 + ["script flow"]
+    assert [line.get("Part") for line in checks] == [
+        "part 1/3",
+        "part 2/3",
+        "part 3/3",
+        None,
+    ]
+    for line in checks:
+        (directive,) = line["_aws"]["CloudWatchMetrics"]
+        assert directive["Dimensions"] == [["Check", "Model"]]
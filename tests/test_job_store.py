@@ -0,0 +1,117 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append("./")
+
+from src.evaluation_engine.rulepacks import RULEPACK_DIR
+from src.job_engine.job_store import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+SUBMISSION = {"content": "Milanote is a tool.", "creator_name": "Ana"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite"), max_attempts=2)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(store):
+    job_id = store.submit(SUBMISSION)
+    # A lease that has already run out, as if its worker crashed
+    first = store.claim("worker-a", lease_seconds=-1)
+    assert first.job_id == job_id and first.attempts == 1
+
+    second = store.claim("worker-b", lease_seconds=60)
+
+    assert second.job_id == job_id
+    assert second.attempts == 2
+    assert second.lease_owner == "worker-b"
+    # The first worker lost the job and can no longer touch it
+    assert not store.heartbeat(job_id, "worker-a")
+    assert not store.complete(job_id, "worker-a", {"status": "APPROVED"})
+    assert store.complete(job_id, "worker-b", {"status": "APPROVED"})
+    assert store.get(job_id).status == DONE
+
+
+def test_live_lease_is_not_reclaimed(store):
+    store.submit(SUBMISSION)
+    store.claim("worker-a", lease_seconds=60)
+
+    assert store.claim("worker-b") is None
+
+
+def test_job_fails_after_max_attempts(store):
+    job_id = store.submit(SUBMISSION)
+    for _ in range(store.max_attempts):
+        assert store.claim("crashing-worker", lease_seconds=-1).job_id == job_id
+
+    assert store.claim("worker-b") is None
+    job = store.get(job_id)
+    assert job.status == FAILED
+    assert job.attempts == store.max_attempts
+    assert job.error == f"Gave up after {store.max_attempts} attempts"
+    assert store.counts() == {FAILED: 1}
+
+
+def test_claims_take_the_oldest_job_first(store):
+    first = store.submit(SUBMISSION)
+    second = store.submit(SUBMISSION)
+
+    assert store.claim("worker-a").job_id == first
+    assert store.get(first).status == RUNNING
+    assert store.get(second).status == QUEUED
+
+
+def test_job_lambda_needs_an_explicit_store_path(monkeypatch):
+    monkeypatch.delenv("JOB_STORE_PATH", raising=False)
+    job_lambda = importlib.reload(importlib.import_module("src.lambda.job_lambda"))
+
+    response = job_lambda.submit_job_handler({"body": json.dumps(SUBMISSION)}, None)
+
+    assert response["statusCode"] == 500
+    assert "JOB_STORE_PATH" in json.loads(response["body"])["details"]
+
+
+def test_job_lambda_bodies_are_serialized(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOB_STORE_PATH", str(tmp_path / "jobs.sqlite"))
+    job_lambda = importlib.reload(importlib.import_module("src.lambda.job_lambda"))
+
+    submitted = job_lambda.submit_job_handler({"body": json.dumps(SUBMISSION)}, None)
+    job_id = json.loads(submitted["body"])["details"]["job_id"]
+    status = job_lambda.job_status_handler(
+        {"queryStringParameters": {"job_id": job_id}}, None
+    )
+
+    assert submitted["statusCode"] == 202
+    assert isinstance(status["body"], str)
+    assert status["headers"]["Content-Type"] == "application/json"
+    body = json.loads(status["body"])
+    assert body["status"] == QUEUED
+    assert body["details"]["job_id"] == job_id
+
+
+def test_job_lambda_validates_against_the_rulepack_dir(monkeypatch, tmp_path):
+    packs = tmp_path / "packs"
+    packs.mkdir()
+    with open(os.path.join(RULEPACK_DIR, "milanote.toml"), encoding="utf-8") as pack:
+        (packs / "acme.toml").write_text(
+            pack.read().replace('brand = "milanote"', 'brand = "acme"', 1),
+            encoding="utf-8",
+        )
+    monkeypatch.setenv("JOB_STORE_PATH", str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setenv("RULEPACK_DIR", str(packs))
+    job_lambda = importlib.reload(importlib.import_module("src.lambda.job_lambda"))
+
+    accepted = job_lambda.submit_job_handler(
+        {"body": json.dumps(dict(SUBMISSION, brief_type="acme"))}, None
+    )
+    # Only shipped with the code, not in this deployment's directory
+    rejected = job_lambda.submit_job_handler(
+        {"body": json.dumps(dict(SUBMISSION, brief_type="milanote"))}, None
+    )
+
+    assert accepted["statusCode"] == 202
+    assert rejected["statusCode"] == 400
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.bench_media_ingestion import (
+    FLAGGED_SENTENCE,
+    StubTranscriber,
+    build_analyzer,
+    write_wav,
+)
+from src.evaluation_engine.media_ingestion import (
+    MediaPolicy,
+    analyze_media_stream,
+    split_wav,
+)
+
+# Three 30 second segments a chunk, the last chunk a single shorter segment
+POLICY = MediaPolicy(segment_seconds=30, chunk_seconds=90, sample_rate=8000)
+FLAGGED_SEGMENT = 3
+
+
+def recording(tmp_path):
+    path = str(tmp_path / "recording.wav")
+    write_wav(path, 200, POLICY.sample_rate)
+    return path
+
+
+def test_segments_cut_at_fixed_boundaries(tmp_path):
+    segments = list(split_wav(recording(tmp_path), POLICY.segment_seconds))
+
+    assert [(segment.start_seconds, segment.end_seconds) for segment in segments] == [
+        (30.0 * index, min(30.0 * (index + 1), 200.0)) for index in range(7)
+    ]
+
+
+def test_findings_carry_the_time_range_of_their_chunk(tmp_path):
+    async def scenario():
+        events = []
+        async for event in analyze_media_stream(
+            build_analyzer(0),
+            recording(tmp_path),
+            StubTranscriber(FLAGGED_SEGMENT, round_trip=0, real_time=0),
+            POLICY,
+        ):
+            events.append(event)
+        return events
+
+    events = asyncio.run(scenario())
+
+    chunks = [
+        (event["start_seconds"], event["end_seconds"])
+        for event in events
+        if "chunk" in event
+    ]
+    assert chunks == [(0.0, 90.0), (90.0, 180.0), (180.0, 200.0)]
+    flagged_chunk = next(
+        event
+        for event in events
+        if "chunk" in event and FLAGGED_SENTENCE in event["transcript"]
+    )
+    # The flagged segment is 1:30-2:00, the first of the second chunk
+    assert (flagged_chunk["start_seconds"], flagged_chunk["end_seconds"]) == (
+        90.0,
+        180.0,
+    )
+    findings = [event for event in events if "finding" in event]
+    assert [(event["start_seconds"], event["end_seconds"]) for event in findings] == [
+        (90.0, 180.0)
+    ]
+    analysis = events[-1]
+    failed = [
+        result for result in analysis["details"]["brand safety"] if not result.passed
+    ]
+    assert [result.timestamps for result in failed] == [[(90.0, 180.0)]]
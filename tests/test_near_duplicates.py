@@ -0,0 +1,91 @@
+import sqlite3
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.bench_revisions import EDITS, first_revision
+from src.evaluation_engine.analysis_cache import AnalysisCache
+from src.evaluation_engine.near_duplicates import (
+    NearDuplicateIndex,
+    affected_checks,
+    paragraph_hash,
+    paragraph_mentions,
+)
+from src.evaluation_engine.rulepacks import default_registry
+
+WHOLE_SCRIPT_CHECKS = ["core requirements", "script flow"]
+SCRIPT = [
+    "This video is sponsored by Milanote, a tool for organizing creative projects.",
+    "Today we are cooking a mushroom risotto from scratch, start to finish.",
+    "The rice matters more than you would think, so buy arborio or carnaroli.",
+    "Milanote is free with no time limit, so sign up with the link below.",
+]
+
+
+def rerun(before, after, mentions=True):
+    rulepack = default_registry().get()
+    return affected_checks(
+        [paragraph_hash(paragraph) for paragraph in before],
+        paragraph_mentions(before, rulepack) if mentions else None,
+        after,
+        [paragraph_hash(paragraph) for paragraph in after],
+        rulepack,
+    )
+
+
+def test_replacing_a_brand_paragraph_reruns_the_whole_script_checks():
+    replaced = ["Quick note: the full recipe is pinned in the comments."] + SCRIPT[1:]
+
+    affected = rerun(SCRIPT, replaced)
+
+    assert all(check in affected for check in WHOLE_SCRIPT_CHECKS)
+
+
+def test_editing_a_paragraph_without_terms_keeps_the_whole_script_checks():
+    typo = [paragraph.replace("matters more", "maters more") for paragraph in SCRIPT]
+
+    affected = rerun(SCRIPT, typo)
+
+    assert affected == ["brand safety", "avoided elements"]
+
+
+def test_removed_text_without_mentions_reruns_everything():
+    typo = [paragraph.replace("matters more", "maters more") for paragraph in SCRIPT]
+
+    affected = rerun(SCRIPT, typo, mentions=False)
+
+    assert all(check in affected for check in WHOLE_SCRIPT_CHECKS)
+
+
+def test_index_keeps_paragraph_mentions_across_restarts(tmp_path):
+    path = str(tmp_path / "near.sqlite")
+    # A table written before mentions were kept gains the column
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE near_duplicates (key TEXT PRIMARY KEY, namespace TEXT "
+            "NOT NULL, signature BLOB NOT NULL, paragraphs BLOB NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+    index = NearDuplicateIndex(sqlite_path=path)
+    fingerprint = index.fingerprint("\n\n".join(SCRIPT), default_registry().get())
+    index.add(fingerprint, "ns", "key")
+
+    reloaded = NearDuplicateIndex(sqlite_path=path)
+
+    assert reloaded._mentions == [fingerprint.mentions]
+
+
+def test_probing_the_cache_leaves_its_stats_alone():
+    rulepack = default_registry().get()
+    cache = AnalysisCache()
+    cache.put("key", {"status": "APPROVED", "details": {}})
+    index = NearDuplicateIndex()
+    index.add(index.fingerprint("\n\n".join(first_revision()), rulepack), "ns", "key")
+    typo = EDITS["typo"](first_revision())
+
+    match = index.find(
+        index.fingerprint("\n\n".join(typo), rulepack), "ns", cache, rulepack
+    )
+
+    assert match is not None and match.key == "key"
+    assert (cache.hits, cache.misses) == (0, 0)
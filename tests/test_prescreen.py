@@ -0,0 +1,91 @@
+import importlib
+import json
+import shutil
+import sys
+
+import pytest
+
+sys.path.append("./")
+
+from src.evaluation_engine.prescreen import prescreen_script
+from src.evaluation_engine.rulepacks import (
+    RULEPACK_DIR,
+    RulepackRegistry,
+    load_rulepack,
+)
+
+ACME_PRESCREEN = """
+[prescreen.reject]
+"adult content" = ["explicit"]
+
+[[prescreen.avoid]]
+name = "competitor"
+terms = ["milanote"]
+severity = "high"
+suggestion = "Do not mention other tools"
+
+[[prescreen.require]]
+name = "missing_cta"
+terms = ["try acme"]
+suggestion = "Ask viewers to try Acme"
+"""
+
+
+@pytest.fixture
+def registry(tmp_path):
+    shutil.copy(f"{RULEPACK_DIR}/milanote.toml", tmp_path / "milanote.toml")
+    pack = (tmp_path / "milanote.toml").read_text()
+    pack = pack[: pack.index("[prescreen.reject]")]
+    pack = pack.replace('brand = "milanote"', 'brand = "acme"')
+    (tmp_path / "acme.toml").write_text(pack + ACME_PRESCREEN)
+    (tmp_path / "other.toml").write_text(pack.replace('"acme"', '"someone"'))
+    return RulepackRegistry(str(tmp_path))
+
+
+def test_each_brand_prescreens_with_its_own_lexicon(registry):
+    content = "Milanote has templates. Sign up with the link in the description."
+
+    milanote = prescreen_script(content, registry.get("milanote").prescreen)
+    acme = prescreen_script(content, registry.get("acme").prescreen)
+
+    assert milanote.results == []
+    assert [result.criteria for result in acme.results] == [
+        "competitor",
+        "missing_cta",
+    ]
+    assert acme.results[0].suggestions == ["Do not mention other tools"]
+    assert not acme.hard_hit
+    assert prescreen_script("Explicit stuff", registry.get("acme").prescreen).hard_hit
+
+
+def test_packs_without_a_lexicon_prescreen_nothing(tmp_path):
+    pack = open(f"{RULEPACK_DIR}/milanote.toml").read()
+    (tmp_path / "bare.toml").write_text(
+        pack[: pack.index("[prescreen.reject]")].replace(
+            'brand = "milanote"', 'brand = "bare"'
+        )
+    )
+
+    report = prescreen_script(
+        "Download this shit", load_rulepack(str(tmp_path / "bare.toml")).prescreen
+    )
+
+    assert report.results == [] and not report.hard_hit
+
+
+def test_a_pack_of_another_brand_is_a_bad_request(registry, monkeypatch, tmp_path):
+    monkeypatch.setenv("RULEPACK_DIR", registry.directory)
+    monkeypatch.setenv("JOB_STORE_PATH", str(tmp_path / "jobs.sqlite"))
+    job_lambda = importlib.reload(importlib.import_module("src.lambda.job_lambda"))
+
+    response = job_lambda.submit_job_handler(
+        {
+            "body": json.dumps(
+                {"content": "Hi", "creator_name": "Ana", "brief_type": "other"}
+            )
+        },
+        None,
+    )
+
+    assert response["statusCode"] == 400
+    assert "someone" in json.loads(response["body"])["details"]
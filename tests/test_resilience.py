@@ -0,0 +1,102 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+sys.path.append("./")
+
+from src.evaluation_engine.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    ResiliencePolicy,
+)
+
+
+def open_breaker(resilience: Resilience):
+    resilience.breaker.record_failure()
+    # Past its reset timeout, so the next call is the half-open probe
+    resilience.breaker._opened_at = time.monotonic() - resilience.policy.reset_timeout
+    assert resilience.breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_probe_lets_the_next_probe_through():
+    resilience = Resilience(
+        ResiliencePolicy(failure_threshold=1, hedge_percentile=None)
+    )
+    open_breaker(resilience)
+
+    async def scenario():
+        async def hang(timeout):
+            await asyncio.sleep(60)
+
+        async def answer(timeout):
+            return "ok"
+
+        probe = asyncio.ensure_future(resilience.call_async(hang))
+        await asyncio.sleep(0.01)
+        assert resilience.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await resilience.call_async(answer)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_breaker_allows_a_single_probe():
+    resilience = Resilience(
+        ResiliencePolicy(failure_threshold=1, hedge_percentile=None)
+    )
+    open_breaker(resilience)
+
+    async def scenario():
+        async def hang(timeout):
+            await asyncio.sleep(60)
+
+        probe = asyncio.ensure_future(resilience.call_async(hang))
+        await asyncio.sleep(0.01)
+        try:
+            with pytest.raises(CircuitOpenError):
+                await resilience.call_async(hang)
+        finally:
+            probe.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_async_attempts_stop_at_the_deadline():
+    resilience = Resilience(
+        ResiliencePolicy(deadline=0.2, max_attempts=1, hedge_percentile=None)
+    )
+    timeouts = []
+
+    async def hang(timeout):
+        timeouts.append(timeout)
+        await asyncio.sleep(60)
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(resilience.call_async(hang))
+
+    assert time.monotonic() - start < 1
+    assert 0 < timeouts[0] <= 0.2
+
+
+def test_sync_requests_get_the_time_left_as_their_timeout():
+    resilience = Resilience(
+        ResiliencePolicy(deadline=5.0, max_attempts=3, base_delay=0.01)
+    )
+    timeouts = []
+
+    def flaky(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) < 3:
+            raise TimeoutError("upstream timed out")
+        return "ok"
+
+    assert resilience.call(flaky) == "ok"
+    assert len(timeouts) == 3
+    assert 5.0 >= timeouts[0] > timeouts[1] > timeouts[2] > 0
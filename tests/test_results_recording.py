@@ -0,0 +1,72 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+sys.path.append("./")
+
+from src.benchmarks.stub_openai import LatencyModel, StubOpenAI
+from src.evaluation_engine.analysis_cache import AnalysisCache
+from src.evaluation_engine.analysis_result import AnalysisResult
+from src.evaluation_engine.results_store import ResultsStore
+from src.evaluation_engine.script_analysis import ScriptAnalyzer
+
+SCRIPT = (
+    "Milanote is a tool for organizing creative projects. I plan every video on a "
+    "board with my team. It's free, sign up with the link in the description."
+)
+
+
+class BrokenStore:
+    def append(self, *args):
+        raise OSError("disk full")
+
+
+@pytest.fixture
+def lambda_module(monkeypatch):
+    module = importlib.reload(
+        importlib.import_module("src.lambda.script_analyser_lambda")
+    )
+    analyzer = ScriptAnalyzer(openai_api_key="test", cache=AnalysisCache())
+    analyzer.openai_client = StubOpenAI(LatencyModel(0, 0, 0))
+    monkeypatch.setattr(module, "_ANALYZER", analyzer)
+    return module
+
+
+def invoke(module):
+    event = {"body": json.dumps({"content": SCRIPT, "creator_name": "Ana"})}
+    return module.lambda_handler(event, None)
+
+
+def test_store_failures_do_not_fail_the_request(lambda_module, monkeypatch):
+    monkeypatch.setattr(lambda_module, "_RESULTS_STORE", BrokenStore())
+
+    response = invoke(lambda_module)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["status"] == "APPROVED"
+
+
+def test_cache_hits_are_not_recorded_again(lambda_module, monkeypatch):
+    store = ResultsStore()
+    monkeypatch.setattr(lambda_module, "_RESULTS_STORE", store)
+
+    invoke(lambda_module)
+    rows = store.rows
+    invoke(lambda_module)
+
+    assert rows > 0
+    assert store.rows == rows
+
+
+def test_reused_checks_are_not_recorded_again():
+    store = ResultsStore()
+    passed = [AnalysisResult(criteria="introduction", passed=True, feedback="ok")]
+    analysis = {
+        "status": "APPROVED",
+        "details": {"core requirements": passed, "brand safety": passed},
+        "revision": {"reused_checks": ["core requirements"]},
+    }
+
+    assert store.append(analysis, "Ana", "milanote") == 1
@@ -0,0 +1,41 @@
+import sys
+
+sys.path.append("./")
+
+from src.benchmarks.bench_revisions import EDITS, first_revision
+from src.evaluation_engine.revisions import Revision, RevisionStore
+from src.evaluation_engine.rulepacks import default_registry
+
+WHOLE_SCRIPT_CHECKS = ["core requirements", "script flow"]
+
+
+def plan_edit(store, edit, creator="Ana"):
+    rulepack = default_registry().get()
+    plan = store.plan(creator, "ns", "\n\n".join(first_revision()), rulepack)
+    store.record(plan, {"status": "APPROVED", "details": {}})
+    edited = "\n\n".join(EDITS[edit](first_revision()))
+    return store.plan(creator, "ns", edited, rulepack)
+
+
+def test_a_replaced_brand_paragraph_reruns_the_whole_script_checks():
+    plan = plan_edit(RevisionStore(), "replaced paragraph")
+
+    assert plan.previous is not None
+    assert all(check in plan.rerun for check in WHOLE_SCRIPT_CHECKS)
+
+
+def test_a_typo_reuses_the_whole_script_checks():
+    plan = plan_edit(RevisionStore(), "typo")
+
+    assert not any(check in plan.rerun for check in WHOLE_SCRIPT_CHECKS)
+
+
+def test_mentions_are_persisted_with_the_revision(tmp_path):
+    path = str(tmp_path / "revisions.sqlite")
+    plan_edit(RevisionStore(sqlite_path=path), "typo")
+
+    reloaded = RevisionStore(sqlite_path=path).get("ana|ns")
+
+    assert isinstance(reloaded, Revision)
+    assert len(reloaded.paragraph_mentions) == len(reloaded.paragraph_hashes)
+    assert any(reloaded.paragraph_mentions)
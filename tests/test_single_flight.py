@@ -0,0 +1,31 @@
+import asyncio
+import sys
+
+sys.path.append("./")
+
+from src.evaluation_engine.results_store import replayed_categories
+from src.evaluation_engine.single_flight import SingleFlight
+
+ANALYSIS = {"status": "APPROVED", "details": {"brand safety": []}}
+
+
+def test_one_waiter_gets_the_analysis_unmarked_even_if_the_first_leaves():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def analyze():
+            await asyncio.sleep(0.05)
+            return ANALYSIS
+
+        first = asyncio.ensure_future(flight.run("key", analyze))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.run("key", analyze))
+        third = asyncio.ensure_future(flight.run("key", analyze))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(second, third)
+
+    second, third = asyncio.run(scenario())
+
+    assert "coalesced" not in second
+    assert third["coalesced"] and replayed_categories(third) == {"brand safety"}
@@ -36,6 +36,103 @@ loadingSpinner.innerHTML = `
     </div>
 `;
 
+// Streaming endpoint (NDJSON, one event per completed check). When set, results
+// are rendered as each check finishes instead of after the whole analysis.
+const STREAM_URL = null;
+
+// Process different sections of the feedback
+const sections = [
+    { name: 'Script Flow', key: 'script flow' },
+    { name: 'Core Requirements', key: 'core requirements' },
+    { name: 'Avoided Elements', key: 'avoided elements' },
+    { name: 'Brand Safety', key: 'brand safety' },
+    { name: 'Pre-screen', key: 'prescreen' }
+];
+
+function renderSection(container, name, items) {
+    const sectionTitle = document.createElement('h3');
+    sectionTitle.textContent = name;
+    container.appendChild(sectionTitle);
+
+    const sectionList = document.createElement('ul');
+    items.forEach(item => {
+        const feedbackItem = document.createElement('li');
+        feedbackItem.innerHTML = `
+            <strong>Criteria:</strong> ${item.criteria}<br>
+            <strong>Feedback:</strong> ${item.feedback || 'No specific feedback'}<br>
+            <strong>Passed:</strong> ${item.passed ? 'Yes' : 'No'}
+          `;
+        sectionList.appendChild(feedbackItem);
+    });
+
+    container.appendChild(sectionList);
+}
+
+function renderOverall(container, data) {
+    const overallMessage = document.createElement('div');
+    overallMessage.innerHTML = `
+      <h3>Overall Result</h3>
+      <p><strong>Message:</strong> ${data.message}</p>
+      <p><strong>Status:</strong> ${data.status}</p>
+    `;
+    container.appendChild(overallMessage);
+}
+
+function renderError() {
+    analysisResult.innerHTML = `
+      <div style="color: red;">
+        <h3>Error</h3>
+        <p>An error occurred. Please try again later.</p>
+      </div>
+    `;
+}
+
+async function analyzeStreaming(requestOptions) {
+    const response = await fetch(`${STREAM_URL}?format=ndjson`, requestOptions);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const feedbackContainer = document.createElement('div');
+    let buffer = '';
+    let started = false;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+
+        for (const line of lines) {
+            if (!line.trim()) {
+                continue;
+            }
+            const event = JSON.parse(line);
+            if (event.event === 'error') {
+                throw event;
+            }
+            if (!started) {
+                // Replace the spinner with the first results, keep it below them
+                analysisResult.innerHTML = '';
+                analysisResult.appendChild(feedbackContainer);
+                analysisResult.appendChild(loadingSpinner);
+                started = true;
+            }
+            if (event.event === 'check') {
+                sections.forEach(section => {
+                    if (event.details[section.key]) {
+                        renderSection(feedbackContainer, section.name, event.details[section.key]);
+                    }
+                });
+            } else if (event.event === 'status') {
+                loadingSpinner.remove();
+                renderOverall(feedbackContainer, event);
+            }
+        }
+    }
+}
+
 analyzeButton.addEventListener('click', () => {
     // Disable the button to prevent multiple submissions
     analyzeButton.disabled = true;
@@ -64,6 +161,19 @@ analyzeButton.addEventListener('click', () => {
         redirect: 'follow'
     };
 
+    if (STREAM_URL) {
+        analyzeStreaming(requestOptions)
+            .catch(error => {
+                console.log('Error:', error);
+                renderError();
+            })
+            .finally(() => {
+                // Re-enable the button
+                analyzeButton.disabled = false;
+            });
+        return;
+    }
+
     fetch("https://v5uxu6kjxlxnijvgofgqowvrve0yuegm.lambda-url.ap-south-1.on.aws/", requestOptions)
         .then(response => {
             data = response.json()
@@ -80,58 +190,24 @@ analyzeButton.addEventListener('click', () => {
             // Create a container for all feedback sections
             const feedbackContainer = document.createElement('div');
 
-            // Process different sections of the feedback
-            const sections = [
-                { name: 'Script Flow', key: 'script flow' },
-                { name: 'Core Requirements', key: 'core requirements' },
-                { name: 'Avoided Elements', key: 'avoided elements' },
-                { name: 'Brand Safety', key: 'brand safety' }
-            ];
-
             sections.forEach(section => {
                 if (data.details[section.key]) {
-                    const sectionTitle = document.createElement('h3');
-                    sectionTitle.textContent = section.name;
-                    feedbackContainer.appendChild(sectionTitle);
-
-                    const sectionList = document.createElement('ul');
-                    data.details[section.key].forEach(item => {
-                        const feedbackItem = document.createElement('li');
-                        feedbackItem.innerHTML = `
-            <strong>Criteria:</strong> ${item.criteria}<br>
-            <strong>Feedback:</strong> ${item.feedback || 'No specific feedback'}<br>
-            <strong>Passed:</strong> ${item.passed ? 'Yes' : 'No'}
-          `;
-                        sectionList.appendChild(feedbackItem);
-                    });
-
-                    feedbackContainer.appendChild(sectionList);
+                    renderSection(feedbackContainer, section.name, data.details[section.key]);
                 }
             });
 
             // Add overall message and status
-            const overallMessage = document.createElement('div');
-            overallMessage.innerHTML = `
-      <h3>Overall Result</h3>
-      <p><strong>Message:</strong> ${data.message}</p>
-      <p><strong>Status:</strong> ${data.status}</p>
-    `;
-            feedbackContainer.appendChild(overallMessage);
+            renderOverall(feedbackContainer, data);
 
             // Add feedback to analysis result
             analysisResult.appendChild(feedbackContainer);
         })
         .catch(error => {
             console.log('Error:', error);
-            analysisResult.innerHTML = `
-      <div style="color: red;">
-        <h3>Error</h3>
-        <p>An error occurred. Please try again later.</p>
-      </div>
-    `;
+            renderError();
         })
         .finally(() => {
             // Re-enable the button
             analyzeButton.disabled = false;
         });
-});
\ No newline at end of file
+});